@@ -0,0 +1,70 @@
+"""
+Week and month schedule queries through the lesson timeline, against parsing
+every lesson of every schedule, as the stored history grows.
+
+Run from the py_project directory:
+    python -m benchmarks.calendar_queries
+"""
+import time
+from datetime import datetime, timedelta
+
+from data.storage import DataStorage
+from models.schedule import Schedule
+
+CLASSES = 20
+SLOTS = ("08:00-08:45", "08:55-09:40", "09:50-10:35", "10:45-11:30", "11:40-12:25", "12:35-13:20")
+HISTORY_YEARS = (1, 2, 4)
+REPEAT = 20
+
+
+def build_storage(years: int) -> DataStorage:
+    """Dated lessons for every school day of the last `years` years."""
+    storage = DataStorage()
+    first_day = datetime(2026, 9, 1) - timedelta(days=365 * years)
+    for offset in range(365 * years):
+        day = first_day + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for class_number in range(CLASSES):
+            schedule = Schedule(storage.next_id("schedules"), f"9-{class_number}", day.date().isoformat())
+            for slot_number, slot in enumerate(SLOTS):
+                start = day + timedelta(hours=8, minutes=55 * slot_number)
+                schedule.lessons[slot] = {"subject": "Math", "teacher_id": class_number, "time": start.isoformat()}
+            storage.schedules[schedule.id] = schedule
+    storage.rebuild_indexes()
+    return storage
+
+
+def scan_week(storage: DataStorage, week_start: datetime, week_end: datetime):
+    """The previous get_schedules_by_week."""
+    return [schedule for schedule in storage.schedules.values() if any(
+        datetime.fromisoformat(lesson["time"]) >= week_start and datetime.fromisoformat(lesson["time"]) <= week_end
+        for lesson in schedule.lessons.values()
+    )]
+
+
+def timed(func) -> float:
+    """Return milliseconds per call."""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    week_start = datetime(2026, 6, 1)
+    week_end = week_start + timedelta(days=6, hours=23, minutes=59)
+    print(f"{'history':>8}  {'lessons':>9}  {'week scan (ms)':>14}  {'week index (ms)':>15}  {'month index (ms)':>16}")
+    for years in HISTORY_YEARS:
+        storage = build_storage(years)
+        lessons = sum(len(schedule.lessons) for schedule in storage.schedules.values())
+        assert {s.id for s in scan_week(storage, week_start, week_end)} == \
+            {s.id for s in storage.get_schedules_by_week(week_start, week_end)}
+        scan = timed(lambda: scan_week(storage, week_start, week_end))
+        week = timed(lambda: storage.get_schedules_by_week(week_start, week_end))
+        month = timed(lambda: storage.get_schedules_by_month(6, 2026))
+        print(f"{years:>6} y  {lessons:>9,}  {scan:>14.2f}  {week:>15.3f}  {month:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
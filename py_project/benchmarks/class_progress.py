@@ -0,0 +1,78 @@
+"""
+A class progress report from one view_class_progress call, against computing
+every student's progress, from a cold progress cache and after a few changes.
+
+Run from the py_project directory:
+    python -m benchmarks.class_progress [class_size]
+"""
+import random
+import sys
+import time
+from datetime import datetime
+
+from core.student import Student
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+
+ASSIGNMENTS = 40
+GRADES_PER_STUDENT = 40
+REPEAT = 5
+
+
+def build_storage(class_size: int) -> DataStorage:
+    rng = random.Random(0)
+    storage = DataStorage()
+    for student_id in range(1, class_size + 1):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+    for assignment_id in range(1, ASSIGNMENTS + 1):
+        storage.add_assignment(Assignment(assignment_id, f"Homework {assignment_id}", "", "2030-01-01T00:00:00",
+                                          rng.choice(("Math", "Physics")), 1, "9-A"))
+        storage.assign_assignment_to_class(assignment_id, "9-A")
+    for student_id in range(1, class_size + 1):
+        for _ in range(GRADES_PER_STUDENT):
+            storage.add_grade(Grade(storage.next_id("grades"), student_id, rng.choice(("Math", "Physics")),
+                                    rng.randint(1, 5), datetime.now(), 1))
+    return storage
+
+
+def timed(func) -> float:
+    """Return milliseconds per call."""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    class_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    storage = build_storage(class_size)
+    rng = random.Random(1)
+
+    def per_student():
+        # A report built the old way: every student's progress computed from scratch.
+        return [storage._student_progress(student_id) for student_id in storage.get_students_by_class("9-A")]
+
+    def cold():
+        storage.invalidate_progress()
+        return storage.view_class_progress("9-A")
+
+    def after_changes():
+        # A few grades were entered since the last refresh.
+        for student_id in rng.sample(range(1, class_size + 1), 10):
+            storage.add_grade(Grade(storage.next_id("grades"), student_id, "Math", 5, datetime.now(), 1))
+        return storage.view_class_progress("9-A")
+
+    assert cold()["students"] == per_student()
+    loop = timed(per_student)
+    bulk = timed(cold)
+    warm = timed(after_changes)
+    assert storage.view_class_progress("9-A")["students"] == per_student()
+    print(f"{class_size:,} students, {ASSIGNMENTS} assignments, {GRADES_PER_STUDENT} grades each")
+    print(f"per-student loop:                       {loop:7.1f} ms")
+    print(f"view_class_progress, cold cache:        {bulk:7.1f} ms")
+    print(f"view_class_progress, 10 grades changed: {warm:7.1f} ms ({loop / warm:.0f}x faster than the loop)")
+
+
+if __name__ == "__main__":
+    main()
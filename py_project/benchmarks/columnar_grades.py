@@ -0,0 +1,73 @@
+"""
+Memory and speed of the columnar grade store against Grade objects.
+
+Run from the py_project directory:
+    python -m benchmarks.columnar_grades [grade_count]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from data import columnar
+from data.columnar import ColumnarGradeStore
+from models.grades import Grade
+
+SUBJECTS = ("Math", "Physics", "Biology", "History", "English", "Chemistry")
+
+
+def make_grades(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2025, 9, 1)
+    for grade_id in range(1, count + 1):
+        yield Grade(grade_id, rng.randint(1, 5000), rng.choice(SUBJECTS), rng.randint(1, 5),
+                    start + timedelta(minutes=rng.randint(0, 200_000)), rng.randint(1, 120), comments=[])
+
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def object_group_by_student(grades: dict):
+    groups = defaultdict(list)
+    for grade in grades.values():
+        groups[grade.student_id].append(grade.value)
+    return {student_id: (sum(values) / len(values), min(values), max(values)) for student_id, values in groups.items()}
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    objects, object_bytes = measure_memory(lambda: {grade.id: grade for grade in make_grades(count)})
+    store, store_bytes = measure_memory(lambda: _build_store(objects))
+
+    print(f"grades: {count:,}  (numpy: {'yes' if columnar.np is not None else 'no'})")
+    print(f"{'':24}{'objects':>12}{'columnar':>12}")
+    print(f"{'bytes per grade':24}{object_bytes / count:>12.1f}{store_bytes / count:>12.1f}")
+    print(f"{'group by student (s)':24}{timed(object_group_by_student, objects):>12.3f}"
+          f"{timed(store.group_stats, 'student', percentiles=()):>12.3f}")
+    print(f"{'group by subject (s)':24}{'':>12}{timed(store.group_stats, 'subject'):>12.3f}")
+    print(f"{'group by date (s)':24}{'':>12}{timed(store.group_stats, 'date'):>12.3f}")
+
+
+def _build_store(grades: dict) -> ColumnarGradeStore:
+    store = ColumnarGradeStore()
+    store.add_grades(grades.values())
+    return store
+
+
+if __name__ == "__main__":
+    main()
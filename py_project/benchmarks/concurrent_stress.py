@@ -0,0 +1,166 @@
+"""
+Many threads reading and writing one ConcurrentStorage: throughput as the
+thread count grows, and the storage invariants checked during and after.
+
+Each thread runs a mix of 80% reads (student progress, grade lists, class
+statistics, unread counts) and 20% writes (submitting and grading an
+assignment, adding and updating grades, sending and reading notifications).
+A checker thread repeatedly takes the read lock and checks that the grade
+table and the per-student grade index agree; after the run every index is
+compared with a full rebuild, inbox unread counts are recounted, cached
+progress is compared with freshly computed progress and the number of
+stored grades with the number added.
+
+Run from the py_project directory:
+    python -m benchmarks.concurrent_stress
+"""
+import random
+import threading
+import time
+from datetime import datetime
+
+from core.student import Student
+from core.teacher import Teacher
+from data.concurrent_storage import ConcurrentStorage
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+from models.notifications import Notification
+
+CLASSES = 20
+STUDENTS_PER_CLASS = 30
+ASSIGNMENTS_PER_CLASS = 5
+OPERATIONS = 20_000  # per thread count, split between the threads
+THREAD_COUNTS = (1, 2, 4, 8, 16)
+
+
+def build_storage(storage_class) -> DataStorage:
+    storage = storage_class()
+    storage.add_user(Teacher(1, "Teacher", "teacher@school.uz", "x"))
+    for class_number in range(CLASSES):
+        class_id = f"{class_number // 4 + 5}-{'ABCD'[class_number % 4]}"
+        for _ in range(STUDENTS_PER_CLASS):
+            student_id = storage.next_id("users")
+            storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", class_id))
+        for _ in range(ASSIGNMENTS_PER_CLASS):
+            assignment = Assignment(storage.next_id("assignments"), "Homework", "", "2030-01-01T00:00:00",
+                                    "Math", 1, class_id)
+            storage.add_assignment(assignment)
+            storage.assign_assignment_to_class(assignment.id, class_id)
+    return storage
+
+
+class Workload:
+    def __init__(self, storage: DataStorage):
+        self.storage = storage
+        self.students = [user for user in storage.users.values() if isinstance(user, Student)]
+        self.class_ids = sorted({student.class_id for student in self.students})
+        self.grades_added = 0
+        self._count_lock = threading.Lock()
+
+    def run(self, operations: int, seed: int):
+        storage = self.storage
+        rng = random.Random(seed)
+        grades_added = 0
+        for _ in range(operations):
+            student = rng.choice(self.students)
+            roll = rng.random()
+            if roll < 0.3:
+                storage.view_student_progress(student.id, rng.choice((None, "Math")))
+            elif roll < 0.5:
+                storage.get_grades_by_student(student.id)
+            elif roll < 0.65:
+                storage.calculate_grade_statistics_by_class(student.class_id)
+            elif roll < 0.8:
+                storage.count_unread_notifications(student.id)
+            elif roll < 0.86:
+                assignment = storage.get_assignment(rng.choice(list(student.assignments)))
+                student.submit_assignment(assignment.id, "answer", storage)
+                assignment.set_grade(student.id, rng.randint(1, 5), storage)
+                grades_added += 1
+            elif roll < 0.92:
+                storage.add_grade(Grade(storage.next_id("grades"), student.id, "Physics",
+                                        rng.randint(1, 5), datetime.now(), 1))
+                grades_added += 1
+            elif roll < 0.96:
+                grades = storage.get_grades_by_student(student.id)
+                if grades:
+                    rng.choice(grades).update_grade(rng.randint(1, 5))
+            else:
+                Notification(storage.next_id("notifications"), "Reminder", student.id).send(storage)
+                unread = storage.get_notifications_by_user(student.id, unread_only=True)
+                if unread:
+                    unread[0].mark_as_read()
+        with self._count_lock:
+            self.grades_added += grades_added
+
+
+def check_consistent_reads(storage: ConcurrentStorage, students, stop: threading.Event, failures: list):
+    """Grade table and per-student grade index must agree whenever a reader looks."""
+    while not stop.is_set():
+        with storage.read_lock():
+            indexed = sum(len(storage.get_grades_by_student(student.id)) for student in students)
+            stored = len(storage.grades)
+        if indexed != stored:
+            failures.append(f"read saw {stored} grades but {indexed} indexed")
+        time.sleep(0.001)
+
+
+def check_invariants(storage: DataStorage, workload: Workload, initial_grades: int) -> list:
+    failures = []
+    if len(storage.grades) != initial_grades + workload.grades_added:
+        failures.append(f"{len(storage.grades)} grades stored, expected {initial_grades + workload.grades_added}")
+    mismatched = storage.verify_indexes()
+    if mismatched:
+        failures.append(f"indexes out of sync: {mismatched}")
+    for student in workload.students:
+        unread = sum(1 for notification in student.notifications.query() if not notification.is_read)
+        if storage.count_unread_notifications(student.id) != unread:
+            failures.append(f"unread count of student {student.id} is off")
+        for subject in (None, "Math"):
+            if storage.view_student_progress(student.id, subject) != storage._student_progress(student.id, subject):
+                failures.append(f"cached progress of student {student.id} is stale")
+    return failures
+
+
+def measure(storage_class, threads: int):
+    """Return (operations per second, invariant failures)."""
+    storage = build_storage(storage_class)
+    workload = Workload(storage)
+    initial_grades = len(storage.grades)
+    stop = threading.Event()
+    failures = []
+    checker = None
+    if isinstance(storage, ConcurrentStorage):
+        checker = threading.Thread(target=check_consistent_reads, args=(storage, workload.students, stop, failures))
+        checker.start()
+    workers = [threading.Thread(target=workload.run, args=(OPERATIONS // threads, seed)) for seed in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if checker is not None:
+        checker.join()
+    failures += check_invariants(storage, workload, initial_grades)
+    return OPERATIONS // threads * threads / elapsed, failures
+
+
+def main():
+    print(f"{CLASSES * STUDENTS_PER_CLASS} students, {OPERATIONS:,} operations per run, 80% reads")
+    rate, failures = measure(DataStorage, 1)
+    print(f"{'DataStorage, 1 thread':>28}: {rate:>9,.0f} ops/s  {'ok' if not failures else failures[0]}")
+    all_failures = failures
+    for threads in THREAD_COUNTS:
+        rate, failures = measure(ConcurrentStorage, threads)
+        label = f"ConcurrentStorage, {threads} thread{'s' if threads > 1 else ''}"
+        print(f"{label:>28}: {rate:>9,.0f} ops/s  {'ok' if not failures else failures[0]}")
+        all_failures += failures
+    if all_failures:
+        raise SystemExit(f"{len(all_failures)} invariant violations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Cost of sending deadline reminders: DeadlineReminders.tick once a minute over
+a simulated day, against scanning every assignment's deadline for every
+student once a minute (what calling send_automatic_notification for each
+student amounts to).
+
+Run from the py_project directory:
+    python -m benchmarks.deadline_reminders [assignments]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from core.student import Student
+from data.storage import DataStorage
+from models.assignments import Assignment
+from utils.reminders import DeadlineReminders
+
+CLASSES = 40
+STUDENTS_PER_CLASS = 25
+SCAN_TICKS = 10  # the scan is slow: time a few ticks and scale up
+START = datetime(2026, 10, 1)
+
+
+def build_storage(assignments: int) -> DataStorage:
+    rng = random.Random(0)
+    storage = DataStorage()
+    class_ids = [f"{number // 4 + 5}-{'ABCD'[number % 4]}" for number in range(CLASSES)]
+    for class_id in class_ids:
+        for student_id in storage.reserve_ids("users", STUDENTS_PER_CLASS):
+            storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", class_id))
+    for assignment_id in storage.reserve_ids("assignments", assignments):
+        # Deadlines spread over 30 days, on the minute.
+        deadline = START + timedelta(minutes=rng.randrange(30 * 24 * 60))
+        storage.add_assignment(Assignment(assignment_id, "Homework", "", deadline.isoformat(), "Math", 1,
+                                          rng.choice(class_ids)))
+    return storage
+
+
+def scan_tick(storage: DataStorage, now: datetime) -> int:
+    """Reminders due in the minute before now, found by parsing every deadline for every student."""
+    due = 0
+    for user in storage.users.values():
+        for assignment in storage.assignments.values():
+            if assignment.class_id != user.class_id:
+                continue
+            reminder = datetime.fromisoformat(assignment.deadline) - timedelta(hours=24)
+            if now - timedelta(minutes=1) < reminder <= now:
+                due += 1
+    return due
+
+
+def main():
+    assignments = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    storage = build_storage(assignments)
+    start = time.perf_counter()
+    reminders = DeadlineReminders(storage)
+    scheduled = time.perf_counter() - start
+
+    minutes = 24 * 60
+    start = time.perf_counter()
+    sent = 0
+    for minute in range(1, minutes + 1):
+        sent += len(reminders.tick(START + timedelta(minutes=minute)))
+    heap_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for minute in range(1, SCAN_TICKS + 1):
+        scan_tick(storage, START + timedelta(minutes=minute))
+    scan_per_tick = (time.perf_counter() - start) / SCAN_TICKS
+
+    stats = reminders.stats()
+    print(f"{assignments:,} assignments, {CLASSES * STUDENTS_PER_CLASS:,} students, offsets 24h and 1h")
+    print(f"scheduling: {scheduled * 1000:.0f} ms")
+    print(f"heap, one tick a minute for a day: {heap_time * 1000:8.0f} ms total, "
+          f"{heap_time / minutes * 1e6:8.0f} us per tick ({stats['sent']:,} reminders, {sent:,} notifications)")
+    print(f"scan of every deadline per student: {scan_per_tick * 1000:8.0f} ms per tick, "
+          f"{scan_per_tick * minutes:8.0f} s per day")
+
+
+if __name__ == "__main__":
+    main()
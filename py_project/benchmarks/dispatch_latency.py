@@ -0,0 +1,54 @@
+"""
+Latency of adding a schedule with inline notification delivery against the dispatcher.
+
+Run from the py_project directory:
+    python -m benchmarks.dispatch_latency
+"""
+import time
+
+from core.student import Student
+from data.storage import DataStorage
+from models.schedule import Schedule
+from utils.dispatch import NotificationDispatcher
+
+CLASS_SIZES = (30, 1_000, 10_000)
+SCHEDULES = 20
+
+
+def build_storage(student_count: int) -> DataStorage:
+    storage = DataStorage()
+    for student_id in range(1, student_count + 1):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+    return storage
+
+
+def add_schedules(storage: DataStorage, dispatcher: NotificationDispatcher = None) -> float:
+    """
+    Return the average time of one add_schedule call in milliseconds.
+
+    Clicks are spaced out: the queue is drained between them (untimed), as it
+    would be between real user actions.
+    """
+    total = 0.0
+    for schedule_id in range(1, SCHEDULES + 1):
+        start = time.perf_counter()
+        storage.add_schedule(Schedule(schedule_id, "9-A", "Monday"))
+        total += time.perf_counter() - start
+        if dispatcher is not None:
+            dispatcher.flush()
+    return total / SCHEDULES * 1000
+
+
+def main():
+    print(f"{'students':>9}  {'inline (ms)':>11}  {'queued (ms)':>11}  {'p95 delivery latency (ms)':>25}")
+    for size in CLASS_SIZES:
+        inline = add_schedules(build_storage(size))
+        storage = build_storage(size)
+        with NotificationDispatcher(storage, max_queue=size) as dispatcher:
+            queued = add_schedules(storage, dispatcher)
+            metrics = dispatcher.metrics()
+        print(f"{size:>9,}  {inline:>11.3f}  {queued:>11.3f}  {metrics['latency']['p95'] * 1000:>25.1f}")
+
+
+if __name__ == "__main__":
+    main()
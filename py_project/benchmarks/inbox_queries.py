@@ -0,0 +1,66 @@
+"""
+Inbox reads of a long-lived account, against filtering a list of notification dicts.
+
+Run from the py_project directory:
+    python -m benchmarks.inbox_queries [notification_count]
+"""
+import random
+import sys
+import time
+
+from core.student import Student
+from models.notifications import Notification, Priority
+
+UNREAD = 200
+REPEAT = 200
+
+
+def timed(func) -> float:
+    """Return microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rng = random.Random(0)
+    unread_ids = set(rng.sample(range(1, count + 1), UNREAD))
+    student = Student(1, "Student", "s@school.uz", "x", "9-A")
+    for notification_id in range(1, count + 1):
+        student.add_notification(Notification(notification_id, "Graded", 1, priority=rng.choice(list(Priority)),
+                                              is_read=notification_id not in unread_ids))
+    # What User.notifications used to be: one dict per notification.
+    dicts = [n.to_dict() for n in student.notifications.query()]
+
+    rows = [
+        ("unread count",
+         lambda: sum(1 for n in dicts if not n["is_read"]),
+         lambda: student.unread_notification_count()),
+        ("unread, high priority",
+         lambda: [n for n in dicts if not n["is_read"] and n["priority"] == "High"],
+         lambda: student.view_notifications(unread_only=True, priority=Priority.HIGH)),
+        ("newest 20",
+         lambda: sorted(dicts, key=lambda n: n["id"], reverse=True)[:20],
+         lambda: student.latest_notifications(20)),
+    ]
+    print(f"{count:,} notifications, {UNREAD} unread")
+    print(f"{'query':24}{'list (us)':>12}{'inbox (us)':>12}")
+    for name, scan, inbox in rows:
+        print(f"{name:24}{timed(scan):>12.1f}{timed(inbox):>12.1f}")
+
+    victims = rng.sample(range(1, count + 1), REPEAT)
+    start = time.perf_counter()
+    for notification_id in victims:
+        dicts = [n for n in dicts if n["id"] != notification_id]
+    scan = (time.perf_counter() - start) / REPEAT * 1e6
+    start = time.perf_counter()
+    for notification_id in victims:
+        student.delete_notification(notification_id)
+    inbox = (time.perf_counter() - start) / REPEAT * 1e6
+    print(f"{'delete by id':24}{scan:>12.1f}{inbox:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
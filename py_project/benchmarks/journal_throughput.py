@@ -0,0 +1,75 @@
+"""
+Grade inserts per second with the write-ahead journal at different group
+commit sizes, and recovery time of a fixed-size storage as its history of
+updates grows.
+
+Run from the py_project directory:
+    python -m benchmarks.journal_throughput
+"""
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from data.journal import Journal
+from data.storage import DataStorage
+from models.grades import Grade
+
+WRITES = 20_000
+GROUP_SIZES = (1, 8, 64, 512)
+GRADES = 20_000
+HISTORY = (30_000, 100_000, 300_000)  # grade updates after the inserts
+SNAPSHOT_EVERY = 25_000
+
+
+def insert_grades(storage: DataStorage, count: int) -> float:
+    """Return inserts per second."""
+    date = datetime(2026, 9, 1)
+    start = time.perf_counter()
+    for grade_id in storage.reserve_ids("grades", count):
+        storage.add_grade(Grade(grade_id, grade_id % 1000 + 1, "Math", grade_id % 5 + 1, date, 1))
+    if storage.journal is not None:
+        storage.journal.sync()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    print(f"{WRITES:,} grade inserts")
+    print(f"{'journal':>20}  {'inserts/s':>10}  {'fsyncs':>7}")
+    print(f"{'none':>20}  {insert_grades(DataStorage(), WRITES):>10,.0f}  {0:>7}")
+    for group_size in GROUP_SIZES:
+        directory = tempfile.mkdtemp()
+        try:
+            journal = Journal(directory, group_size=group_size, group_interval=1.0, snapshot_every=None)
+            storage = journal.attach(DataStorage())
+            rate = insert_grades(storage, WRITES)
+            print(f"{'group of ' + str(group_size):>20}  {rate:>10,.0f}  {journal.stats()['groups']:>7,}")
+            journal.close()
+        finally:
+            shutil.rmtree(directory)
+
+    print(f"\nrecovery of {GRADES:,} grades, snapshot every {SNAPSHOT_EVERY:,} changes")
+    print(f"{'updates':>10}  {'replayed':>9}  {'recovery (s)':>12}")
+    for history in HISTORY:
+        directory = tempfile.mkdtemp()
+        try:
+            journal = Journal(directory, group_size=512, snapshot_every=SNAPSHOT_EVERY, fsync=False)
+            storage = journal.attach(DataStorage())
+            insert_grades(storage, GRADES)
+            grades = list(storage.grades.values())
+            for update in range(history):
+                grades[update % GRADES].update_grade(update % 5 + 1)
+            journal.close()
+            start = time.perf_counter()
+            recovered = Journal(directory)
+            storage = recovered.recover()
+            elapsed = time.perf_counter() - start
+            assert len(storage.grades) == GRADES
+            print(f"{history:>10,}  {recovered.stats()['replayed']:>9,}  {elapsed:>12.2f}")
+            recovered.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
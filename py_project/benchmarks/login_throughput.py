@@ -0,0 +1,45 @@
+"""
+Login throughput of utils.auth.authenticate_user as the school grows.
+
+Run from the py_project directory:
+    python -m benchmarks.login_throughput
+"""
+import random
+import time
+
+from core.teacher import Teacher
+from data.storage import DataStorage
+from utils.auth import hash_password, authenticate_user
+
+SIZES = (100, 1_000, 10_000, 100_000)
+LOGINS = 20_000
+
+
+def build_storage(user_count: int) -> DataStorage:
+    storage = DataStorage()
+    password_hash = hash_password("secret")
+    for user_id in range(1, user_count + 1):
+        storage.add_user(Teacher(user_id, f"User {user_id}", f"user{user_id}@example.com", password_hash))
+    return storage
+
+
+def measure(user_count: int, logins: int = LOGINS, seed: int = 0) -> float:
+    """Return successful logins per second against a school of user_count users."""
+    storage = build_storage(user_count)
+    rng = random.Random(seed)
+    emails = [f"user{rng.randint(1, user_count)}@example.com" for _ in range(logins)]
+    start = time.perf_counter()
+    for email in emails:
+        if authenticate_user(email, "secret", storage) is None:
+            raise RuntimeError(f"Login failed for {email}")
+    return logins / (time.perf_counter() - start)
+
+
+def main():
+    print(f"{'users':>8}  {'logins/s':>12}")
+    for size in SIZES:
+        print(f"{size:>8}  {measure(size):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Memory footprint of the model and role objects of a synthetic school.
+
+Every object is built from freshly made strings, the way they arrive from a
+form, a JSON file or a database row, so repeated values are only shared when
+the classes intern them.
+
+The "before" columns measure the same objects as the classes were without
+__slots__ and interning: a copy of each object in a plain class, with its
+attributes in a __dict__ and an object of its own for every string and int
+value. Before inboxes, a user kept a to_dict() copy of each notification, so
+the baseline of a notification includes one. A user's Inbox is created with
+its first notification, so it is counted with the notifications.
+
+Run from the py_project directory:
+    python -m benchmarks.memory_footprint [student_count]
+"""
+import gc
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+from core.inbox import Inbox
+from core.parent import Parent
+from core.student import Student
+from core.teacher import Teacher
+from core.user import User
+from models.assignments import Assignment
+from models.grades import Grade
+from models.notifications import Notification, Priority
+from models.schedule import Schedule
+
+SUBJECTS = ("Math", "Physics", "Biology", "History", "English", "Chemistry")
+LETTERS = "ABCD"
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
+TIMES = ("08:00-08:45", "08:55-09:40", "09:50-10:35", "10:45-11:30", "11:40-12:25", "12:35-13:20")
+GRADES_PER_STUDENT = 20
+NOTIFICATIONS_PER_STUDENT = 5
+ASSIGNMENTS_PER_CLASS = 12
+STUDENTS_PER_CLASS = 25
+STUDENTS_PER_TEACHER = 25
+
+
+def fresh(value: str) -> str:
+    """A new string object equal to value, as a parser would produce it."""
+    return "".join(list(value))
+
+
+def measure(build):
+    """Run build() and return (result, bytes still allocated by it)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+_PLAIN_CLASSES = {}
+
+
+def _slot_values(obj):
+    """The attributes of a slotted object, in declaration order (base classes first)."""
+    values = {}
+    for cls in reversed(type(obj).__mro__):
+        for name in getattr(cls, "__slots__", ()):
+            if not name.startswith("_") and hasattr(obj, name):
+                values[name] = getattr(obj, name)
+    return values
+
+
+def _unshared(value):
+    """
+    value with new objects for the strings and ints in it, as the measured objects
+    got them (ints below 257 are shared by Python anyway).
+    """
+    if isinstance(value, str):
+        return fresh(value)
+    if type(value) is int:
+        return value + 0
+    if isinstance(value, dict):
+        # Keys that are identifiers come from literals in the code, and were shared before too.
+        return {key if key.isidentifier() else fresh(key): _unshared(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_unshared(item) for item in value]
+    if isinstance(value, Inbox):
+        return [_unshared(notification.to_dict()) for notification in value]
+    return value
+
+
+def unslotted_copy(obj):
+    """A copy of obj as an instance of a plain class: attributes in a __dict__, strings unshared."""
+    cls = type(obj)
+    plain = _PLAIN_CLASSES.get(cls)
+    if plain is None:
+        plain = _PLAIN_CLASSES[cls] = type(cls.__name__, (), {})
+    copy = plain()
+    for name, value in _slot_values(obj).items():
+        setattr(copy, name, _unshared(value))
+    if isinstance(obj, User):
+        # Every user had a list of notifications; the inbox is created with the first one now.
+        copy.notifications = _unshared(obj.inbox(create=False) or [])
+    return copy
+
+
+def build_school(student_count: int, seed: int = 0):
+    """Build every kind of object once and return {kind: (count, bytes, bytes before)}."""
+    rng = random.Random(seed)
+    class_count = max(1, student_count // STUDENTS_PER_CLASS)
+    class_ids = [f"{5 + index // len(LETTERS)}-{LETTERS[index % len(LETTERS)]}" for index in range(class_count)]
+    teacher_count = max(1, student_count // STUDENTS_PER_TEACHER)
+    start = datetime(2025, 9, 1)
+    results = {}
+    keep = []
+
+    def record(kind, build, baseline=None):
+        objects, size = measure(build)
+        keep.append(objects)
+        copies, baseline_size = measure(lambda: [unslotted_copy(obj) for obj in objects] if baseline is None
+                                        else baseline(objects))
+        del copies
+        # The list holding the objects is not part of their footprint.
+        results[kind] = (len(objects), size - sys.getsizeof(objects), baseline_size - sys.getsizeof(objects))
+        return objects
+
+    students = record("Student", lambda: [
+        Student(student_id, fresh(f"Student {student_id}"), f"student{student_id}@school.uz",
+                f"{student_id:064x}", fresh(class_ids[(student_id - 1) // STUDENTS_PER_CLASS % class_count]))
+        for student_id in range(1, student_count + 1)
+    ])
+    record("Teacher", lambda: [
+        Teacher(student_count + teacher_id, fresh(f"Teacher {teacher_id}"), f"teacher{teacher_id}@school.uz",
+                f"{teacher_id:064x}")
+        for teacher_id in range(1, teacher_count + 1)
+    ])
+    record("Parent", lambda: [
+        Parent(2 * student_count + student_id, fresh(f"Parent {student_id}"), f"parent{student_id}@school.uz",
+               f"{student_id:064x}")
+        for student_id in range(1, student_count + 1)
+    ])
+    record("Grade", lambda: [
+        Grade(grade_id, rng.randint(1, student_count), fresh(rng.choice(SUBJECTS)), rng.randint(1, 5),
+              start + timedelta(minutes=rng.randint(0, 200_000)), student_count + rng.randint(1, teacher_count),
+              comments=[])
+        for grade_id in range(1, student_count * GRADES_PER_STUDENT + 1)
+    ])
+    record("Assignment", lambda: [
+        Assignment(assignment_id, fresh(f"Homework {assignment_id}"), fresh("Exercises from the textbook"),
+                   (start + timedelta(days=assignment_id % 90)).isoformat(),
+                   fresh(SUBJECTS[assignment_id % len(SUBJECTS)]), student_count + 1,
+                   fresh(class_ids[assignment_id % class_count]), difficulty=fresh("o'rta"))
+        for assignment_id in range(1, class_count * ASSIGNMENTS_PER_CLASS + 1)
+    ])
+
+    def build_schedules():
+        schedules = []
+        for class_id in class_ids:
+            for day in DAYS:
+                schedule = Schedule(len(schedules) + 1, fresh(class_id), fresh(day))
+                for time in TIMES:
+                    schedule.lessons[fresh(time)] = {"subject": fresh(rng.choice(SUBJECTS)),
+                                                     "teacher_id": student_count + rng.randint(1, teacher_count)}
+                schedules.append(schedule)
+        return schedules
+
+    record("Schedule", build_schedules)
+
+    def build_notifications():
+        # Each notification is kept by the storage and by its recipient.
+        notifications = []
+        for student in students:
+            for _ in range(NOTIFICATIONS_PER_STUDENT):
+                notification = Notification(len(notifications) + 1, fresh("Your assignment has been graded."),
+                                            student.id, created_at=start.isoformat(), priority=Priority.MEDIUM)
+                student.add_notification(notification)
+                notifications.append(notification)
+        return notifications
+
+    def notification_baseline(notifications):
+        copies = []
+        for notification in notifications:
+            copies.append(unslotted_copy(notification))
+            copies.append(_unshared(notification.to_dict()))  # the recipient's copy
+        return copies
+
+    record("Notification", build_notifications, notification_baseline)
+    return results
+
+
+def main():
+    student_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    results = build_school(student_count)
+    total_bytes = sum(size for _, size, _ in results.values())
+    total_before = sum(before for _, _, before in results.values())
+    print(f"school of {student_count:,} students")
+    print(f"{'':24}{'bytes/object':>20}{'total MB':>20}")
+    print(f"{'kind':14}{'objects':>10}{'before':>10}{'after':>10}{'before':>10}{'after':>10}")
+    for kind, (count, size, before) in results.items():
+        print(f"{kind:14}{count:>10,}{before / count:>10.1f}{size / count:>10.1f}"
+              f"{before / 2 ** 20:>10.2f}{size / 2 ** 20:>10.2f}")
+    print(f"{'total':14}{sum(count for count, _, _ in results.values()):>10,}{'':>20}"
+          f"{total_before / 2 ** 20:>10.2f}{total_bytes / 2 ** 20:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Cost of notifying a whole class, one send at a time against Notification.broadcast.
+
+Run from the py_project directory:
+    python -m benchmarks.notification_fanout
+"""
+import time
+
+from core.student import Student
+from data.storage import DataStorage
+from models.notifications import Notification, Priority
+
+CLASS_SIZES = (30, 300, 3_000, 30_000)
+ROUNDS = 5
+
+
+def build_storage(student_count: int) -> DataStorage:
+    storage = DataStorage()
+    for student_id in range(1, student_count + 1):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+    return storage
+
+
+def send_one_by_one(storage: DataStorage, message: str):
+    for student_id in storage.get_students_by_class("9-A"):
+        Notification(storage.next_id("notifications"), message, student_id, priority=Priority.MEDIUM).send(storage)
+
+
+def send_broadcast(storage: DataStorage, message: str):
+    Notification.broadcast(storage.get_students_by_class("9-A"), message, storage)
+
+
+def measure(send, student_count: int) -> float:
+    """Return microseconds per delivered notification."""
+    storage = build_storage(student_count)
+    start = time.perf_counter()
+    for round_number in range(ROUNDS):
+        send(storage, f"Schedule change {round_number}")
+    return (time.perf_counter() - start) / (ROUNDS * student_count) * 1e6
+
+
+def main():
+    print(f"{'recipients':>10}  {'send (us)':>10}  {'broadcast (us)':>14}")
+    for size in CLASS_SIZES:
+        print(f"{size:>10,}  {measure(send_one_by_one, size):>10.2f}  {measure(send_broadcast, size):>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Parent alert generation: ParentAlerts.run over every parent of a school,
+first when every alert is new and then when they were all sent before,
+against the per-child inbox scan that receive_child_notification used to do
+(substring checks of every inbox message for every low grade and missed
+deadline, with the deadlines parsed on every call).
+
+Run from the py_project directory:
+    python -m benchmarks.parent_alerts [students]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from core.parent import Parent
+from core.student import Student
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+from utils.parent_alerts import ParentAlerts, low_grade_message, missed_deadline_message
+
+CLASSES = 40
+ASSIGNMENTS_PER_CLASS = 30
+GRADES_PER_STUDENT = 40
+NOW = datetime(2026, 10, 15)
+
+
+def build_storage(students: int) -> DataStorage:
+    rng = random.Random(0)
+    storage = DataStorage()
+    class_ids = [f"{number // 4 + 5}-{'ABCD'[number % 4]}" for number in range(CLASSES)]
+    for student_id in storage.reserve_ids("users", students):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x",
+                                 class_ids[student_id % CLASSES]))
+    for class_id in class_ids:
+        for assignment_id in storage.reserve_ids("assignments", ASSIGNMENTS_PER_CLASS):
+            deadline = NOW + timedelta(days=rng.randint(-20, 20))
+            storage.add_assignment(Assignment(assignment_id, f"Homework {assignment_id}", "", deadline.isoformat(),
+                                              "Math", 1, class_id))
+            storage.assign_assignment_to_class(assignment_id, class_id)
+    grade_ids = iter(storage.reserve_ids("grades", students * GRADES_PER_STUDENT))
+    for student_id in range(1, students + 1):
+        for _ in range(GRADES_PER_STUDENT):
+            storage.add_grade(Grade(next(grade_ids), student_id, rng.choice(("Math", "Physics", "History")),
+                                    rng.randint(1, 5), NOW, 1))
+    for student_id in range(1, students + 1):
+        parent = Parent(storage.next_id("users"), f"Parent {student_id}", f"p{student_id}@school.uz", "x")
+        storage.add_user(parent)
+        parent.add_child(student_id, storage)
+    return storage
+
+
+def scan(storage: DataStorage, parent, child_id: int) -> int:
+    """The checks receive_child_notification(generate_new=True) made before; returns the alerts it would send."""
+    messages = [n.to_dict() for n in storage.get_notifications_by_user(parent.id) if f"Child {child_id}" in n.message]
+    new = 0
+    for grade in storage.get_grades_by_student(child_id):
+        if grade.value <= 3 and not any(low_grade_message(child_id, grade) in m["message"] for m in messages):
+            new += 1
+    student = storage.get_user(child_id)
+    for assignment in storage.get_assignments_by_student(child_id):
+        status = student.assignments.get(assignment.id, {})
+        if (datetime.fromisoformat(assignment.deadline) < NOW and status.get("status") != "Submitted"
+                and not any(missed_deadline_message(child_id, assignment) in m["message"] for m in messages)):
+            new += 1
+    return new
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    storage = build_storage(students)
+    parents = [user for user in storage.users.values() if isinstance(user, Parent)]
+    alerts = ParentAlerts(storage)
+
+    start = time.perf_counter()
+    sent = alerts.run(NOW)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    again = alerts.run(NOW)
+    second = time.perf_counter() - start
+    start = time.perf_counter()
+    missed = sum(scan(storage, parent, parent.children[0]) for parent in parents)
+    scanned = time.perf_counter() - start
+    assert not again and not missed
+
+    print(f"{students:,} students and parents, {len(storage.grades):,} grades, "
+          f"{len(storage.assignments):,} assignments")
+    print(f"ParentAlerts.run, all new:       {first * 1000:8.0f} ms ({len(sent):,} alerts)")
+    print(f"ParentAlerts.run, all sent:      {second * 1000:8.0f} ms")
+    print(f"inbox scan per child, all sent:  {scanned * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Repeated view_student_progress refreshes with the progress cache, against
+rebuilding the progress every time, with a grade added now and then.
+
+Run from the py_project directory:
+    python -m benchmarks.progress_cache
+"""
+import random
+import time
+from datetime import datetime
+
+from core.student import Student
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+
+STUDENTS = 1_000
+ASSIGNMENTS = 40
+GRADES_PER_STUDENT = 30
+REFRESHES = 20_000
+WRITE_EVERY = 50  # one new grade per this many refreshes
+
+
+def build_storage() -> DataStorage:
+    storage = DataStorage()
+    rng = random.Random(0)
+    for student_id in range(1, STUDENTS + 1):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+    for assignment_id in range(1, ASSIGNMENTS + 1):
+        storage.add_assignment(Assignment(assignment_id, f"Homework {assignment_id}", "", "2030-01-01T00:00:00",
+                                          rng.choice(("Math", "Physics")), 1, "9-A"))
+        storage.assign_assignment_to_class(assignment_id, "9-A")
+    for student_id in range(1, STUDENTS + 1):
+        for _ in range(GRADES_PER_STUDENT):
+            storage.add_grade(Grade(storage.next_id("grades"), student_id, rng.choice(("Math", "Physics")),
+                                    rng.randint(1, 5), datetime.now(), 1))
+    return storage
+
+
+def run(storage: DataStorage, view) -> float:
+    """Return microseconds per refresh; parents refresh the same few hundred children."""
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for refresh in range(REFRESHES):
+        student_id = rng.randint(1, STUDENTS // 4)
+        view(student_id, rng.choice((None, "Math")))
+        if refresh % WRITE_EVERY == 0:
+            storage.add_grade(Grade(storage.next_id("grades"), student_id, "Math", 4, datetime.now(), 1))
+    return (time.perf_counter() - start) / REFRESHES * 1e6
+
+
+def main():
+    uncached = build_storage()
+    cached = build_storage()
+    print(f"{STUDENTS:,} students, {ASSIGNMENTS} assignments, {REFRESHES:,} refreshes, "
+          f"a grade every {WRITE_EVERY}")
+    print(f"uncached: {run(uncached, uncached._student_progress):.1f} us/refresh")
+    print(f"cached:   {run(cached, cached.view_student_progress):.1f} us/refresh")
+    print(cached.progress_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
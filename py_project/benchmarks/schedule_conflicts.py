@@ -0,0 +1,70 @@
+"""
+Lesson conflict checks through the per-day interval index, against scanning
+every schedule of the teacher and class, and a whole-timetable validation.
+
+Run from the py_project directory:
+    python -m benchmarks.schedule_conflicts [class_count]
+"""
+import random
+import sys
+import time
+
+from data.intervals import slots_overlap
+from data.storage import DataStorage
+from models.schedule import Schedule
+from utils.validation import check_schedule_conflict, validate_timetable
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+SLOTS = ("08:00-08:45", "08:55-09:40", "09:50-10:35", "10:45-11:30", "11:40-12:25", "12:35-13:20")
+CHECKS = 2_000
+
+
+def build_storage(class_count: int) -> DataStorage:
+    """One schedule per class and day; each slot is taught by a teacher free at that time."""
+    rng = random.Random(1)
+    teachers_by_slot = [rng.sample(range(1, class_count + 1), class_count) for _ in SLOTS]
+    storage = DataStorage()
+    for class_number in range(class_count):
+        for day in DAYS:
+            schedule = Schedule(storage.next_id("schedules"), f"{class_number // 4 + 1}-{'ABCD'[class_number % 4]}", day)
+            for slot, teachers in zip(SLOTS, teachers_by_slot):
+                schedule.lessons[slot] = {"subject": "Math", "teacher_id": teachers[class_number]}
+            storage.add_schedule(schedule)
+    return storage
+
+
+def scan_conflict(storage: DataStorage, new_time: str, class_id: str, day: str, teacher_id: int) -> bool:
+    """The previous check: every schedule of the teacher and the class."""
+    for schedule in storage.get_schedules_by_teacher(teacher_id) + storage.get_schedules_by_class(class_id):
+        if schedule.day == day and any(slots_overlap(time, new_time) for time in schedule.lessons):
+            return True
+    return False
+
+
+def main():
+    class_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    storage = build_storage(class_count)
+    rng = random.Random(0)
+    probes = [(f"{h:02d}:{m:02d}-{h:02d}:{m + 15:02d}", rng.choice(list(storage.schedules.values())).class_id,
+               rng.choice(DAYS), rng.randint(1, class_count))
+              for h, m in ((rng.randint(8, 13), rng.choice((0, 20, 40))) for _ in range(CHECKS))]
+
+    start = time.perf_counter()
+    scanned = [scan_conflict(storage, *probe) for probe in probes]
+    scan = (time.perf_counter() - start) / CHECKS * 1e6
+    start = time.perf_counter()
+    indexed = [check_schedule_conflict({}, *probe, storage=storage) for probe in probes]
+    index = (time.perf_counter() - start) / CHECKS * 1e6
+    assert scanned == indexed
+
+    start = time.perf_counter()
+    conflicts = validate_timetable(storage.schedules.values())
+    validate = (time.perf_counter() - start) * 1000
+    lessons = sum(len(schedule.lessons) for schedule in storage.schedules.values())
+    print(f"{class_count} classes, {lessons:,} lessons")
+    print(f"conflict check: scan {scan:.1f} us, interval index {index:.1f} us")
+    print(f"validate_timetable: {validate:.1f} ms, {len(conflicts)} conflicts")
+
+
+if __name__ == "__main__":
+    main()
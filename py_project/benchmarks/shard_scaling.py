@@ -0,0 +1,116 @@
+"""
+Throughput of ShardedStorage as the number of shard processes grows.
+
+For each shard count the same district is loaded into the shards (each class
+is built on its own shard with run_in_shard) and CLIENTS client processes
+connect their own routers and send a mix of student progress views (with the
+progress cache off, so every view is rebuilt), class statistics and subject
+statistics (scatter-gather). Throughput is requests per second over all
+clients; with one CPU per shard it should grow close to linearly, and it is
+capped by the number of CPUs of the machine, which is printed too.
+
+Run from the py_project directory:
+    python -m benchmarks.shard_scaling [max shards]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from multiprocessing import get_context
+
+from core.student import Student
+from data.sharding import ShardedStorage
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+
+CLASSES = 48
+STUDENTS_PER_CLASS = 25
+ASSIGNMENTS_PER_CLASS = 5
+GRADES_PER_STUDENT = 20
+CLIENTS = 8
+REQUESTS_PER_CLIENT = 1_500
+SUBJECTS = ("Math", "Physics", "History")
+
+
+def build_class(storage: DataStorage, class_id: str, seed: int):
+    """Fill one class in the storage; returns its student IDs."""
+    rng = random.Random(seed)
+    date = datetime(2026, 9, 1)
+    student_ids = list(storage.reserve_ids("users", STUDENTS_PER_CLASS))
+    for student_id in student_ids:
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", class_id))
+    for assignment_id in storage.reserve_ids("assignments", ASSIGNMENTS_PER_CLASS):
+        storage.add_assignment(Assignment(assignment_id, "Homework", "", "2030-01-01T00:00:00",
+                                          rng.choice(SUBJECTS), 1, class_id))
+        storage.assign_assignment_to_class(assignment_id, class_id)
+    grade_ids = iter(storage.reserve_ids("grades", STUDENTS_PER_CLASS * GRADES_PER_STUDENT))
+    for student_id in student_ids:
+        for _ in range(GRADES_PER_STUDENT):
+            storage.add_grade(Grade(next(grade_ids), student_id, rng.choice(SUBJECTS), rng.randint(1, 5), date, 1))
+    return student_ids
+
+
+def class_ids():
+    return [f"{number // 4 + 5}-{'ABCD'[number % 4]}" for number in range(CLASSES)]
+
+
+def run_client(addresses, authkey, students, seed: int, barrier, results):
+    router = ShardedStorage.connect(addresses, authkey)
+    rng = random.Random(seed)
+    for student_id, _ in students:
+        router.get_user(student_id)  # learn where every student lives before the clock starts
+    barrier.wait()
+    for _ in range(REQUESTS_PER_CLIENT):
+        student_id, class_id = rng.choice(students)
+        roll = rng.random()
+        if roll < 0.7:
+            router.view_student_progress(student_id, rng.choice((None, "Math")))
+        elif roll < 0.95:
+            router.calculate_grade_statistics_by_class(class_id, rng.choice(SUBJECTS))
+        else:
+            router.calculate_grade_statistics_by_subject(rng.choice(SUBJECTS))
+    router.close()
+    results.put(REQUESTS_PER_CLIENT)
+
+
+def measure(shards: int) -> float:
+    """Requests per second of CLIENTS client processes against a number of shards."""
+    context = get_context()
+    with ShardedStorage.start(shards, progress_cache_size=0, context=context) as storage:
+        students = []
+        for seed, class_id in enumerate(class_ids()):
+            students += [(student_id, class_id) for student_id in storage.run_in_shard(class_id, build_class,
+                                                                                        class_id, seed)]
+        barrier = context.Barrier(CLIENTS + 1)
+        results = context.Queue()
+        clients = [context.Process(target=run_client, args=(storage.addresses, storage.authkey, students,
+                                                            seed, barrier, results))
+                   for seed in range(CLIENTS)]
+        for client in clients:
+            client.start()
+        barrier.wait()
+        start = time.perf_counter()
+        requests = sum(results.get() for _ in clients)
+        elapsed = time.perf_counter() - start
+        for client in clients:
+            client.join()
+    return requests / elapsed
+
+
+def main():
+    max_shards = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    shard_counts = [count for count in (1, 2, 4, 8, 16) if count <= max_shards]
+    print(f"{CLASSES * STUDENTS_PER_CLASS:,} students in {CLASSES} classes, {CLIENTS} client processes, "
+          f"{os.cpu_count()} CPUs")
+    baseline = None
+    for shards in shard_counts:
+        rate = measure(shards)
+        baseline = baseline or rate
+        print(f"{shards:>3} shard{'s' if shards > 1 else ' '}: {rate:>8,.0f} requests/s  "
+              f"speedup {rate / baseline:4.2f}x  (ideal {min(shards, os.cpu_count() or 1)}x)")
+
+
+if __name__ == "__main__":
+    main()
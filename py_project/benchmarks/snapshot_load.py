@@ -0,0 +1,95 @@
+"""
+Size and load time of a binary snapshot against a JSON snapshot, and the time
+of one SnapshotReader lookup (a user with their inbox) in the binary one.
+
+Both full loads build every object, so they take about as long as each other;
+the lookup reads a single record without giving a DataStorage to serve from.
+
+Run from the py_project directory:
+    python -m benchmarks.snapshot_load [students]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from core.student import Student
+from data.journal import Journal
+from data.snapshot import SnapshotReader, write_snapshot
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+from models.notifications import Notification
+
+CLASSES = 40
+ASSIGNMENTS = 200
+GRADES_PER_STUDENT = 20
+NOTIFICATIONS_PER_STUDENT = 5
+
+
+def build_storage(students: int) -> DataStorage:
+    rng = random.Random(0)
+    storage = DataStorage()
+    date = datetime(2026, 9, 1)
+    for student_id in range(1, students + 1):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x",
+                                 f"{student_id % CLASSES // 4 + 1}-{'ABCD'[student_id % 4]}"))
+    for assignment_id in range(1, ASSIGNMENTS + 1):
+        storage.add_assignment(Assignment(assignment_id, f"Homework {assignment_id}", "", "2030-01-01T00:00:00",
+                                          rng.choice(("Math", "Physics", "History")), 1, "1-A"))
+    grade_ids = iter(storage.reserve_ids("grades", students * GRADES_PER_STUDENT))
+    for student_id in range(1, students + 1):
+        for _ in range(GRADES_PER_STUDENT):
+            storage.add_grade(Grade(next(grade_ids), student_id, rng.choice(("Math", "Physics", "History")),
+                                    rng.randint(1, 5), date, 1))
+    notification_ids = iter(storage.reserve_ids("notifications", students * NOTIFICATIONS_PER_STUDENT))
+    for student_id in range(1, students + 1):
+        for _ in range(NOTIFICATIONS_PER_STUDENT):
+            storage.add_notification(Notification(next(notification_ids), "New grade posted", student_id))
+    return storage
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    storage = build_storage(students)
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "storage.bin")
+        start = time.perf_counter()
+        size = write_snapshot(storage, path)
+        written = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with SnapshotReader(path) as reader:
+            user = reader.users[students // 2]
+            inbox = user.notifications.query()
+            lookup = time.perf_counter() - start
+            assert len(inbox) == NOTIFICATIONS_PER_STUDENT
+        start = time.perf_counter()
+        with SnapshotReader(path) as reader:
+            loaded = reader.load_into()
+        binary_load = time.perf_counter() - start
+        assert len(loaded.grades) == len(storage.grades)
+
+        json_directory = os.path.join(directory, "json")
+        Journal(json_directory, snapshot_every=None).attach(storage).journal.close()
+        storage.journal = None
+        json_size = sum(os.path.getsize(os.path.join(json_directory, name)) for name in os.listdir(json_directory))
+        start = time.perf_counter()
+        Journal(json_directory).recover().journal.close()
+        json_load = time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{students:,} students, {len(storage.grades):,} grades, {len(storage.notifications):,} notifications")
+    print(f"binary snapshot: {size / 1e6:.1f} MB written in {written:.2f} s (JSON: {json_size / 1e6:.1f} MB)")
+    print(f"full load, binary snapshot:     {binary_load * 1000:8.0f} ms")
+    print(f"full load, JSON snapshot:       {json_load * 1000:8.0f} ms")
+    print(f"reader: open + one user, inbox: {lookup * 1000:8.2f} ms (no DataStorage)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Import time of the entry-point modules (from ``python -X importtime``) and
+cold-start time of main.py, checked against a budget.
+
+Every measurement runs in a fresh interpreter; the best of REPEAT runs is
+kept, after a first run that fills the bytecode cache. The exit status is 1
+if a budget is exceeded or an import pulls in one of the modules that should
+only load when an export runs.
+
+Run from the py_project directory:
+    python -m benchmarks.startup_time
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPEAT = 5
+TOP = 8  # slowest modules listed per import
+
+# Milliseconds of import time (cumulative, as reported by -X importtime),
+# and of wall time for main.py.
+BUDGETS = {
+    "utils.auth": 40,
+    "data.storage": 35,
+    "core.admin": 60,
+    "main.py": 150,
+}
+
+# Only exports need these.
+HEAVY_MODULES = ("pandas", "sqlite3", "concurrent.futures.process", "multiprocessing")
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _environment():
+    env = dict(os.environ, PYTHONPATH=PROJECT)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def import_times(module: str):
+    """Return (total ms, {module: (self ms, cumulative ms)}) of importing a module, best of REPEAT."""
+    best = None
+    for _ in range(REPEAT + 1):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                capture_output=True, text=True, env=_environment(), cwd=PROJECT, check=True)
+        modules = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+        total = modules[module][1]
+        if best is None or total < best[0]:
+            best = (total, modules)
+    return best
+
+
+def cold_start(script: str) -> float:
+    """Milliseconds to run a script in a new interpreter, best of REPEAT (after one warm-up run)."""
+    best = None
+    with tempfile.TemporaryDirectory() as directory:  # main.py writes its exports to the working directory
+        for _ in range(REPEAT + 1):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(PROJECT, script)], stdout=subprocess.DEVNULL,
+                           env=_environment(), cwd=directory, check=True)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    failures = []
+    for module, budget in BUDGETS.items():
+        if module.endswith(".py"):
+            continue
+        total, modules = import_times(module)
+        status = "ok" if total <= budget else "OVER BUDGET"
+        print(f"import {module}: {total:.1f} ms (budget {budget} ms) {status}")
+        if total > budget:
+            failures.append(module)
+        for name, (self_ms, _) in sorted(modules.items(), key=lambda item: -item[1][0])[:TOP]:
+            print(f"    {self_ms:6.1f} ms  {name}")
+        heavy = [name for name in modules if name.split(".")[0] in HEAVY_MODULES or name in HEAVY_MODULES]
+        if heavy:
+            print(f"    imports {', '.join(sorted(heavy))}, which only exports need")
+            failures.append(module)
+
+    elapsed = cold_start("main.py")
+    budget = BUDGETS["main.py"]
+    status = "ok" if elapsed <= budget else "OVER BUDGET"
+    print(f"python main.py: {elapsed:.0f} ms (budget {budget} ms) {status}")
+    if elapsed > budget:
+        failures.append("main.py")
+    if failures:
+        print(f"Startup budget exceeded: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Generate the timetable of a 60-class, 120-teacher school and insert it, in bulk
+against lesson by lesson with Schedule.add_lesson.
+
+Run from the py_project directory:
+    python -m benchmarks.timetable_build [seed]
+"""
+import random
+import sys
+import time
+
+from data.storage import DataStorage
+from models.schedule import Schedule
+from utils.timetable import TimetableBuilder
+from utils.validation import validate_timetable
+
+CLASSES = [f"{grade}-{letter}" for grade in range(5, 11) for letter in "ABCDEFGHIJ"]
+# Weekly hours per subject; 30 lessons a week per class.
+HOURS = {
+    "Math": 5, "Native language": 4, "English": 3, "Literature": 3, "Physics": 3, "Chemistry": 2,
+    "Biology": 2, "History": 2, "Geography": 2, "Informatics": 2, "Physical education": 2,
+}
+TEACHERS_PER_HOUR = 4  # 4 teachers per weekly hour of a subject: 120 teachers
+
+
+def make_builder(seed: int) -> TimetableBuilder:
+    rng = random.Random(seed)
+    builder = TimetableBuilder(seed=seed)
+    teacher_id = 1000
+    for subject, hours in HOURS.items():
+        for _ in range(hours * TEACHERS_PER_HOUR):
+            teacher_id += 1
+            # Every teacher has a couple of slots they cannot teach.
+            unavailable = [(rng.choice(builder.days), rng.choice(builder.slots)) for _ in range(2)]
+            builder.add_teacher(teacher_id, [subject], unavailable=unavailable)
+    for class_id in CLASSES:
+        for subject, hours in HOURS.items():
+            builder.add_requirement(class_id, subject, hours)
+    return builder
+
+
+def main():
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 42
+    start = time.perf_counter()
+    schedules = make_builder(seed).build()
+    build = time.perf_counter() - start
+    lessons = sum(len(schedule.lessons) for schedule in schedules)
+    conflicts = validate_timetable(schedules)
+    same = [s.view_schedule() for s in make_builder(seed).build()] == [s.view_schedule() for s in schedules]
+    print(f"{len(CLASSES)} classes, {lessons:,} lessons in {len(schedules)} schedules")
+    print(f"build: {build:.2f} s, {len(conflicts)} conflicts, same timetable for the same seed: {same}")
+
+    storage = DataStorage()
+    start = time.perf_counter()
+    storage.add_schedules(schedules)
+    bulk = time.perf_counter() - start
+
+    storage = DataStorage()
+    start = time.perf_counter()
+    for generated in schedules:
+        schedule = Schedule(generated.id, generated.class_id, generated.day)
+        storage.add_schedule(schedule)
+        for slot, lesson in generated.lessons.items():
+            schedule.add_lesson(slot, lesson["subject"], lesson["teacher_id"], storage)
+    one_by_one = time.perf_counter() - start
+    print(f"insert: add_schedules {bulk * 1000:.1f} ms, add_lesson one by one {one_by_one * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
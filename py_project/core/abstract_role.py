@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
+from data.records import Stored
+
+class AbstractRole(Stored, ABC):
+    __slots__ = ("id", "full_name", "email", "password_hash", "created_at")
 
-class AbstractRole(ABC):
     def __init__(self, id: int, full_name: str, email: str, password_hash: str, created_at: datetime):
         self.id = id
         self.full_name = full_name
@@ -5,11 +5,13 @@ from models.schedule import Schedule
 from models.assignments import Assignment
 from models.grades import Grade
 from utils.export import export_data  
-from utils.validation import validate_class_id, validate_time_slot, check_schedule_conflict
+from utils.validation import validate_class_id, validate_time_slot, check_schedule_conflict, find_schedule_conflicts
 from typing import Tuple
 from datetime import datetime
 
 class Admin(User):
+    __slots__ = ()
+
     def __init__(self, id: int, full_name: str, email: str, password_hash: str):
         from core.enum import Role
         super().__init__(id, full_name, email, password_hash, role=Role.ADMIN, created_at=datetime.now())
@@ -32,10 +34,15 @@ class Admin(User):
         
         if not validate_class_id(schedule.class_id):
             return False, "Invalid class ID format"
-        if schedule.id not in storage.schedules:
-            storage.add_schedule(schedule)
-            return True, "Schedule added successfully"
-        return False, "Schedule ID already exists"
+        if schedule.id in storage.schedules:
+            return False, "Schedule ID already exists"
+        conflicts = find_schedule_conflicts(schedule, storage)
+        if conflicts:
+            conflict = conflicts[0]
+            return False, (f"Conflict: {conflict['kind'].capitalize()} {conflict['owner']} has lessons at "
+                           f"{conflict['first']['time']} and {conflict['second']['time']} on {conflict['day']}")
+        storage.add_schedule(schedule)
+        return True, "Schedule added successfully"
 
     def remove_schedule(self, schedule_id: int, storage: DataStorage) -> bool:
         """Remove a schedule from the system."""
@@ -60,10 +67,19 @@ class Admin(User):
 
     def view_all_users(self, storage: DataStorage) -> List[dict]:
         """View all users in the system."""
-        return [user.get_profile() for user in storage.users.values()]
+        return storage.view_all_users()
     
-    def export_data(self, storage: DataStorage, file_type: str = "csv") -> bool:
-        """Export system data (e.g., users, schedules) to a file."""
+    def export_data(self, storage: DataStorage, file_type: str = "csv", stream: bool = False) -> bool:
+        """
+        Export system data (e.g., users, schedules) to a file.
+
+        With stream=True each table is read from storage row by row while it is
+        written, instead of being built as a list of dicts up front. Memory then
+        stays bounded by the chunk size for CSV and SQL only: the XLSX workbook
+        is built in memory until it is saved.
+        """
+        if stream:
+            return export_data(storage.export_tables(), file_type)
         data = {
             "users": [user.get_profile() for user in storage.users.values()],
             "schedules": [schedule.to_dict() for schedule in storage.schedules.values()],
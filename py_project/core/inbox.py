@@ -0,0 +1,264 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Iterator, List, Optional, Tuple
+
+from models.notifications import Notification, Priority
+
+
+class NotificationView(Mapping):
+    """
+    Read-only dict view of a Notification, as handed out by an Inbox.
+
+    It reads through to the notification instead of copying it, so it always
+    shows the current read status.
+    """
+    __slots__ = ("notification",)
+
+    KEYS = ("id", "message", "recipient_id", "created_at", "is_read", "priority")
+
+    def __init__(self, notification):
+        self.notification = notification
+
+    def __getitem__(self, key):
+        if key == "priority":
+            return self.notification.priority.value
+        if key in self.KEYS:
+            return getattr(self.notification, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class _OrderedIds:
+    """
+    A sorted set of notification IDs.
+
+    IDs are kept in an array with a parallel bytearray of "still here" flags:
+    removal clears the flag instead of shifting the arrays, so it stays
+    O(log n), and the arrays are compacted once most entries are gone. IDs
+    come from a storage sequence, so new ones are nearly always appended.
+    """
+    __slots__ = ("ids", "alive", "live")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.alive = bytearray()
+        self.live = 0
+
+    def __len__(self) -> int:
+        return self.live
+
+    def __iter__(self) -> Iterator[int]:
+        return (item_id for item_id, alive in zip(self.ids, self.alive) if alive)
+
+    def add(self, item_id: int):
+        ids = self.ids
+        if not ids or item_id > ids[-1]:
+            ids.append(item_id)
+            self.alive.append(1)
+            self.live += 1
+            return
+        pos = bisect_left(ids, item_id)
+        if pos < len(ids) and ids[pos] == item_id:
+            if not self.alive[pos]:
+                self.alive[pos] = 1
+                self.live += 1
+            return
+        ids.insert(pos, item_id)
+        self.alive.insert(pos, 1)
+        self.live += 1
+
+    def discard(self, item_id: int):
+        pos = bisect_left(self.ids, item_id)
+        if pos < len(self.ids) and self.ids[pos] == item_id and self.alive[pos]:
+            self.alive[pos] = 0
+            self.live -= 1
+            if len(self.ids) > 64 and self.live < len(self.ids) // 2:
+                self.ids = array("q", self)
+                self.alive = bytearray(b"\x01") * self.live
+
+    def newest(self, limit: int, before: Optional[int] = None) -> List[int]:
+        """Up to limit IDs, highest first, lower than before."""
+        pos = len(self.ids) if before is None else bisect_left(self.ids, before)
+        page = []
+        while pos > 0 and len(page) < limit:
+            pos -= 1
+            if self.alive[pos]:
+                page.append(self.ids[pos])
+        return page
+
+
+class Inbox:
+    """
+    The notifications of one recipient, oldest first.
+
+    Notifications are ordered by ID, which the storages hand out from a
+    sequence, so ID order is the order they were created in. Besides the
+    notifications themselves an inbox keeps sorted sub-indexes of the unread
+    ones and of each priority, so unread counts are O(1), filtered reads only
+    touch matching notifications, and newest() pages through any of them with
+    the last ID seen as cursor. It iterates and indexes like the list of
+    notification dicts it replaces, yielding NotificationView objects.
+
+    The read status must change through mark_read() (or Notification.mark_as_read
+    of a stored notification) for the unread index to follow it.
+    """
+    __slots__ = ("_items", "_indexes")
+
+    _EMPTY = _OrderedIds()
+
+    def __init__(self, notifications=()):
+        self._items = {}  # notification ID -> Notification
+        # (unread_only, priority or None) -> _OrderedIds, created on first use
+        # so that the many empty or small inboxes stay small.
+        self._indexes = {}
+        for notification in notifications:
+            self.add(notification)
+
+    def _file(self, key, item_id: int):
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = _OrderedIds()
+        index.add(item_id)
+
+    def _unfile(self, key, item_id: int):
+        index = self._indexes.get(key)
+        if index is not None:
+            index.discard(item_id)
+
+    # Changes
+
+    def add(self, notification) -> Notification:
+        """
+        Add a notification (a Notification, a NotificationView or a dict in the
+        to_dict() format), replacing one with the same ID.
+        """
+        notification = self._as_notification(notification)
+        item_id = notification.id
+        if item_id in self._items:
+            if self._items[item_id] is notification:
+                return notification
+            self.remove(item_id)
+        self._items[item_id] = notification
+        self._file((False, None), item_id)
+        self._file((False, notification.priority), item_id)
+        if not notification.is_read:
+            self._file((True, None), item_id)
+            self._file((True, notification.priority), item_id)
+        return notification
+
+    append = add
+
+    def remove(self, notification_id: int) -> Optional[Notification]:
+        """Remove a notification by ID; returns it, or None if it is not here."""
+        notification = self._items.pop(notification_id, None)
+        if notification is None:
+            return None
+        self._unfile((False, None), notification_id)
+        self._unfile((False, notification.priority), notification_id)
+        self._unfile((True, None), notification_id)
+        self._unfile((True, notification.priority), notification_id)
+        return notification
+
+    def mark_read(self, notification_id: int) -> bool:
+        """Mark a notification as read; returns False if it is not here."""
+        notification = self._items.get(notification_id)
+        if notification is None:
+            return False
+        notification.is_read = True
+        self._unfile((True, None), notification_id)
+        self._unfile((True, notification.priority), notification_id)
+        return True
+
+    def mark_all_read(self) -> int:
+        """Mark every unread notification as read; returns how many there were."""
+        unread_ids = list(self._index(True, None))
+        for notification_id in unread_ids:
+            self.mark_read(notification_id)
+        return len(unread_ids)
+
+    def reindex(self):
+        """Rebuild the sub-indexes from the notifications' current read status."""
+        notifications = list(self._items.values())
+        self.__init__(notifications)
+
+    # Reads
+
+    def get(self, notification_id: int) -> Optional[Notification]:
+        return self._items.get(notification_id)
+
+    def unread_count(self, priority: Priority = None) -> int:
+        """Number of unread notifications, optionally of one priority."""
+        return len(self._index(True, priority))
+
+    def count(self, priority: Priority = None) -> int:
+        """Number of notifications, optionally of one priority."""
+        return len(self._index(False, priority))
+
+    def _index(self, unread_only: bool, priority) -> _OrderedIds:
+        return self._indexes.get((bool(unread_only), priority or None), self._EMPTY)
+
+    def query(self, unread_only: bool = False, priority: Priority = None) -> List[Notification]:
+        """Notifications oldest first, optionally only unread ones and of one priority."""
+        return [self._items[item_id] for item_id in self._index(unread_only, priority)]
+
+    def newest(self, limit: int = 20, before: Optional[int] = None, unread_only: bool = False,
+               priority: Priority = None) -> Tuple[List[Notification], Optional[int]]:
+        """
+        Read the newest notifications a page at a time.
+
+        Args:
+            limit (int): Page size.
+            before (int, optional): Cursor returned with the previous page.
+            unread_only (bool): Only unread notifications.
+            priority (Priority, optional): Only notifications of this priority.
+
+        Returns:
+            Tuple[List[Notification], Optional[int]]: The page, newest first, and the
+            cursor for the next page (None when this page is the last).
+        """
+        page = self._index(unread_only, priority).newest(limit + 1, before)
+        cursor = page[limit - 1] if len(page) > limit else None
+        return [self._items[item_id] for item_id in page[:limit]], cursor
+
+    # List compatibility
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, notification_id) -> bool:
+        return notification_id in self._items
+
+    def __iter__(self) -> Iterator[NotificationView]:
+        return (NotificationView(self._items[item_id]) for item_id in self._index(False, None))
+
+    def __getitem__(self, index: int) -> NotificationView:
+        if index < 0:
+            page = self._index(False, None).newest(-index)
+            if len(page) == -index:
+                return NotificationView(self._items[page[-1]])
+        elif index < len(self._items):
+            for position, item_id in enumerate(self._index(False, None)):
+                if position == index:
+                    return NotificationView(self._items[item_id])
+        raise IndexError("inbox index out of range")
+
+    def __repr__(self):
+        return f"<Inbox: {len(self)} notifications, {self.unread_count()} unread>"
+
+    @staticmethod
+    def _as_notification(notification) -> Notification:
+        if isinstance(notification, Notification):
+            return notification
+        if isinstance(notification, NotificationView):
+            return notification.notification
+        from data.records import notification_from_record
+        return notification_from_record(dict(notification))
@@ -1,11 +1,11 @@
 from .user import User
 from data.storage import DataStorage as storage
-from models.notifications import Notification, Priority
 from datetime import datetime
 from models.assignments import Assignment
 from typing import List
-from .student import Student
+from utils.parent_alerts import ParentAlerts
 class Parent(User):
+    __slots__ = ("children",)
 
     def __init__(self, id: int, full_name: str, email: str, password_hash: str,storage= storage()):
         from .enum import Role
@@ -15,14 +15,20 @@ class Parent(User):
         """Add a child to the parent's list of children."""
         if child_id in self.children:
             raise ValueError("Child already added.")
-        self.children.append(child_id)
+        # The storage adds the child to the stored parent (this one, usually) and indexes it.
         storage.add_parent_child(self.id, child_id)
+        if child_id not in self.children:
+            self.children.append(child_id)
     def remove_child(self, child_id: int):
         """Remove a child from the parent's list of children."""
         if child_id not in self.children:
             raise ValueError("Child not found.")
-        self.children.remove(child_id)
-        storage.remove_parent_child(self.id, child_id)
+        # The storage the parent was added to drops the child from its index.
+        storage = self._owner()
+        if storage is not None:
+            storage.remove_parent_child(self.id, child_id)
+        if child_id in self.children:
+            self.children.remove(child_id)
     def view_children(self):
         """View the list of children associated with this parent."""
         if not self.children:
@@ -71,43 +77,21 @@ class Parent(User):
 
 
     def receive_child_notification(self, child_id: int, storage: storage, generate_new: bool = False) -> List[dict]:
+        """
+        The alerts about a child in the parent's inbox, as dicts.
+
+        With generate_new, alerts about the child's low grades and missed
+        deadlines that were not sent before are sent first and included
+        (see utils.parent_alerts).
+        """
         if child_id not in self.children:
             return [{"error": f"Child ID {child_id} is not linked to this parent"}]
 
-        notifications = storage.get_notifications_by_user(self.id)
-        if notifications:
-            child_notifications = [notif.to_dict() for notif in notifications if f"Child {child_id}" in notif.message]
-        else:
-            child_notifications = []
+        prefix = f"Child {child_id}:"
+        child_notifications = [notif.to_dict() for notif in storage.get_notifications_by_user(self.id)
+                               if notif.message.startswith(prefix)]
         if generate_new:
-            grades = storage.get_grades_by_student(child_id)
-            for grade in grades:
-                if grade.value <= 3 and not any(f"Low grade ({grade.value}) in {grade.subject}" in notif["message"] for notif in child_notifications):
-                    new_notification = Notification(
-                        id=len(storage.notifications) + 1,
-                        message=f"Child {child_id}: Low grade ({grade.value}) in {grade.subject}",
-                        recipient_id=self.id,
-                        priority=Priority.HIGH
-                    )
-                    new_notification.send(storage)
-                    child_notifications.append(new_notification.to_dict())
-
-            assignments = storage.get_assignments_by_student(child_id)
-            student = storage.get_user(child_id)
-            if student and isinstance(student, Student):
-                for assignment in assignments:
-                    assignment_status = student.assignments.get(assignment.id, {})
-                    if (datetime.fromisoformat(assignment.deadline) < datetime.now() and
-                        (not isinstance(assignment_status, dict) or assignment_status.get("status") != "Submitted") and
-                        not any(f"Missed deadline for {assignment.title}" in notif["message"] for notif in child_notifications)):
-                        new_notification = Notification(
-                            id=len(storage.notifications) + 1,
-                            message=f"Child {child_id}: Missed deadline for {assignment.title} in {assignment.subject}",
-                            recipient_id=self.id,
-                            priority=Priority.MEDIUM
-                            
-                        )
-                        new_notification.send(storage)
-                        child_notifications.append(new_notification.to_dict())
-
-        return child_notifications
\ No newline at end of file
+            with storage.batch():
+                alerts = ParentAlerts.of(storage).check(self, [child_id])
+            child_notifications += [notif.to_dict() for notif in alerts]
+        return child_notifications
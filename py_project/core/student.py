@@ -1,15 +1,18 @@
 from .user import User
 from data.storage import DataStorage as storage
 from utils.validation import validate_class_id
+from utils.interning import intern_string
 from datetime import datetime
 from typing import Dict
 class Student(User):
+    __slots__ = ("class_id", "subjects", "assignments", "grades")
+
     def __init__(self, id: int, full_name: str, email: str, password_hash: str, class_id: str):
         from .enum import Role
         super().__init__(id, full_name, email, password_hash,role= Role.STUDENT,created_at=datetime.now()) 
         if validate_class_id(class_id):
             raise ValueError("Class ID must be a valid string eg: '9-A'")
-        self.class_id = class_id
+        self.class_id = intern_string(class_id)
         self.subjects = {} 
         self.assignments: Dict[int, Dict[str, str]] = {}
         self.grades = {}
@@ -22,10 +25,11 @@ class Student(User):
             raise ValueError(f"Assignment with ID {assignment_id} not found.")
         if assignment.class_id != self.class_id:
             raise ValueError(f"Assignment class {assignment.class_id} does not match student grade {self.class_id}")
-        assignment.add_submission(self.id, content)
-        self.assignments[assignment_id] = {"status": "Submitted", "content": content}
-        # Persist to storage
-        storage.update_user_assignments(self.id, self.assignments)
+        with storage.batch():
+            assignment.add_submission(self.id, content, storage)
+            self.assignments[assignment_id] = {"status": "Submitted", "content": content}
+            # Persist to storage
+            storage.update_user_assignments(self.id, self.assignments)
         return True
     
     def view_grades(self, subject: str = None):
@@ -2,6 +2,8 @@ from .user import User
 from data.storage import DataStorage as storage
 from datetime import datetime
 class Teacher(User):
+    __slots__ = ("subjects", "classes", "assignments")
+
     def __init__(self, id: int, full_name: str, email: str, password_hash: str):
         from .enum import Role
         super().__init__(id, full_name, email, password_hash,role= Role.TEACHER, created_at=datetime.now())
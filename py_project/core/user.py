@@ -1,13 +1,38 @@
 from .abstract_role import AbstractRole
 from .enum import Role
+from .inbox import Inbox, NotificationView
 from datetime import datetime
 
+# What the read methods look at while a user has no inbox yet; never added to.
+_NO_NOTIFICATIONS = Inbox()
+
 
 class User(AbstractRole):
+    __slots__ = ("role", "_notifications")
+
     def __init__(self, id: int, full_name: str, email: str, password_hash: str, created_at: str, role: Role):
         super().__init__(id, full_name, email, password_hash, created_at)
         self.role = role
-        self.notifications: list[dict] = []
+
+    @property
+    def notifications(self) -> Inbox:
+        """The user's Inbox, created on first use: most users never get a notification."""
+        return self.inbox()
+
+    @notifications.setter
+    def notifications(self, inbox: Inbox):
+        self._notifications = inbox
+
+    def inbox(self, create: bool = True):
+        """The user's Inbox (None if there is none yet and create is False)."""
+        inbox = getattr(self, "_notifications", None)
+        if inbox is None and create:
+            inbox = self._notifications = Inbox()
+        return inbox
+
+    def _read_inbox(self) -> Inbox:
+        return self.inbox(create=False) or _NO_NOTIFICATIONS
+
     def get_profile(self):
         return {
             "id": self.id,
@@ -18,24 +43,54 @@ class User(AbstractRole):
         }
 
     def update_profile(self, full_name: str = None, email: str = None):
-        if full_name:
-            self.full_name = full_name
-        if email:
-            self.email = email
+        if not full_name and not email:
+            return
+        # The storage the user was added to records the change and keeps its email index in step.
+        storage = self._owner()
+        if storage is None:
+            self.full_name = full_name or self.full_name
+            self.email = email or self.email
+            return
+        with storage.batch():
+            old_email = self.email
+            self.full_name = full_name or self.full_name
+            self.email = email or self.email
+            storage.user_profile_changed(self, old_email)
 
     def add_notification(self, notification):
         from models.notifications import Notification
         if isinstance(notification, Notification):
-            notification_dict = notification.to_dict()
-            self.notifications.append(notification_dict)
+            self.notifications.add(notification)
     
-    def view_notifications(self, unread_only: bool = False, priority: str = None):
-        notifications = self.notifications
-        if unread_only:
-            notifications = [n for n in notifications if not n["is_read"]]
-        if priority:
-            notifications = [n for n in notifications if n["priority"] == priority]
-        return notifications
+    def view_notifications(self, unread_only: bool = False, priority = None):
+        from models.notifications import Priority
+        if isinstance(priority, str):
+            priority = Priority(priority)
+        return [NotificationView(n) for n in self._read_inbox().query(unread_only, priority)]
+
+    def unread_notification_count(self, priority = None) -> int:
+        """Number of unread notifications (e.g. for a badge), optionally of one priority."""
+        return self._read_inbox().unread_count(priority)
+
+    def latest_notifications(self, limit: int = 20, before: int = None, unread_only: bool = False, priority = None):
+        """Newest notifications first, a page at a time; see Inbox.newest."""
+        notifications, cursor = self._read_inbox().newest(limit, before, unread_only, priority)
+        return [NotificationView(n) for n in notifications], cursor
+
+    def mark_notification_read(self, id: int) -> bool:
+        notification = self._read_inbox().get(id)
+        if notification is None:
+            return False
+        notification.mark_as_read()
+        self.notifications.mark_read(id)
+        return True
+
     def delete_notification(self, id: int):
-        self.notifications = [n for n in self.notifications if n["id"] != id]
-    
\ No newline at end of file
+        notification = self._read_inbox().get(id)
+        if notification is None:
+            return
+        storage = notification._owner()
+        if storage is not None:
+            # Deleted from the storage too, so its lookups and this inbox agree.
+            storage.remove_notification(id)
+        self.notifications.remove(id)
@@ -0,0 +1,52 @@
+from typing import Dict
+
+EMPTY_STATISTICS = {"average": 0.0, "highest": 0.0, "lowest": 0.0}
+
+
+def summarize(count: int, total, lowest, highest) -> Dict[str, float]:
+    """Statistics dict of a group of grades from its count, sum, lowest and highest value."""
+    if not count:
+        return dict(EMPTY_STATISTICS)
+    return {
+        "average": round(total / count, 2),
+        "highest": float(highest),
+        "lowest": float(lowest)
+    }
+
+
+class GradeAggregate:
+    """Running count, sum and value histogram of a group of grades."""
+
+    __slots__ = ("count", "total", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        # value -> number of grades with that value. Grades are 1-5, so
+        # min/max over the keys is effectively constant time.
+        self.histogram: Dict[int, int] = {}
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.histogram[value] = self.histogram.get(value, 0) + 1
+
+    def remove(self, value):
+        self.count -= 1
+        self.total -= value
+        remaining = self.histogram.get(value, 0) - 1
+        if remaining > 0:
+            self.histogram[value] = remaining
+        else:
+            self.histogram.pop(value, None)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GradeAggregate):
+            return NotImplemented
+        return self.count == other.count and self.total == other.total and self.histogram == other.histogram
+
+    def statistics(self) -> Dict[str, float]:
+        """Average, highest and lowest value, in the format of the storage statistics methods."""
+        if not self.count:
+            return dict(EMPTY_STATISTICS)
+        return summarize(self.count, self.total, min(self.histogram), max(self.histogram))
@@ -0,0 +1,393 @@
+"""
+Columnar grade store.
+
+Grades are kept as parallel typed arrays (id, student, subject code, value,
+teacher and date as microseconds since the epoch) instead of one Grade object
+per row: about 135 bytes per grade instead of about 335 (benchmarks/
+columnar_grades.py). The arrays take about 50 of those bytes, the ID -> row
+dict and the per-student row lists the rest. Subjects are stored once in a
+string table. Callers that expect Grade objects get GradeView objects, which
+read their fields from the columns.
+
+The group-by analytics are vectorized with NumPy, which group_stats needs to
+be faster than a loop over Grade objects. Without NumPy it counts over the
+columns with collections.Counter instead: the same results, at about the
+speed of that loop (0.05 s against 0.04 s for 200,000 grades by student).
+"""
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from itertools import compress, repeat
+from operator import add, floordiv, mul
+from typing import Callable, Dict, Iterable, List, Optional
+
+from data.aggregates import EMPTY_STATISTICS
+from data.lazy import model_classes
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+DAY_US = 86_400_000_000
+GROUP_BY = ("student", "subject", "teacher", "class", "date")
+
+
+def to_epoch_us(value) -> int:
+    """ISO string or datetime -> microseconds since the epoch (naive datetimes as-is)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+class GradeView:
+    """Grade-like read/write view of one row of a ColumnarGradeStore."""
+
+    __slots__ = ("_store", "id")
+
+    def __init__(self, store: "ColumnarGradeStore", grade_id: int):
+        self._store = store
+        self.id = grade_id
+
+    def _row(self) -> int:
+        return self._store._row_by_id[self.id]
+
+    @property
+    def student_id(self) -> int:
+        return self._store.student_ids[self._row()]
+
+    @property
+    def subject(self) -> str:
+        return self._store._subjects[self._store.subject_codes[self._row()]]
+
+    @property
+    def value(self) -> int:
+        return self._store.values[self._row()]
+
+    @property
+    def teacher_id(self) -> int:
+        return self._store.teacher_ids[self._row()]
+
+    @property
+    def date(self) -> str:
+        return from_epoch_us(self._store.dates[self._row()]).isoformat()
+
+    @property
+    def comments(self) -> list:
+        return self._store._comments.setdefault(self.id, [])
+
+    def update_grade(self, new_value: int, comment: str = None) -> bool:
+        if new_value <= 5 and new_value >= 1:
+            self._store.values[self._row()] = int(new_value)
+            return True
+        if comment is not None:
+            self.comments.append(comment)
+            return True
+        return False
+
+    def get_grade_info(self):
+        return {
+            "id": self.id,
+            "student_id": self.student_id,
+            "subject": self.subject,
+            "value": self.value,
+            "date": self.date,
+            "teacher_id": self.teacher_id,
+            "comments": list(self._store._comments.get(self.id, []))
+        }
+
+    to_dict = get_grade_info
+
+
+class ColumnarGradeStore:
+    def __init__(self, class_of: Optional[Callable[[int], Optional[str]]] = None):
+        """
+        Create an empty store.
+
+        Args:
+            class_of (Callable, optional): Maps a student ID to its class ID; needed
+                for the class statistics and group_stats(by="class").
+        """
+        self.class_of = class_of
+        self.ids = array("q")
+        self.student_ids = array("q")
+        self.subject_codes = array("l")
+        self.values = array("b")
+        self.teacher_ids = array("q")
+        self.dates = array("q")
+        self._subjects: List[str] = []
+        self._subject_codes: Dict[str, int] = {}
+        self._row_by_id: Dict[int, int] = {}
+        self._rows_by_student: Dict[int, array] = defaultdict(lambda: array("q"))
+        # Comments are rare, so they live in a side table keyed by grade ID.
+        self._comments: Dict[int, list] = {}
+
+    @classmethod
+    def from_storage(cls, storage) -> "ColumnarGradeStore":
+        """Copy the grades of a DataStorage into a new columnar store."""
+
+        def class_of(student_id):
+            student = storage.get_user(student_id)
+            return student.class_id if isinstance(student, model_classes.Student) else None
+
+        store = cls(class_of=class_of)
+        store.add_grades(storage.grades.values())
+        return store
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _subject_code(self, subject: str) -> int:
+        code = self._subject_codes.get(subject)
+        if code is None:
+            code = self._subject_codes[subject] = len(self._subjects)
+            self._subjects.append(subject)
+        return code
+
+    # Grade management (same calls as DataStorage)
+
+    def add_grade(self, grade):
+        """Add a grade (a Grade or anything with the same attributes)."""
+        if grade.id in self._row_by_id:
+            self.remove_grade(grade.id)
+        if grade.value != int(grade.value):
+            raise ValueError("Columnar grades must be whole numbers")
+        row = len(self.ids)
+        self.ids.append(grade.id)
+        self.student_ids.append(grade.student_id)
+        self.subject_codes.append(self._subject_code(grade.subject))
+        self.values.append(int(grade.value))
+        self.teacher_ids.append(grade.teacher_id)
+        self.dates.append(to_epoch_us(grade.date))
+        self._row_by_id[grade.id] = row
+        self._rows_by_student[grade.student_id].append(row)
+        if grade.comments:
+            self._comments[grade.id] = list(grade.comments)
+
+    def add_grades(self, grades: Iterable):
+        for grade in grades:
+            self.add_grade(grade)
+
+    def get_grade(self, grade_id: int) -> Optional[GradeView]:
+        """Retrieve a grade by its ID."""
+        return GradeView(self, grade_id) if grade_id in self._row_by_id else None
+
+    def remove_grade(self, grade_id: int):
+        """Remove a grade by its ID; the last row is moved into its place."""
+        row = self._row_by_id.pop(grade_id, None)
+        if row is None:
+            return
+        self._comments.pop(grade_id, None)
+        student_rows = self._rows_by_student[self.student_ids[row]]
+        student_rows.remove(row)
+        if not student_rows:
+            del self._rows_by_student[self.student_ids[row]]
+        last = len(self.ids) - 1
+        if row != last:
+            moved_rows = self._rows_by_student[self.student_ids[last]]
+            moved_rows[moved_rows.index(last)] = row
+            for column in self._columns():
+                column[row] = column[last]
+            self._row_by_id[self.ids[row]] = row
+        for column in self._columns():
+            del column[last]
+
+    def _columns(self):
+        return (self.ids, self.student_ids, self.subject_codes, self.values, self.teacher_ids, self.dates)
+
+    def get_grades_by_student(self, student_id: int, subject: str = None) -> List[GradeView]:
+        """Retrieve all grades for a specific student, optionally filtered by subject."""
+        rows = self._rows_by_student.get(student_id, ())
+        if subject:
+            code = self._subject_codes.get(subject)
+            rows = [row for row in rows if self.subject_codes[row] == code]
+        return [GradeView(self, self.ids[row]) for row in rows]
+
+    def calculate_grade_statistics_by_student(self, student_id: int, subject: str = None) -> Dict[str, float]:
+        return self._statistics([grade.value for grade in self.get_grades_by_student(student_id, subject)])
+
+    def calculate_grade_statistics_by_class(self, class_id: str, subject: str = None) -> Dict[str, float]:
+        stats = self.group_stats("class", subject=subject, percentiles=()).get(class_id)
+        return self._format(stats)
+
+    def calculate_grade_statistics_by_subject(self, subject: str) -> Dict[str, float]:
+        return self._format(self.group_stats("subject", percentiles=()).get(subject))
+
+    @staticmethod
+    def _statistics(values: List[int]) -> Dict[str, float]:
+        if not values:
+            return dict(EMPTY_STATISTICS)
+        return {
+            "average": round(sum(values) / len(values), 2),
+            "highest": float(max(values)),
+            "lowest": float(min(values))
+        }
+
+    @staticmethod
+    def _format(stats: Optional[Dict]) -> Dict[str, float]:
+        if not stats:
+            return dict(EMPTY_STATISTICS)
+        return {"average": round(stats["mean"], 2), "highest": float(stats["max"]), "lowest": float(stats["min"])}
+
+    # Vectorized analytics
+
+    def group_stats(self, by: str, start: datetime = None, end: datetime = None, subject: str = None,
+                    percentiles: Iterable[float] = (25, 50, 75)) -> Dict:
+        """
+        Per-group grade statistics.
+
+        Args:
+            by (str): "student", "subject", "teacher", "class" or "date" (one group per day).
+            start (datetime, optional): Only grades dated at or after this moment.
+            end (datetime, optional): Only grades dated before this moment.
+            subject (str, optional): Only grades in this subject.
+            percentiles (Iterable[float]): Percentiles to report (linear interpolation, like numpy).
+
+        Returns:
+            Dict: group key -> {"count", "mean", "min", "max", "histogram": {value: count},
+            "percentiles": {p: value}}.
+        """
+        if by not in GROUP_BY:
+            raise ValueError(f"Cannot group grades by {by!r}; expected one of {GROUP_BY}")
+        if by == "class" and self.class_of is None:
+            raise ValueError("Grouping by class needs a class_of mapping")
+        if not len(self.ids) or (subject is not None and subject not in self._subject_codes):
+            return {}
+        histograms = self._histograms_numpy(by, start, end, subject) if np is not None \
+            else self._histograms_python(by, start, end, subject)
+        percentiles = tuple(percentiles)
+        return {key: self._summarize(histogram, percentiles) for key, histogram in histograms.items()}
+
+    def _histograms_python(self, by, start, end, subject) -> Dict:
+        # Counter counts key * 256 + value (values are int8) in C, one int per
+        # grade; keys that need translating (subject codes, days, students ->
+        # classes) are translated once per distinct key afterwards.
+        if by in ("student", "class"):
+            keys = self.student_ids
+        elif by == "teacher":
+            keys = self.teacher_ids
+        elif by == "subject":
+            keys = self.subject_codes
+        else:
+            keys = map(floordiv, self.dates, repeat(DAY_US))
+        pairs = map(add, map(mul, keys, repeat(256)), self.values)
+        conditions = []
+        if subject is not None:
+            conditions.append(map(self._subject_codes[subject].__eq__, self.subject_codes))
+        if start is not None:
+            conditions.append(map(to_epoch_us(start).__le__, self.dates))
+        if end is not None:
+            conditions.append(map(to_epoch_us(end).__gt__, self.dates))
+        if conditions:
+            pairs = compress(pairs, conditions[0] if len(conditions) == 1 else map(all, zip(*conditions)))
+        counts = Counter(pairs)
+
+        if by == "subject":
+            translate = self._subjects.__getitem__
+        elif by == "date":
+            translate = lambda day: from_epoch_us(day * DAY_US).date()
+        elif by == "class":
+            translate = self.class_of
+        else:
+            translate = None
+        keys = {}
+        histograms = defaultdict(dict)
+        for pair, count in counts.items():
+            key, value = divmod(pair + 128, 256)
+            value -= 128
+            if translate is not None:
+                if key not in keys:
+                    keys[key] = translate(key)
+                key = keys[key]
+            if key is not None:
+                histogram = histograms[key]
+                histogram[value] = histogram.get(value, 0) + count
+        return histograms
+
+    def _histograms_numpy(self, by, start, end, subject) -> Dict:
+        values = np.frombuffer(self.values, dtype=np.int8)
+        mask = np.ones(len(values), dtype=bool)
+        if subject is not None:
+            mask &= np.frombuffer(self.subject_codes, dtype=np.dtype(f"i{self.subject_codes.itemsize}")) \
+                == self._subject_codes[subject]
+        if start is not None or end is not None:
+            dates = np.frombuffer(self.dates, dtype=np.int64)
+            if start is not None:
+                mask &= dates >= to_epoch_us(start)
+            if end is not None:
+                mask &= dates < to_epoch_us(end)
+        if by == "student":
+            keys = np.frombuffer(self.student_ids, dtype=np.int64)
+        elif by == "teacher":
+            keys = np.frombuffer(self.teacher_ids, dtype=np.int64)
+        elif by == "subject":
+            keys = np.frombuffer(self.subject_codes, dtype=np.dtype(f"i{self.subject_codes.itemsize}"))
+        elif by == "date":
+            keys = np.frombuffer(self.dates, dtype=np.int64) // DAY_US
+        else:
+            students = np.frombuffer(self.student_ids, dtype=np.int64)
+            unique_students, student_index = np.unique(students, return_inverse=True)
+            class_names = [self.class_of(int(student)) for student in unique_students]
+            class_codes = {name: code for code, name in enumerate(sorted({c for c in class_names if c is not None}))}
+            per_student = np.array([class_codes.get(name, -1) for name in class_names], dtype=np.int64)
+            keys = per_student[student_index] if len(students) else students
+            mask &= keys >= 0
+            decode_class = {code: name for name, code in class_codes.items()}
+        keys, values = keys[mask], values[mask]
+        if not len(keys):
+            return {}
+        # One bincount over (group, value) pairs gives every group's histogram at once.
+        unique_keys, key_index = np.unique(keys, return_inverse=True)
+        min_value = int(values.min())
+        width = int(values.max()) - min_value + 1
+        table = np.bincount(key_index * width + (values.astype(np.int64) - min_value),
+                            minlength=len(unique_keys) * width).reshape(len(unique_keys), width)
+        histograms = {}
+        for key, counts in zip(unique_keys.tolist(), table.tolist()):
+            if by == "subject":
+                key = self._subjects[key]
+            elif by == "class":
+                key = decode_class[key]
+            elif by == "date":
+                key = from_epoch_us(key * DAY_US).date()
+            histograms[key] = {min_value + offset: count for offset, count in enumerate(counts) if count}
+        return histograms
+
+    @staticmethod
+    def _summarize(histogram: Dict[int, int], percentiles: tuple) -> Dict:
+        ordered = sorted(histogram.items())
+        count = total = 0
+        cumulative = []
+        for value, value_count in ordered:
+            count += value_count
+            total += value * value_count
+            cumulative.append((count, value))
+
+        def nth(index):  # value at position index of the sorted grades
+            for upto, value in cumulative:
+                if index < upto:
+                    return value
+
+        result = {
+            "count": count,
+            "mean": total / count,
+            "min": ordered[0][0],
+            "max": ordered[-1][0],
+            "histogram": dict(ordered),
+            "percentiles": {},
+        }
+        for p in percentiles:
+            position = (count - 1) * p / 100
+            lower = int(position)
+            low_value = nth(lower)
+            high_value = nth(min(lower + 1, count - 1))
+            result["percentiles"][p] = low_value + (high_value - low_value) * (position - lower)
+        return result
@@ -0,0 +1,159 @@
+"""
+DataStorage shared by many threads.
+
+ConcurrentStorage guards every DataStorage method with a reader/writer lock
+(data.rwlock.RWLock): lookups, statistics, progress views and inbox queries
+share the read side and run side by side; inserts, updates, deletes and the
+storage hooks the models call take the write side alone. A model method that
+changes several objects (Assignment.set_grade, Student.submit_assignment,
+Notification.send, ...) runs inside ``storage.batch()``, which holds the write
+lock throughout, so other threads see all of its changes or none of them.
+IDs come from the storage sequences, which have a lock of their own, so
+reserving IDs never waits for readers.
+
+Objects handed out are the stored objects themselves: change them through the
+model methods that take the storage, or inside ``storage.batch()``. Methods
+that return generators in DataStorage (get_lessons_between,
+get_schedules_between, iter_export_rows) collect their results under the
+read lock and return an iterator over them.
+"""
+import inspect
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from data.progress_cache import ProgressCache
+from data.rwlock import RWLock
+from data.storage import DataStorage
+
+# DataStorage methods that only read (the progress cache they fill has its own lock).
+READ_METHODS = frozenset((
+    "changes_since",
+    "get_user", "get_users_by_email", "get_students_by_class", "get_parents_by_child",
+    "get_notification", "get_notifications_by_user", "count_unread_notifications",
+    "get_latest_notifications", "filter_notifications",
+    "get_schedule", "get_schedules_by_class", "get_schedules_by_teacher", "find_lesson_conflicts",
+    "get_schedules_by_week", "get_schedules_by_month",
+    "get_assignment", "get_assignments_by_class", "get_assignments_by_student",
+    "get_grade", "get_grades_by_student",
+    "calculate_grade_statistics_by_student", "calculate_grade_statistics_by_class",
+    "calculate_grade_statistics_by_subject",
+    "view_student_progress", "view_class_progress", "view_school_progress", "progress_cache_stats",
+    "export_tables",
+))
+
+# Read methods that return generators; their results are collected under the lock.
+GENERATOR_METHODS = frozenset(("get_lessons_between", "get_schedules_between", "iter_export_rows"))
+
+# Methods with their own locking, or none needed.
+UNLOCKED_METHODS = frozenset(("reserve_ids", "next_id", "batch"))
+
+
+class _SynchronizedProgressCache(ProgressCache):
+    """ProgressCache for concurrent readers: every call holds a mutex."""
+    __slots__ = ("_mutex",)
+
+    def __init__(self, max_size: int = 10_000):
+        super().__init__(max_size)
+        self._mutex = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._mutex:
+            return super().__len__()
+
+    def get(self, student_id, subject):
+        with self._mutex:
+            return super().get(student_id, subject)
+
+    def put(self, student_id, subject, progress, assignment_ids):
+        with self._mutex:
+            super().put(student_id, subject, progress, assignment_ids)
+
+    def invalidate_student(self, student_id):
+        with self._mutex:
+            super().invalidate_student(student_id)
+
+    def invalidate_assignment(self, assignment_id):
+        with self._mutex:
+            super().invalidate_assignment(assignment_id)
+
+    def clear(self):
+        with self._mutex:
+            super().clear()
+
+    def stats(self):
+        with self._mutex:
+            return super().stats()
+
+
+def _reading(method):
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        lock = self._lock
+        lock.acquire_read()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            lock.release_read()
+    return locked
+
+
+def _reading_all(method):
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        lock = self._lock
+        lock.acquire_read()
+        try:
+            return iter(list(method(self, *args, **kwargs)))
+        finally:
+            lock.release_read()
+    return locked
+
+
+def _writing(method):
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        lock = self._lock
+        lock.acquire_write()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            lock.release_write()
+    return locked
+
+
+class ConcurrentStorage(DataStorage):
+    def __init__(self, progress_cache_size: int = 10_000):
+        super().__init__(progress_cache_size)
+        self._lock = RWLock()
+        self._progress_cache = _SynchronizedProgressCache(progress_cache_size)
+
+    @contextmanager
+    def batch(self):
+        """Hold the write lock for a group of storage calls and object changes."""
+        self._lock.acquire_write()
+        try:
+            yield self
+        finally:
+            self._lock.release_write()
+
+    def read_lock(self):
+        """Hold the read lock, e.g. to read several stored objects consistently."""
+        return self._lock.read()
+
+    def lock_held(self) -> bool:
+        """Whether the calling thread holds the storage lock (either side)."""
+        return self._lock.held()
+
+
+# Every public DataStorage method that is not a known read takes the write lock.
+for _name, _method in list(vars(DataStorage).items()):
+    if _name.startswith("_") or _name in UNLOCKED_METHODS or not inspect.isfunction(_method):
+        continue
+    if _name in GENERATOR_METHODS:
+        setattr(ConcurrentStorage, _name, _reading_all(_method))
+    elif _name in READ_METHODS:
+        setattr(ConcurrentStorage, _name, _reading(_method))
+    else:
+        setattr(ConcurrentStorage, _name, _writing(_method))
+del _name, _method
@@ -0,0 +1,108 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+
+def parse_time_slot(time_slot: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse an 'HH:MM-HH:MM' time slot into (start, end) minutes since midnight.
+
+    Returns None for anything else, including slots that end before they start.
+    """
+    try:
+        start, end = time_slot.split("-")
+        start_hour, start_minute = start.split(":")
+        end_hour, end_minute = end.split(":")
+        start = int(start_hour) * 60 + int(start_minute)
+        end = int(end_hour) * 60 + int(end_minute)
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= start < end <= 24 * 60):
+        return None
+    return start, end
+
+
+def slots_overlap(first: str, second: str) -> bool:
+    """Whether two time slots overlap; slots that cannot be parsed only clash when equal."""
+    first_interval, second_interval = parse_time_slot(first), parse_time_slot(second)
+    if first_interval is None or second_interval is None:
+        return first == second
+    return first_interval[0] < second_interval[1] and second_interval[0] < first_interval[1]
+
+
+class IntervalSet:
+    """
+    Time slots of one teacher or class on one day, sorted by start minute.
+
+    Each slot carries a reference (the schedule ID). While no two stored slots
+    overlap - the normal state of a valid timetable - their end minutes are
+    sorted as well, and the slots overlapping a query are found with two
+    binary searches. If conflicting slots were stored anyway the set falls
+    back to scanning the slots that start before the query ends.
+    Slots that cannot be parsed are kept aside and only match equal strings.
+    """
+    __slots__ = ("_entries", "_starts", "_ends", "_disjoint", "_unparsed")
+
+    def __init__(self):
+        self._entries: List[Tuple] = []  # (start, end, time_slot, ref), sorted
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._disjoint = True
+        self._unparsed: Dict[str, List] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries) + sum(len(refs) for refs in self._unparsed.values())
+
+    def __iter__(self):
+        """(time_slot, ref) of every stored slot, parsed ones by start minute."""
+        for entry in self._entries:
+            yield entry[2], entry[3]
+        for time_slot, refs in self._unparsed.items():
+            for ref in refs:
+                yield time_slot, ref
+
+    def add(self, time_slot: str, ref):
+        interval = parse_time_slot(time_slot)
+        if interval is None:
+            self._unparsed.setdefault(time_slot, []).append(ref)
+            return
+        entry = (interval[0], interval[1], time_slot, ref)
+        pos = bisect_right(self._entries, entry)
+        self._entries.insert(pos, entry)
+        self._starts.insert(pos, entry[0])
+        self._ends.insert(pos, entry[1])
+        if self._disjoint:
+            before_overlaps = pos > 0 and self._ends[pos - 1] > entry[0]
+            after_overlaps = pos + 1 < len(self._entries) and self._starts[pos + 1] < entry[1]
+            self._disjoint = not (before_overlaps or after_overlaps)
+
+    def remove(self, time_slot: str, ref):
+        interval = parse_time_slot(time_slot)
+        if interval is None:
+            refs = self._unparsed.get(time_slot)
+            if refs and ref in refs:
+                refs.remove(ref)
+                if not refs:
+                    del self._unparsed[time_slot]
+            return
+        entry = (interval[0], interval[1], time_slot, ref)
+        pos = bisect_left(self._entries, entry)
+        if pos < len(self._entries) and self._entries[pos] == entry:
+            del self._entries[pos]
+            del self._starts[pos]
+            del self._ends[pos]
+            if not self._disjoint:
+                self._disjoint = all(
+                    self._ends[i] <= self._starts[i + 1] for i in range(len(self._entries) - 1))
+
+    def overlapping(self, time_slot: str) -> List[Tuple[str, object]]:
+        """(time_slot, ref) of every stored slot overlapping time_slot."""
+        interval = parse_time_slot(time_slot)
+        if interval is None:
+            return [(time_slot, ref) for ref in self._unparsed.get(time_slot, ())]
+        start, end = interval
+        hi = bisect_left(self._starts, end)
+        if self._disjoint:
+            candidates = self._entries[bisect_right(self._ends, start):hi]
+        else:
+            candidates = [entry for entry in self._entries[:hi] if entry[1] > start]
+        return [(entry[2], entry[3]) for entry in candidates]
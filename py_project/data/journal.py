@@ -0,0 +1,448 @@
+"""
+Write-ahead journal and snapshots for DataStorage.
+
+A Journal attached to a DataStorage appends every change the storage records
+(see DataStorage._record_change) to a journal file: the record of the object
+after an insert or update, or its ID after a delete. Entries are written and
+fsynced in groups (group commit): a crash loses at most the last
+``group_size`` changes, or the changes of the last ``group_interval`` seconds.
+A background thread writes a group whose interval ran out with no further
+change logged to write it.
+
+Every ``snapshot_every`` changes the whole storage is written to a snapshot
+and the journal starts a new file, so the older journal files and snapshots
+can be deleted. Recovery loads the newest snapshot and replays only the
+journal written after it, so it takes time proportional to the snapshot
+interval rather than to the age of the data.
+
+Files in the journal directory:
+    snapshot-<version>.json  the storage as of a change version
+    snapshot-<version>.bin   the same, in the binary format of data.snapshot
+                             (with snapshot_format="binary")
+    journal-<version>.log    changes after a version, one per line, each
+                             prefixed with the CRC32 of its JSON
+    epoch                    the storage's epoch (DataStorage.epoch), so a
+                             recovered storage continues the same version history
+
+Changes made behind the storage's back (attributes set directly instead of
+through storage methods or the storage hooks) are not journaled, just as they
+are not indexed. The persistent SQLiteStorage does not need a journal.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from data.records import to_compact_record, from_record
+from data.snapshot import SnapshotReader, write_snapshot
+
+FORMAT_VERSION = 1
+
+# Snapshot table order: assignments before users, so teachers can resolve theirs.
+SNAPSHOT_ORDER = ("assignments", "users", "grades", "schedules", "notifications")
+
+SNAPSHOT_SUFFIXES = {"json": ".json", "binary": ".bin"}
+
+EPOCH_FILE = "epoch"
+
+
+def _encode(entry: Dict) -> bytes:
+    data = json.dumps(entry, separators=(",", ":")).encode()
+    return b"%08x %s\n" % (zlib.crc32(data), data)
+
+
+def _decode(line: bytes) -> Optional[Dict]:
+    """The entry of a journal line, or None if the line is torn or corrupt."""
+    if not line.endswith(b"\n") or len(line) < 10:
+        return None
+    data = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(data):
+            return None
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def _fsync_directory(directory: str):
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class Journal:
+    def __init__(self, directory: str, group_size: int = 64, group_interval: float = 0.05,
+                 snapshot_every: Optional[int] = 100_000, fsync: bool = True,
+                 snapshot_format: str = "json"):
+        """
+        Create a journal in a directory (created if missing).
+
+        Args:
+            directory (str): Where the journal files and snapshots are kept.
+            group_size (int): Changes written and synced together; 1 syncs every change.
+            group_interval (float): Longest time in seconds a change waits for its group;
+                a background thread writes it then (call sync() to force a write).
+            snapshot_every (int, optional): Changes between automatic snapshots; None
+                disables them (call checkpoint()).
+            fsync (bool): fsync each group; without it a group only reaches the OS.
+            snapshot_format (str): "json", or "binary" for snapshots a SnapshotReader
+                can look single records up in without loading the rest. Recovery
+                reads either kind and takes about as long with both: it builds
+                every object either way.
+        """
+        if group_size < 1:
+            raise ValueError("group_size must be at least 1")
+        if snapshot_format not in SNAPSHOT_SUFFIXES:
+            raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+        self.directory = directory
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.snapshot_format = snapshot_format
+        self.storage = None
+        self._file = None
+        self._pending: List[bytes] = []
+        self._pending_since = 0.0
+        # Guards the pending group and the file against the flusher thread, which
+        # writes a group once group_interval has passed (reentrant: log() checkpoints).
+        self._lock = threading.RLock()
+        self._group_started = threading.Condition(self._lock)
+        self._flusher = None
+        self._closing = False
+        self._sequences: Dict[str, int] = {}
+        self._snapshot_version = 0
+        self._last_version = 0
+        self._counters = dict.fromkeys(("entries", "groups", "bytes", "snapshots", "replayed"), 0)
+        os.makedirs(directory, exist_ok=True)
+
+    # Files
+
+    def _files(self, prefix: str, suffix: str) -> List[Tuple[int, str]]:
+        """(version, path) of the files of one kind, oldest first."""
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(suffix):
+                try:
+                    version = int(name[len(prefix):-len(suffix)])
+                except ValueError:
+                    continue
+                found.append((version, os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def _snapshots(self) -> List[Tuple[int, str]]:
+        """(version, path) of the snapshots of either format, oldest first."""
+        return sorted(found for suffix in SNAPSHOT_SUFFIXES.values() for found in self._files("snapshot-", suffix))
+
+    def _path(self, prefix: str, version: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{prefix}{version:012d}{suffix}")
+
+    def _read_epoch(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, EPOCH_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_epoch(self, epoch: str):
+        path = os.path.join(self.directory, EPOCH_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(epoch)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    # Recovery
+
+    def recover(self, storage=None):
+        """
+        Rebuild a storage from the newest snapshot and the journal after it, and attach to it.
+
+        Args:
+            storage (DataStorage, optional): An empty storage to load into; a new one by default.
+
+        Returns:
+            DataStorage: The recovered storage, journaling further changes here.
+        """
+        if storage is None:
+            from data.storage import DataStorage
+            storage = DataStorage()
+        teacher_assignments = {}
+        version = 0
+        snapshots = self._snapshots()
+        if snapshots:
+            version = self._load_snapshot(storage, snapshots[-1][1], teacher_assignments)
+        self._snapshot_version = version
+
+        segments = self._files("journal-", ".log")
+        for index, (_, path) in enumerate(segments):
+            if index + 1 < len(segments) and segments[index + 1][0] <= version:
+                continue  # every change in it is in the snapshot
+            version = self._replay(storage, path, version, teacher_assignments)
+
+        for teacher_id, assignment_ids in teacher_assignments.items():
+            teacher = storage.users.get(teacher_id)
+            if teacher is not None:
+                teacher.assignments = {
+                    assignment_id: storage.assignments[assignment_id]
+                    for assignment_id in assignment_ids if assignment_id in storage.assignments
+                }
+        storage.rebuild_indexes()
+        for table, value in self._sequences.items():
+            storage._advance_sequence(table, value)
+        storage.version = storage._change_log_base = version
+        storage._change_log = []
+        epoch = self._read_epoch()
+        if epoch is None:
+            self._write_epoch(storage.epoch)
+        else:
+            storage.epoch = epoch
+        self._last_version = version
+        self._sequences = dict(storage._sequences)
+
+        if segments and segments[-1][0] >= self._snapshot_version:
+            self._file = open(segments[-1][1], "ab")
+        else:
+            self._open_segment(version)
+        self.storage = storage
+        storage.journal = self
+        return storage
+
+    def attach(self, storage):
+        """
+        Start journaling a storage that was not recovered from this journal.
+
+        Its current state is written as the first snapshot.
+
+        Raises:
+            ValueError: The directory already holds a journal; use recover().
+        """
+        if self._snapshots() or self._files("journal-", ".log"):
+            raise ValueError(f"{self.directory} already holds a journal; use recover()")
+        self.storage = storage
+        storage.journal = self
+        self._sequences = dict(storage._sequences)
+        self._last_version = storage.version
+        self._write_epoch(storage.epoch)
+        self.checkpoint()
+        return storage
+
+    @staticmethod
+    def _apply(storage, table: str, record: Dict, teacher_assignments: Dict):
+        obj = from_record(table, record)
+        if table == "users":
+            # Teachers get their assignments once everything is loaded.
+            if record["role"] == "Teacher":
+                teacher_assignments[obj.id] = record["state"].get("assignments", [])
+            else:
+                teacher_assignments.pop(obj.id, None)
+        getattr(storage, table)[obj.id] = obj
+
+    def _load_snapshot(self, storage, path: str, teacher_assignments: Dict) -> int:
+        if path.endswith(".bin"):
+            with SnapshotReader(path) as reader:
+                for table in SNAPSHOT_ORDER:
+                    for record in reader.records(table):
+                        self._apply(storage, table, record, teacher_assignments)
+                self._sequences = dict(reader.sequences)
+                return reader.version
+        with open(path, "rb") as f:
+            snapshot = json.load(f)
+        if snapshot.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported snapshot format {snapshot.get('format')!r}")
+        for table in SNAPSHOT_ORDER:
+            for record in snapshot["tables"].get(table, ()):
+                self._apply(storage, table, record, teacher_assignments)
+        self._sequences = dict(snapshot.get("sequences", {}))
+        return snapshot["version"]
+
+    def _replay(self, storage, path: str, version: int, teacher_assignments: Dict) -> int:
+        """Apply the changes in a journal file after version; returns the last version applied."""
+        with open(path, "r+b") as f:
+            offset = 0
+            for line in f:
+                entry = _decode(line)
+                if entry is None:
+                    # A torn write from a crash: nothing after it was acknowledged.
+                    logging.warning(f"Journal {path}: discarding a damaged tail at byte {offset}")
+                    f.truncate(offset)
+                    break
+                offset += len(line)
+                if entry["op"] == "sequences":
+                    for table, value in entry["sequences"].items():
+                        self._sequences[table] = max(self._sequences.get(table, 0), value)
+                    continue
+                if entry["version"] <= version:
+                    continue
+                version = entry["version"]
+                table = entry["table"]
+                if entry["op"] == "delete":
+                    getattr(storage, table).pop(entry["id"], None)
+                    if table == "users":
+                        teacher_assignments.pop(entry["id"], None)
+                else:
+                    self._apply(storage, table, entry["record"], teacher_assignments)
+                self._counters["replayed"] += 1
+        return version
+
+    # Logging
+
+    def _open_segment(self, version: int):
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self._path("journal-", version, ".log"), "ab")
+        _fsync_directory(self.directory)
+
+    def log(self, version: int, table: str, item_id: int, op: str, obj=None):
+        """Journal one change (called by DataStorage._record_change)."""
+        if op == "delete" or obj is None:
+            entry = {"version": version, "op": "delete", "table": table, "id": item_id}
+        else:
+            entry = {"version": version, "op": "put", "table": table, "id": item_id, "record": to_compact_record(table, obj)}
+        line = _encode(entry)
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+                self._start_flusher()
+                self._group_started.notify()
+            self._pending.append(line)
+            self._last_version = version
+            if len(self._pending) >= self.group_size or time.monotonic() - self._pending_since >= self.group_interval:
+                self.sync()
+            if self.snapshot_every and version - self._snapshot_version >= self.snapshot_every:
+                self.checkpoint()
+
+    def _start_flusher(self):
+        if self._flusher is None and self.group_size > 1:
+            self._closing = False
+            self._flusher = threading.Thread(target=self._flush_groups, name="journal-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_groups(self):
+        """Flusher thread: write each group at the latest group_interval after its first change."""
+        with self._lock:
+            while not self._closing:
+                if not self._pending:
+                    self._group_started.wait()
+                    continue
+                delay = self._pending_since + self.group_interval - time.monotonic()
+                if delay > 0:
+                    self._group_started.wait(delay)
+                else:
+                    self.sync()
+
+    def _stop_flusher(self):
+        with self._lock:
+            flusher, self._flusher = self._flusher, None
+            self._closing = True
+            self._group_started.notify()
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join()
+
+    def sync(self):
+        """Write and fsync the changes logged so far."""
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self.storage is not None and self.storage._sequences != self._sequences:
+            # IDs reserved but not yet stored must not be handed out again after a crash.
+            self._sequences = dict(self.storage._sequences)
+            self._pending.append(_encode({"op": "sequences", "sequences": self._sequences}))
+        if not self._pending or self._file is None:
+            return
+        data = b"".join(self._pending)
+        self._pending = []
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._counters["entries"] += data.count(b"\n")
+        self._counters["groups"] += 1
+        self._counters["bytes"] += len(data)
+
+    # Snapshots
+
+    def checkpoint(self) -> int:
+        """
+        Snapshot the storage, start a new journal file and delete the files the snapshot replaces.
+
+        Returns:
+            int: The change version the snapshot holds.
+        """
+        with self._lock:
+            return self._checkpoint()
+
+    def _checkpoint(self) -> int:
+        storage = self.storage
+        self.sync()
+        version = storage.version
+        path = self._path("snapshot-", version, SNAPSHOT_SUFFIXES[self.snapshot_format])
+        if self.snapshot_format == "binary":
+            write_snapshot(storage, path)
+        else:
+            self._write_json_snapshot(storage, path)
+        self._open_segment(version)
+        self._snapshot_version = version
+        self._counters["snapshots"] += 1
+        for old_version, old_path in self._snapshots() + self._files("journal-", ".log"):
+            if old_version < version:
+                os.remove(old_path)
+        return version
+
+    @staticmethod
+    def _write_json_snapshot(storage, path: str):
+        snapshot = {
+            "format": FORMAT_VERSION,
+            "version": storage.version,
+            "sequences": dict(storage._sequences),
+            "tables": {
+                table: [to_compact_record(table, obj) for obj in getattr(storage, table).values()]
+                for table in SNAPSHOT_ORDER
+            },
+        }
+        with open(path + ".tmp", "wb") as f:
+            f.write(json.dumps(snapshot, separators=(",", ":")).encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def close(self, checkpoint: bool = False):
+        """Sync (and optionally snapshot), then detach from the storage."""
+        self._stop_flusher()
+        if self.storage is not None:
+            if checkpoint:
+                self.checkpoint()
+            self.sync()
+            if getattr(self.storage, "journal", None) is self:
+                self.storage.journal = None
+            self.storage = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self) -> Dict:
+        """Entries, groups (fsyncs), bytes written, snapshots taken and entries replayed on recovery."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = len(self._pending)
+        stats["snapshot_version"] = self._snapshot_version
+        stats["version"] = self._last_version
+        return stats
+
+
+def open_storage(directory: str, **options):
+    """Recover a DataStorage from a journal directory and keep journaling its changes there."""
+    return Journal(directory, **options).recover()
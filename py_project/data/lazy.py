@@ -0,0 +1,38 @@
+"""
+Model classes for the data layer, imported on first use.
+
+The core and models modules import data.storage, so the data layer cannot
+import them at module level. An import statement inside every method that
+needs a class works, but costs a sys.modules lookup under the import lock on
+each call; model_classes imports each class once, on first access, and is a
+plain attribute lookup from then on.
+"""
+import importlib
+
+_MODULES = {
+    "Role": "core.enum",
+    "User": "core.user",
+    "Inbox": "core.inbox",
+    "Student": "core.student",
+    "Teacher": "core.teacher",
+    "Parent": "core.parent",
+    "Admin": "core.admin",
+    "Assignment": "models.assignments",
+    "Grade": "models.grades",
+    "Schedule": "models.schedule",
+    "Notification": "models.notifications",
+    "Priority": "models.notifications",
+}
+
+
+class _ModelClasses:
+    def __getattr__(self, name: str):
+        module = _MODULES.get(name)
+        if module is None:
+            raise AttributeError(name)
+        cls = getattr(importlib.import_module(module), name)
+        setattr(self, name, cls)
+        return cls
+
+
+model_classes = _ModelClasses()
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+
+class ProgressCache:
+    """
+    Bounded LRU cache of view_student_progress results, keyed by (student ID, subject).
+
+    Every entry remembers the assignments it was built from, so it can be
+    dropped when one of them changes as well as when the student or one of
+    their grades does.
+    """
+    __slots__ = ("max_size", "_entries", "_by_student", "_by_assignment", "_counters")
+
+    def __init__(self, max_size: int = 10_000):
+        """
+        Args:
+            max_size (int): Most entries kept; 0 disables caching.
+        """
+        self.max_size = max_size
+        # (student ID, subject) -> (progress, assignment IDs it depends on)
+        self._entries = OrderedDict()
+        self._by_student: Dict[int, set] = {}
+        self._by_assignment: Dict[int, set] = {}
+        self._counters = dict.fromkeys(("hits", "misses", "evictions", "invalidations"), 0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, student_id: int, subject: Optional[str]) -> Optional[Dict]:
+        entry = self._entries.get((student_id, subject))
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end((student_id, subject))
+        self._counters["hits"] += 1
+        return entry[0]
+
+    def put(self, student_id: int, subject: Optional[str], progress: Dict, assignment_ids: Iterable[int]):
+        if self.max_size <= 0:
+            return
+        key = (student_id, subject)
+        self._discard(key)
+        assignment_ids = tuple(assignment_ids)
+        self._entries[key] = (progress, assignment_ids)
+        self._by_student.setdefault(student_id, set()).add(key)
+        for assignment_id in assignment_ids:
+            self._by_assignment.setdefault(assignment_id, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._discard(next(iter(self._entries)))
+            self._counters["evictions"] += 1
+
+    def _discard(self, key) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        keys = self._by_student.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_student[key[0]]
+        for assignment_id in entry[1]:
+            keys = self._by_assignment.get(assignment_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_assignment[assignment_id]
+        return True
+
+    def _invalidate(self, keys):
+        for key in list(keys):
+            if self._discard(key):
+                self._counters["invalidations"] += 1
+
+    def invalidate_student(self, student_id: int):
+        """Drop every entry of a student."""
+        keys = self._by_student.get(student_id)
+        if keys:
+            self._invalidate(keys)
+
+    def invalidate_assignment(self, assignment_id: int):
+        """Drop every entry built from an assignment."""
+        keys = self._by_assignment.get(assignment_id)
+        if keys:
+            self._invalidate(keys)
+
+    def clear(self):
+        self._counters["invalidations"] += len(self._entries)
+        self._entries.clear()
+        self._by_student.clear()
+        self._by_assignment.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss, eviction and invalidation counters, and the current and maximum size."""
+        stats = dict(self._counters)
+        stats["size"] = len(self._entries)
+        stats["max_size"] = self.max_size
+        return stats
@@ -0,0 +1,275 @@
+"""
+Conversion between storage objects and plain record dicts.
+
+Records only hold JSON-compatible values (ints, strings, lists, dicts), so the
+persistent backends can store them without knowing about the model classes.
+Objects are rebuilt without calling their constructors: the constructors
+validate input and stamp ``created_at`` with the current time, which must not
+happen when loading existing data. Repeated strings (subjects, class IDs,
+days) are interned on the way in, as the constructors do.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from data.lazy import model_classes
+from utils.interning import intern_string
+
+TABLES = ("users", "assignments", "grades", "schedules", "notifications")
+
+
+class Stored:
+    """
+    Base of the objects whose in-place changes a storage has to follow (users,
+    grades, notifications).
+
+    The storage an object was added to sets its ``_storage`` slot, so methods
+    like User.update_profile, Grade.update_grade and Notification.mark_as_read
+    can tell it about the change. The back-reference is left out of pickles and copies: a copy is
+    not stored anywhere until it is added.
+    """
+    __slots__ = ("_storage",)
+
+    def _owner(self):
+        """The storage this object was added to, or None."""
+        return getattr(self, "_storage", None)
+
+    def __getstate__(self):
+        state = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if name != "_storage" and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _int_keys(mapping: Dict) -> Dict:
+    """JSON turns int keys into strings; turn them back."""
+    return {int(key): value for key, value in mapping.items()}
+
+
+def _interned_values(mapping: Dict) -> Dict:
+    return {key: intern_string(value) for key, value in mapping.items()}
+
+
+def _blank(cls):
+    return cls.__new__(cls)
+
+
+# Users
+
+def _role_class(role):
+    # Looked up per role: only admins need core.admin imported.
+    if role is model_classes.Role.STUDENT:
+        return model_classes.Student
+    if role is model_classes.Role.TEACHER:
+        return model_classes.Teacher
+    if role is model_classes.Role.PARENT:
+        return model_classes.Parent
+    return model_classes.Admin
+
+
+def user_to_record(user) -> Dict:
+    state = {"notifications": [dict(n) for n in user.inbox(create=False) or ()]}
+    class_id = None
+    if isinstance(user, model_classes.Student):
+        class_id = user.class_id
+        state["subjects"] = user.subjects
+        state["assignments"] = user.assignments
+        state["grades"] = user.grades
+    elif isinstance(user, model_classes.Teacher):
+        state["subjects"] = user.subjects
+        state["classes"] = user.classes
+        state["assignments"] = list(user.assignments)
+    elif isinstance(user, model_classes.Parent):
+        state["children"] = user.children
+    return {
+        "id": user.id,
+        "role": user.role.value,
+        "full_name": user.full_name,
+        "email": user.email,
+        "password_hash": user.password_hash,
+        "created_at": _iso(user.created_at),
+        "class_id": class_id,
+        "state": state,
+    }
+
+
+def user_from_record(record: Dict, resolve_assignment: Optional[Callable] = None):
+    """
+    Rebuild a user of the right role class from a record.
+
+    Args:
+        record (Dict): Record produced by user_to_record.
+        resolve_assignment (Callable, optional): Maps an assignment ID to an
+            Assignment; used to restore Teacher.assignments. Unresolved IDs are dropped.
+    """
+    role = model_classes.Role(record["role"])
+    user = _blank(_role_class(role))
+    user.id = record["id"]
+    user.full_name = record["full_name"]
+    user.email = record["email"]
+    user.password_hash = record["password_hash"]
+    user.created_at = record["created_at"]
+    user.role = role
+    state = record.get("state") or {}
+    if state.get("notifications"):
+        user.notifications = model_classes.Inbox(notification_from_record(n) for n in state["notifications"])
+    if role is model_classes.Role.STUDENT:
+        user.class_id = intern_string(record["class_id"])
+        user.subjects = state.get("subjects", {})
+        user.assignments = {
+            assignment_id: _interned_values(status) if isinstance(status, dict) else status
+            for assignment_id, status in _int_keys(state.get("assignments", {})).items()
+        }
+        user.grades = state.get("grades", {})
+    elif role is model_classes.Role.TEACHER:
+        user.subjects = state.get("subjects", [])
+        user.classes = state.get("classes", [])
+        user.assignments = {}
+        for assignment_id in state.get("assignments", []):
+            assignment = resolve_assignment(assignment_id) if resolve_assignment else None
+            if assignment is not None:
+                user.assignments[assignment_id] = assignment
+    elif role is model_classes.Role.PARENT:
+        user.children = list(state.get("children", []))
+    return user
+
+
+# Grades
+
+def grade_to_record(grade) -> Dict:
+    return {
+        "id": grade.id,
+        "student_id": grade.student_id,
+        "subject": grade.subject,
+        "value": grade.value,
+        "date": _iso(grade.date),
+        "teacher_id": grade.teacher_id,
+        "comments": list(grade.comments),
+    }
+
+
+def grade_from_record(record: Dict):
+    grade = _blank(model_classes.Grade)
+    grade.id = record["id"]
+    grade.student_id = record["student_id"]
+    grade.subject = intern_string(record["subject"])
+    grade.value = record["value"]
+    grade.date = record["date"]
+    grade.teacher_id = record["teacher_id"]
+    grade.comments = list(record.get("comments") or [])
+    return grade
+
+
+# Assignments
+
+def assignment_to_record(assignment) -> Dict:
+    return {
+        "id": assignment.id,
+        "title": assignment.title,
+        "description": assignment.description,
+        "deadline": _iso(assignment.deadline),
+        "subject": assignment.subject,
+        "teacher_id": assignment.teacher_id,
+        "class_id": assignment.class_id,
+        "difficulty": assignment.difficulty,
+        "submissions": assignment.submissions,
+        "grades": assignment.grades,
+    }
+
+
+def assignment_from_record(record: Dict):
+    assignment = _blank(model_classes.Assignment)
+    for field in ("id", "title", "description", "deadline", "subject", "teacher_id", "class_id", "difficulty"):
+        setattr(assignment, field, record[field])
+    for field in ("subject", "class_id", "difficulty"):
+        setattr(assignment, field, intern_string(record[field]))
+    assignment.submissions = _int_keys(record.get("submissions") or {})
+    assignment.grades = _int_keys(record.get("grades") or {})
+    return assignment
+
+
+# Schedules
+
+def schedule_to_record(schedule) -> Dict:
+    return {
+        "id": schedule.id,
+        "class_id": schedule.class_id,
+        "day": schedule.day,
+        "lessons": {time: dict(lesson) for time, lesson in schedule.lessons.items()},
+    }
+
+
+def schedule_from_record(record: Dict):
+    schedule = _blank(model_classes.Schedule)
+    schedule.id = record["id"]
+    schedule.class_id = intern_string(record["class_id"])
+    schedule.day = intern_string(record["day"])
+    schedule.lessons = {
+        intern_string(time): _interned_values(lesson) for time, lesson in (record.get("lessons") or {}).items()
+    }
+    return schedule
+
+
+# Notifications
+
+def notification_to_record(notification) -> Dict:
+    return {
+        "id": notification.id,
+        "message": notification.message,
+        "recipient_id": notification.recipient_id,
+        "created_at": _iso(notification.created_at),
+        "priority": notification.priority.value,
+        "is_read": bool(notification.is_read),
+    }
+
+
+def notification_from_record(record: Dict):
+    notification = _blank(model_classes.Notification)
+    notification.id = record["id"]
+    notification.message = record["message"]
+    notification.recipient_id = record["recipient_id"]
+    notification.created_at = record["created_at"]
+    notification.priority = model_classes.Priority(record["priority"])
+    notification.is_read = bool(record["is_read"])
+    return notification
+
+
+_CONVERTERS = {
+    "users": (user_to_record, user_from_record),
+    "assignments": (assignment_to_record, assignment_from_record),
+    "grades": (grade_to_record, grade_from_record),
+    "schedules": (schedule_to_record, schedule_from_record),
+    "notifications": (notification_to_record, notification_from_record),
+}
+
+
+def to_record(table: str, obj) -> Dict:
+    """Convert a stored object of the given table to a record."""
+    return _CONVERTERS[table][0](obj)
+
+
+def from_record(table: str, record: Dict, **kwargs):
+    """Rebuild a stored object of the given table from a record."""
+    return _CONVERTERS[table][1](record, **kwargs)
+
+
+def to_compact_record(table: str, obj) -> Dict:
+    """
+    Like to_record, but users leave out their inbox.
+
+    For whole-storage dumps (journal, snapshots) that also hold the notifications
+    table, from which the inboxes are rebuilt on loading.
+    """
+    record = to_record(table, obj)
+    if table == "users":
+        record["state"] = {key: value for key, value in record["state"].items() if key != "notifications"}
+    return record
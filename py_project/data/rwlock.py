@@ -0,0 +1,102 @@
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    Reader/writer lock: any number of readers, or one writer.
+
+    Writers are preferred: once a writer waits, new readers wait behind it, so
+    a steady stream of reads cannot starve writes. Both sides are reentrant
+    for the thread holding the lock, and the writer may also take the read
+    side (a write that calls a read). A reader cannot become a writer: that
+    would deadlock against a second reader doing the same, so it raises.
+    """
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._changed = threading.Condition(self._mutex)
+        self._readers = 0  # threads holding the read side
+        self._writer = None  # ident of the thread holding the write side
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()  # read depth of the current thread
+
+    def acquire_read(self):
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth:
+            local.depth = depth + 1
+            return
+        with self._mutex:
+            if self._writer is None and not self._writers_waiting:
+                self._readers += 1
+                local.depth = 1
+                return
+            if self._writer == threading.get_ident():
+                self._write_depth += 1
+                return
+            while self._writer is not None or self._writers_waiting:
+                self._changed.wait()
+            self._readers += 1
+        local.depth = 1
+
+    def release_read(self):
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth > 1:
+            local.depth = depth - 1
+            return
+        if not depth:
+            # A read taken while holding the write side.
+            self._write_depth -= 1
+            return
+        local.depth = 0
+        with self._mutex:
+            self._readers -= 1
+            if not self._readers:
+                self._changed.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, "depth", 0):
+            raise RuntimeError("A thread holding the read lock cannot take the write lock")
+        with self._mutex:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._changed.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        self._write_depth -= 1
+        if not self._write_depth:
+            with self._mutex:
+                self._writer = None
+                self._changed.notify_all()
+
+    def held(self) -> bool:
+        """Whether the calling thread holds either side."""
+        return self._writer == threading.get_ident() or bool(getattr(self._local, "depth", 0))
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,551 @@
+"""
+DataStorage partitioned across worker processes.
+
+Each shard is a process holding a ConcurrentStorage with part of the data:
+students, their grades and notifications, and the assignments and schedules
+of a class all live on the shard that owns the class. Classes are spread over
+the shards by a hash of their ID, or of a shard key derived from it (e.g.
+school_prefix, which keeps the classes of one school together). Other users
+(teachers, parents, admins) live on the shard their ID hashes to.
+
+ShardedStorage is the router: it has the DataStorage methods and sends each
+call to the shard that owns the data, over a multiprocessing connection.
+Aggregates over the whole district (calculate_grade_statistics_by_subject,
+view_all_users, view_school_progress, the calendar queries, ...) are scattered
+to every shard at once and the partial results gathered and merged.
+
+Objects returned by the router are copies. Model methods that change stored
+objects and report back to the storage (Assignment.set_grade,
+Grade.update_grade, ...) must run next to the data: run_in_shard sends a
+function to the shard owning a class or user and runs it there inside
+``storage.batch()``. Each shard hands out IDs from its own stride of the ID
+space (shard i of n owns the IDs with (id - 1) % n == i), so IDs are unique
+across shards without coordination, as long as new objects get their IDs
+reserved from the storage rather than chosen by the caller.
+
+The router caches where it has seen each user and object. A student cannot
+move to a class on another shard; an assignment or schedule re-added for such
+a class is moved.
+"""
+import heapq
+import itertools
+import os
+import threading
+import zlib
+from collections.abc import Iterator
+from functools import partial, wraps
+from multiprocessing import AuthenticationError, get_context
+from multiprocessing.connection import Client, Listener
+from typing import Callable, Dict, List, Optional, Sequence
+
+from data.aggregates import summarize
+from data.concurrent_storage import ConcurrentStorage
+from data.lazy import model_classes
+from data.records import TABLES
+from data.storage import DataStorage, EXPORT_TABLES, _add_tally, _school_report
+
+# DataStorage methods routed to the shard of the class in their first argument.
+CLASS_METHODS = (
+    "get_students_by_class", "get_schedules_by_class", "get_assignments_by_class",
+    "calculate_grade_statistics_by_class", "view_class_progress",
+)
+
+# DataStorage methods routed to the shard of the user in their first argument.
+USER_METHODS = (
+    "get_grades_by_student", "calculate_grade_statistics_by_student", "view_student_progress",
+    "get_assignments_by_student", "update_user_assignments", "add_parent_child", "remove_parent_child",
+    "get_notifications_by_user", "count_unread_notifications", "get_latest_notifications",
+    "send_automatic_notification",
+)
+
+# DataStorage methods taking the ID of a stored object: table, result if no shard has it.
+LOCATED_METHODS = {
+    "get_user": ("users", None),
+    "remove_user": ("users", None),
+    "get_grade": ("grades", None),
+    "remove_grade": ("grades", None),
+    "get_assignment": ("assignments", None),
+    "remove_assignment": ("assignments", None),
+    "get_schedule": ("schedules", None),
+    "remove_schedule": ("schedules", None),
+    "get_notification": ("notifications", None),
+    "remove_notification": ("notifications", None),
+    "mark_notification_read": ("notifications", False),
+}
+
+# DataStorage methods returning lists, run on every shard and concatenated.
+GATHER_METHODS = ("get_users_by_email", "get_parents_by_child", "get_schedules_by_teacher", "filter_notifications")
+
+
+def school_prefix(class_id: str, separator: str = "/") -> str:
+    """Shard key keeping the classes of a school on one shard, for class IDs like 'north/7-B'."""
+    return str(class_id).split(separator, 1)[0]
+
+
+class _ShardStorage(ConcurrentStorage):
+    """The storage of one shard: a ConcurrentStorage drawing IDs from its stride of the ID space."""
+
+    def __init__(self, shard_index: int, shard_count: int, progress_cache_size: int = 10_000):
+        super().__init__(progress_cache_size)
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+    def reserve_ids(self, table: str, count: int) -> range:
+        """Reserve new IDs of this shard: every shard_count-th ID, in increasing order."""
+        step = self.shard_count
+        with self._sequence_lock:
+            first = self._sequences[table] + 1
+            first += (self.shard_index - (first - 1)) % step
+            last = first + (count - 1) * step
+            self._sequences[table] = max(self._sequences[table], last)
+        return range(first, last + 1, step)
+
+
+# Functions run in the shards through run_in_shard.
+
+def _holds(storage: DataStorage, table: str, item_id) -> bool:
+    return item_id in getattr(storage, table)
+
+
+def _grade_tally(storage: DataStorage, key):
+    """[count, total, lowest, highest] of a running grade aggregate."""
+    aggregate = storage._grade_stats.get(key)
+    if aggregate is None or not aggregate.count:
+        return [0, 0, None, None]
+    return [aggregate.count, aggregate.total, min(aggregate.histogram), max(aggregate.histogram)]
+
+
+def _school_progress_parts(storage: DataStorage, subject: Optional[str]):
+    return storage._school_progress_parts(subject)
+
+
+def _lesson_conflicts(storage: DataStorage, *args):
+    return storage.find_lesson_conflicts(*args)
+
+
+# Shard processes
+
+def _execute(storage: DataStorage, request):
+    """Run one request, as (True, result) or (False, exception)."""
+    target, args, kwargs = request
+    try:
+        if isinstance(target, str):
+            if target.startswith("_"):
+                raise AttributeError(f"{target} is not a storage method")
+            result = getattr(storage, target)(*args, **kwargs)
+        else:
+            with storage.batch():
+                result = target(storage, *args, **kwargs)
+        if isinstance(result, Iterator):
+            result = list(result)
+        return True, result
+    except Exception as error:
+        return False, error
+
+
+def _serve_connection(storage: DataStorage, connection, stopping: threading.Event):
+    with connection:
+        while True:
+            try:
+                request = connection.recv()
+            except (EOFError, OSError):
+                return
+            if request is None:  # shutdown
+                connection.send((True, None))
+                stopping.set()
+                return
+            connection.send(_execute(storage, request))
+
+
+def _accept(listener: Listener, storage: DataStorage, stopping: threading.Event):
+    while True:
+        try:
+            connection = listener.accept()
+        except (OSError, EOFError, AuthenticationError):
+            if stopping.is_set():
+                return
+            continue
+        threading.Thread(target=_serve_connection, args=(storage, connection, stopping), daemon=True).start()
+
+
+def _serve_shard(shard_index: int, shard_count: int, authkey: bytes, progress_cache_size: int, ready):
+    """Shard process: serve storage calls on a listener, one thread per connection, until shut down."""
+    storage = _ShardStorage(shard_index, shard_count, progress_cache_size)
+    stopping = threading.Event()
+    with Listener(authkey=authkey) as listener:
+        ready.send(listener.address)
+        ready.close()
+        threading.Thread(target=_accept, args=(listener, storage, stopping), daemon=True).start()
+        stopping.wait()
+
+
+# Router
+
+def _by_class(name: str):
+    @wraps(getattr(DataStorage, name))
+    def routed(self, class_id, *args, **kwargs):
+        return self._call(self._class_shard(class_id), name, class_id, *args, **kwargs)
+    return routed
+
+
+def _by_user(name: str):
+    @wraps(getattr(DataStorage, name))
+    def routed(self, user_id, *args, **kwargs):
+        return self._call(self._owner("users", user_id), name, user_id, *args, **kwargs)
+    return routed
+
+
+def _located(name: str, table: str, missing):
+    @wraps(getattr(DataStorage, name))
+    def routed(self, item_id, *args, **kwargs):
+        shard = self._locate(table, item_id)
+        if shard is None:
+            return missing
+        result = self._call(shard, name, item_id, *args, **kwargs)
+        if name.startswith("remove_"):
+            self._locations[table].pop(item_id, None)
+        return result
+    return routed
+
+
+def _gathered(name: str):
+    @wraps(getattr(DataStorage, name))
+    def routed(self, *args, **kwargs):
+        return [item for part in self._scatter(name, *args, **kwargs) for item in part]
+    return routed
+
+
+class ShardedStorage:
+    """
+    Router of DataStorage calls to shard processes.
+
+    Use ShardedStorage.start to start the shards, and ShardedStorage.connect
+    with the addresses and authkey of a started router to use the same shards
+    from another process.
+    """
+
+    # Notification.broadcast delivers through dispatch; the shards have the dispatchers.
+    dispatcher = None
+
+    def __init__(self, connections: Sequence, shard_key: Callable[[str], str] = None):
+        self._connections = list(connections)
+        self._connection_locks = [threading.Lock() for _ in self._connections]
+        self.shard_count = len(self._connections)
+        self.shard_key = shard_key
+        self.addresses = []
+        self.authkey = None
+        self._processes = []
+        # table -> {id: shard index} of the objects this router has added or found.
+        self._locations = {table: {} for table in TABLES}
+        self._id_shards = itertools.count()
+
+    @classmethod
+    def start(cls, shards: int, shard_key: Callable[[str], str] = None, progress_cache_size: int = 10_000,
+              context = None) -> "ShardedStorage":
+        """
+        Start shard processes and connect a router to them.
+
+        Args:
+            shards (int): Number of shard processes.
+            shard_key (Callable, optional): Maps a class ID to the key classes are
+                spread by, e.g. school_prefix; by default the class ID itself.
+            progress_cache_size (int): Progress cache size of each shard.
+            context: multiprocessing context to start the processes with.
+        """
+        context = context or get_context()
+        authkey = os.urandom(32)
+        addresses, processes = [], []
+        for index in range(shards):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_serve_shard, name=f"storage-shard-{index}", daemon=True,
+                                      args=(index, shards, authkey, progress_cache_size, sender))
+            process.start()
+            sender.close()
+            addresses.append(receiver.recv())
+            receiver.close()
+            processes.append(process)
+        router = cls.connect(addresses, authkey, shard_key)
+        router._processes = processes
+        return router
+
+    @classmethod
+    def connect(cls, addresses: Sequence, authkey: bytes, shard_key: Callable[[str], str] = None) -> "ShardedStorage":
+        """A router to running shards; shard_key must be the one they were filled with."""
+        router = cls([Client(address, authkey=authkey) for address in addresses], shard_key)
+        router.addresses = list(addresses)
+        router.authkey = authkey
+        return router
+
+    def close(self):
+        """Close the connections, and stop the shard processes if this router started them."""
+        if self._processes:
+            self._exchange({shard: None for shard in range(self.shard_count)})
+        for connection in self._connections:
+            connection.close()
+        for process in self._processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Requests
+
+    def _exchange(self, requests: Dict[int, object]) -> Dict[int, object]:
+        """Send one request to each of several shards, then collect the replies; raises the first error."""
+        shards = sorted(requests)
+        locks = [self._connection_locks[shard] for shard in shards]
+        for lock in locks:
+            lock.acquire()
+        try:
+            for shard in shards:
+                self._connections[shard].send(requests[shard])
+            replies = {shard: self._connections[shard].recv() for shard in shards}
+        finally:
+            for lock in locks:
+                lock.release()
+        for ok, result in replies.values():
+            if not ok:
+                raise result
+        return {shard: result for shard, (_, result) in replies.items()}
+
+    def _call(self, shard: int, target, *args, **kwargs):
+        with self._connection_locks[shard]:
+            connection = self._connections[shard]
+            connection.send((target, args, kwargs))
+            ok, result = connection.recv()
+        if not ok:
+            raise result
+        return result
+
+    def _scatter(self, target, *args, **kwargs) -> List:
+        """Run a request on every shard; the results in shard order."""
+        request = (target, args, kwargs)
+        replies = self._exchange({shard: request for shard in range(self.shard_count)})
+        return [replies[shard] for shard in range(self.shard_count)]
+
+    def _grouped(self, name: str, items, shard_of):
+        """Split items by shard and call a method with each shard's part, all shards at once.
+
+        Returns:
+            Tuple[Dict[int, object], Dict[int, list]]: The results and the parts, by shard.
+        """
+        parts = {}
+        for item in items:
+            parts.setdefault(shard_of(item), []).append(item)
+        return self._exchange({shard: (name, (part,), {}) for shard, part in parts.items()}), parts
+
+    # Placement
+
+    def _class_shard(self, class_id) -> int:
+        key = class_id if self.shard_key is None else self.shard_key(class_id)
+        return zlib.crc32(str(key).encode()) % self.shard_count
+
+    def _home_shard(self, item_id) -> int:
+        """Shard of IDs owned by no class: the shard whose stride the ID is from."""
+        return (item_id - 1) % self.shard_count if isinstance(item_id, int) else 0
+
+    def _locate(self, table: str, item_id) -> Optional[int]:
+        """Shard holding an object, or None if none does."""
+        shard = self._locations[table].get(item_id)
+        if shard is None:
+            found = self._scatter(_holds, table, item_id)
+            if True not in found:
+                return None
+            shard = self._locations[table][item_id] = found.index(True)
+        return shard
+
+    def _owner(self, table: str, item_id) -> int:
+        """Shard to ask about an object: the one holding it, or its home shard if none does."""
+        shard = self._locate(table, item_id)
+        return self._home_shard(item_id) if shard is None else shard
+
+    def _place(self, table: str, item_id, shard: int, name: str, *args):
+        """Call an add method on a shard, removing the object from the shard it was on before."""
+        previous = self._locations[table].get(item_id)
+        if previous is not None and previous != shard:
+            self._call(previous, f"remove_{table[:-1]}", item_id)
+        self._call(shard, name, *args)
+        self._locations[table][item_id] = shard
+
+    def run_in_shard(self, owner, function: Callable, *args, **kwargs):
+        """
+        Run function(storage, *args, **kwargs) on the shard of a class or user, inside storage.batch().
+
+        Args:
+            owner (str | int): Class ID, or user ID.
+            function (Callable): A picklable (module-level) function.
+
+        Returns:
+            The function's result, which must be picklable.
+        """
+        shard = self._class_shard(owner) if isinstance(owner, str) else self._owner("users", owner)
+        return self._call(shard, function, *args, **kwargs)
+
+    # ID sequences
+
+    def reserve_ids(self, table: str, count: int) -> range:
+        """Reserve new, never used IDs from one of the shards (in turn); the range may have a step."""
+        return self._call(next(self._id_shards) % self.shard_count, "reserve_ids", table, count)
+
+    def next_id(self, table: str) -> int:
+        return self.reserve_ids(table, 1)[0]
+
+    # Writes
+
+    def add_user(self, user):
+        if not isinstance(user, model_classes.User):
+            return
+        if isinstance(user, model_classes.Student):
+            shard = self._class_shard(user.class_id)
+        else:
+            shard = self._home_shard(user.id)
+        previous = self._locations["users"].get(user.id)
+        if previous is not None and previous != shard:
+            raise ValueError(f"User {user.id} is stored on shard {previous}; students cannot move between shards")
+        self._call(shard, "add_user", user)
+        self._locations["users"][user.id] = shard
+
+    def add_assignment(self, assignment):
+        if isinstance(assignment, model_classes.Assignment):
+            self._place("assignments", assignment.id, self._class_shard(assignment.class_id),
+                        "add_assignment", assignment)
+
+    def add_schedule(self, schedule):
+        if isinstance(schedule, model_classes.Schedule):
+            self._place("schedules", schedule.id, self._class_shard(schedule.class_id), "add_schedule", schedule)
+
+    def add_grade(self, grade):
+        if isinstance(grade, model_classes.Grade):
+            self._place("grades", grade.id, self._owner("users", grade.student_id), "add_grade", grade)
+
+    def add_notification(self, notification):
+        if isinstance(notification, model_classes.Notification):
+            self._place("notifications", notification.id, self._owner("users", notification.recipient_id),
+                        "add_notification", notification)
+
+    def _notifications_by_shard(self, name: str, notifications):
+        notifications = [n for n in notifications if isinstance(n, model_classes.Notification)]
+        results, parts = self._grouped(name, notifications, lambda n: self._owner("users", n.recipient_id))
+        for shard, part in parts.items():
+            for notification in part:
+                self._locations["notifications"][notification.id] = shard
+        return results
+
+    def send_notifications(self, notifications) -> int:
+        return sum(self._notifications_by_shard("send_notifications", notifications).values())
+
+    def dispatch(self, notifications):
+        """Deliver notifications now, or queue them on shards that have a dispatcher attached."""
+        if isinstance(notifications, model_classes.Notification):
+            notifications = [notifications]
+        self._notifications_by_shard("dispatch", notifications)
+
+    def add_schedules(self, schedules) -> int:
+        schedules = [s for s in schedules if isinstance(s, model_classes.Schedule)]
+        results, parts = self._grouped("add_schedules", schedules, lambda s: self._class_shard(s.class_id))
+        for shard, part in parts.items():
+            for schedule in part:
+                self._locations["schedules"][schedule.id] = shard
+        return sum(results.values())
+
+    def assign_assignment_to_class(self, assignment_id: int, class_id: str) -> bool:
+        """Assign an assignment to all students in a class; the assignment must be on the class's shard."""
+        return self._call(self._class_shard(class_id), "assign_assignment_to_class", assignment_id, class_id)
+
+    def invalidate_progress(self, student_id: int = None):
+        if student_id is None:
+            self._scatter("invalidate_progress")
+        else:
+            self._call(self._owner("users", student_id), "invalidate_progress", student_id)
+
+    # Scatter-gather
+
+    def view_all_users(self) -> List[Dict]:
+        """The profiles of all users, by ID."""
+        profiles = [profile for part in self._scatter("view_all_users") for profile in part]
+        return sorted(profiles, key=lambda profile: profile["id"])
+
+    def calculate_grade_statistics_by_subject(self, subject: str) -> Dict[str, float]:
+        """Calculate average, highest, and lowest grades for a specific subject across all shards."""
+        tally = [0, 0, None, None]
+        for part in self._scatter(_grade_tally, ("subject", subject)):
+            _add_tally(tally, *part)
+        return summarize(*tally)
+
+    def view_school_progress(self, subject: str = None) -> Dict:
+        """View the progress of every student, grouped by class, gathered from all shards."""
+        classes, tally, completion_total = {}, [0, 0, None, None], 0.0
+        for shard_classes, shard_tally, shard_completion in self._scatter(_school_progress_parts, subject):
+            classes.update(shard_classes)
+            _add_tally(tally, *shard_tally)
+            completion_total += shard_completion
+        return _school_report(subject, classes, tally, completion_total)
+
+    def find_lesson_conflicts(self, day: str, time: str, class_id: str = None, teacher_id: int = None,
+                              exclude_schedule: int = None) -> List[Dict]:
+        """Find stored lessons that overlap a time slot; a teacher's lessons are looked up on every shard."""
+        conflicts = []
+        if teacher_id is not None:
+            for part in self._scatter(_lesson_conflicts, day, time, None, teacher_id, exclude_schedule):
+                conflicts += part
+        if class_id is not None:
+            conflicts += self._call(self._class_shard(class_id), _lesson_conflicts,
+                                    day, time, class_id, None, exclude_schedule)
+        return conflicts
+
+    def get_lessons_between(self, start, end, include_end: bool = False):
+        """Dated lessons starting in [start, end) on all shards, merged in time order."""
+        parts = self._scatter("get_lessons_between", start, end, include_end)
+        return heapq.merge(*parts, key=lambda lesson: lesson[0])
+
+    get_schedules_between = DataStorage.get_schedules_between
+    get_schedules_by_week = DataStorage.get_schedules_by_week
+    get_schedules_by_month = DataStorage.get_schedules_by_month
+
+    # Maintenance
+
+    def progress_cache_stats(self) -> Dict[str, int]:
+        """Progress cache counters summed over the shards."""
+        totals = {}
+        for stats in self._scatter("progress_cache_stats"):
+            for name, value in stats.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def verify_indexes(self, rebuild: bool = False) -> List[str]:
+        """verify_indexes of every shard; mismatches are reported as 'shard <i>: <index>'."""
+        return [f"shard {shard}: {name}"
+                for shard, mismatched in enumerate(self._scatter("verify_indexes", rebuild))
+                for name in mismatched]
+
+    def rebuild_indexes(self):
+        self._scatter("rebuild_indexes")
+
+    # Export
+
+    export_row = staticmethod(DataStorage.export_row)
+
+    def iter_export_rows(self, table: str, ids = None):
+        """The export rows of a table (or of the given IDs in it), shard by shard."""
+        return itertools.chain.from_iterable(self._scatter("iter_export_rows", table, ids))
+
+    def export_tables(self) -> Dict[str, Callable]:
+        """Streaming export input for DataExporter: table name -> callable returning a row iterator."""
+        return {table: partial(self.iter_export_rows, table) for table in EXPORT_TABLES}
+
+
+for _name in CLASS_METHODS:
+    setattr(ShardedStorage, _name, _by_class(_name))
+for _name in USER_METHODS:
+    setattr(ShardedStorage, _name, _by_user(_name))
+for _name, (_table, _missing) in LOCATED_METHODS.items():
+    setattr(ShardedStorage, _name, _located(_name, _table, _missing))
+for _name in GATHER_METHODS:
+    setattr(ShardedStorage, _name, _gathered(_name))
+del _name, _table, _missing
@@ -0,0 +1,466 @@
+"""
+Binary snapshots of a whole DataStorage.
+
+A snapshot file holds every user, assignment, grade, schedule and
+notification as a length-prefixed binary record, an ID index per table, and
+a string table for the strings that repeat (subjects, class IDs, statuses,
+dates, dict keys). It is smaller than the JSON snapshot of the same storage.
+
+The format does not make restarts faster: a DataStorage is only ever loaded
+whole (load_into, or Journal.recover with binary snapshots), which builds
+every object and the indexes and takes about as long as loading a JSON
+snapshot. SnapshotReader is for looking into a snapshot without loading it,
+e.g. to inspect or restore single records: it memory-maps the file, reads
+only the metadata block when opened, and decodes a record the first time it
+is asked for, by a binary search of its table's index. It answers get,
+notifications_for and records, not the DataStorage queries (by class,
+statistics, progress, ...).
+
+Layout (all integers little-endian):
+    header     magic, format version, storage version, metadata offset
+    records    per record: u32 length, encoded value
+    indexes    per table: (i64 ID, u64 record offset), sorted by ID, and the
+               notifications again sorted by (recipient ID, ID)
+    strings    u32 count, u64 offset of each string, then u32 length + UTF-8 each
+    shapes     u32 count, u64 offset of each shape, then u32 length + the
+               string table indices of its keys
+    metadata   u32 length + JSON: table counts and section offsets, sequences
+
+Values are encoded with a one-byte tag: None, booleans, i64 ints, floats,
+strings (by string table index, or inline), lists, and dicts. A dict with
+string keys refers to its shape, the tuple of its keys, and stores only its
+values; other dicts store key, value pairs. A string is stored inline the
+first time it is written and goes into the string table the second time.
+"""
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from data.records import to_compact_record, from_record
+
+MAGIC = b"EDUSNAP\x00"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sIQQ")  # magic, format version, storage version, metadata offset
+INDEX_ENTRY = struct.Struct("<qQ")  # ID (or recipient ID), record offset
+U32 = struct.Struct("<I")
+U64 = struct.Struct("<Q")
+I64 = struct.Struct("<q")
+F64 = struct.Struct("<d")
+
+# Tables in load order: assignments before users, so teachers can resolve theirs.
+SNAPSHOT_TABLES = ("assignments", "users", "grades", "schedules", "notifications")
+
+# Longer strings are always stored inline.
+MAX_SHARED_STRING = 64
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STRING_REF, _STRING, _LIST, _DICT, _MAP = range(10)
+
+_TAGGED_U32 = struct.Struct("<BI")  # a tag and a string/shape index or a length
+_TAGGED_I64 = struct.Struct("<Bq")
+_TAGGED_F64 = struct.Struct("<Bd")
+
+
+# Writing
+
+class _Encoder:
+    """Encodes record values, building the string table and the dict shapes on the way."""
+
+    def __init__(self):
+        self.strings: List[bytes] = []
+        self.shapes: List[bytes] = []
+        self._string_refs: Dict[str, bytes] = {}
+        self._shape_refs: Dict[Tuple, bytes] = {}
+        self._seen = set()
+
+    def _share(self, string: str) -> bytes:
+        ref = self._string_refs[string] = _TAGGED_U32.pack(_STRING_REF, len(self.strings))
+        self.strings.append(string.encode())
+        return ref
+
+    def _shape(self, keys: Tuple) -> bytes:
+        indices = []
+        for key in keys:
+            ref = self._string_refs.get(key) or self._share(key)
+            indices.append(ref[1:])
+        ref = self._shape_refs[keys] = _TAGGED_U32.pack(_DICT, len(self.shapes))
+        self.shapes.append(b"".join(indices))
+        return ref
+
+    def encode(self, value, out: bytearray):
+        kind = type(value)
+        if kind is str:
+            ref = self._string_refs.get(value)
+            if ref is not None:
+                out += ref
+            elif value in self._seen:
+                out += self._share(value)
+            else:
+                if len(value) <= MAX_SHARED_STRING:
+                    self._seen.add(value)
+                data = value.encode()
+                out += _TAGGED_U32.pack(_STRING, len(data))
+                out += data
+        elif kind is int:
+            out += _TAGGED_I64.pack(_INT, value)
+        elif kind is dict:
+            keys = tuple(value)
+            ref = self._shape_refs.get(keys)
+            if ref is None and all(type(key) is str for key in keys):
+                ref = self._shape(keys)
+            if ref is not None:
+                out += ref
+                for item in value.values():
+                    self.encode(item, out)
+            else:
+                out += _TAGGED_U32.pack(_MAP, len(value))
+                for key, item in value.items():
+                    self.encode(key, out)
+                    self.encode(item, out)
+        elif kind is list or kind is tuple:
+            out += _TAGGED_U32.pack(_LIST, len(value))
+            for item in value:
+                self.encode(item, out)
+        elif value is None:
+            out.append(_NONE)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif kind is float:
+            out += _TAGGED_F64.pack(_FLOAT, value)
+        else:
+            raise TypeError(f"Cannot store {kind.__name__} in a snapshot")
+
+
+def _section(offset: int, items: List[bytes]) -> bytes:
+    """A string or shape section starting at offset: count, item offsets, length-prefixed items."""
+    position = offset + U32.size + U64.size * len(items)
+    offsets = []
+    for item in items:
+        offsets.append(U64.pack(position))
+        position += U32.size + len(item)
+    return b"".join([U32.pack(len(items))] + offsets + [U32.pack(len(item)) + item for item in items])
+
+
+def write_snapshot(storage, path: str) -> int:
+    """
+    Write a DataStorage to a binary snapshot file, atomically.
+
+    Returns:
+        int: Size of the file in bytes.
+    """
+    encoder = _Encoder()
+    metadata = {"tables": {}, "sequences": dict(storage._sequences)}
+    indexes = {}
+    by_recipient = []
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0))
+        offset = HEADER.size
+        for table in SNAPSHOT_TABLES:
+            index = indexes[table] = []
+            buffer = bytearray()
+            for obj in getattr(storage, table).values():
+                record = to_compact_record(table, obj)
+                index.append((record["id"], offset + len(buffer)))
+                if table == "notifications":
+                    by_recipient.append((record["recipient_id"], record["id"], offset + len(buffer)))
+                start = len(buffer)
+                buffer += b"\0\0\0\0"
+                encoder.encode(record, buffer)
+                U32.pack_into(buffer, start, len(buffer) - start - U32.size)
+            f.write(buffer)
+            offset += len(buffer)
+
+        for table in SNAPSHOT_TABLES:
+            index = sorted(indexes[table])
+            metadata["tables"][table] = {"count": len(index), "index": offset}
+            data = b"".join(INDEX_ENTRY.pack(item_id, record_offset) for item_id, record_offset in index)
+            f.write(data)
+            offset += len(data)
+        by_recipient.sort()
+        metadata["recipients"] = offset
+        data = b"".join(INDEX_ENTRY.pack(recipient_id, record_offset) for recipient_id, _, record_offset in by_recipient)
+        f.write(data)
+        offset += len(data)
+
+        for section, items in (("strings", encoder.strings), ("shapes", encoder.shapes)):
+            data = _section(offset, items)
+            metadata[section] = offset
+            f.write(data)
+            offset += len(data)
+
+        meta = json.dumps(metadata).encode()
+        f.write(U32.pack(len(meta)) + meta)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, storage.version, offset))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return offset + U32.size + len(meta)
+
+
+# Reading
+
+class LazyTable(Mapping):
+    """
+    Read-only mapping of ID -> object over one table of a snapshot.
+
+    Objects are decoded on first access and kept, so the same ID always gives
+    the same object.
+    """
+
+    def __init__(self, reader: "SnapshotReader", table: str, count: int, index_offset: int):
+        self._reader = reader
+        self.table = table
+        self._count = count
+        self._index = index_offset
+        self._objects = {}
+
+    def _offset_of(self, item_id) -> Optional[int]:
+        buffer = self._reader._buffer
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, offset = INDEX_ENTRY.unpack_from(buffer, self._index + mid * INDEX_ENTRY.size)
+            if key < item_id:
+                lo = mid + 1
+            elif key > item_id:
+                hi = mid
+            else:
+                return offset
+        return None
+
+    def __getitem__(self, item_id):
+        obj = self._objects.get(item_id)
+        if obj is None:
+            if not isinstance(item_id, int):
+                raise KeyError(item_id)
+            offset = self._offset_of(item_id)
+            if offset is None:
+                raise KeyError(item_id)
+            obj = self._objects[item_id] = self._reader._materialize(self.table, offset)
+        return obj
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self._objects or (isinstance(item_id, int) and self._offset_of(item_id) is not None)
+
+    def _entries(self) -> Iterator:
+        """(ID, record offset) of every record, by ID."""
+        buffer, base = self._reader._buffer, self._index
+        for position in range(self._count):
+            yield INDEX_ENTRY.unpack_from(buffer, base + position * INDEX_ENTRY.size)
+
+    def __iter__(self) -> Iterator[int]:
+        for item_id, _ in self._entries():
+            yield item_id
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class SnapshotReader:
+    def __init__(self, path: str):
+        """
+        Open a binary snapshot. Only the header and metadata are read here.
+
+        Raises:
+            ValueError: The file is not a snapshot, or of an unsupported format version.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._buffer = None
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a storage snapshot")
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, self.version, meta_offset = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a storage snapshot")
+        if format_version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path}: unsupported snapshot format {format_version}")
+        length, = U32.unpack_from(self._buffer, meta_offset)
+        metadata = json.loads(self._buffer[meta_offset + U32.size:meta_offset + U32.size + length])
+        self.sequences: Dict[str, int] = metadata["sequences"]
+        self._strings_offset = metadata["strings"]
+        self._shapes_offset = metadata["shapes"]
+        self._strings: List[Optional[str]] = [None] * U32.unpack_from(self._buffer, self._strings_offset)[0]
+        self._shapes: List[Optional[Tuple]] = [None] * U32.unpack_from(self._buffer, self._shapes_offset)[0]
+        self._recipients = metadata["recipients"]
+        self.tables = {
+            table: LazyTable(self, table, info["count"], info["index"])
+            for table, info in metadata["tables"].items()
+        }
+        self.users = self.tables["users"]
+        self.assignments = self.tables["assignments"]
+        self.grades = self.tables["grades"]
+        self.schedules = self.tables["schedules"]
+        self.notifications = self.tables["notifications"]
+
+    # Decoding
+
+    def _item(self, section: int, index: int) -> bytes:
+        offset, = U64.unpack_from(self._buffer, section + U32.size + index * U64.size)
+        length, = U32.unpack_from(self._buffer, offset)
+        return self._buffer[offset + U32.size:offset + U32.size + length]
+
+    def _string(self, index: int) -> str:
+        string = self._strings[index]
+        if string is None:
+            string = self._strings[index] = self._item(self._strings_offset, index).decode()
+        return string
+
+    def _shape(self, index: int) -> Tuple:
+        shape = self._shapes[index]
+        if shape is None:
+            data = self._item(self._shapes_offset, index)
+            shape = self._shapes[index] = tuple(
+                self._string(string_index) for string_index in struct.unpack(f"<{len(data) // 4}I", data))
+        return shape
+
+    def _decode(self, position: int):
+        """Decode the value at a position; returns (value, position after it)."""
+        buffer = self._buffer
+        tag = buffer[position]
+        if tag == _DICT:
+            keys = self._shape(U32.unpack_from(buffer, position + 1)[0])
+            position += 5
+            strings = self._strings
+            values = []
+            for _ in keys:
+                # Scalars are decoded in line: most values of a record are.
+                tag = buffer[position]
+                if tag == _STRING_REF:
+                    index, = U32.unpack_from(buffer, position + 1)
+                    values.append(strings[index] or self._string(index))
+                    position += 5
+                elif tag == _INT:
+                    values.append(I64.unpack_from(buffer, position + 1)[0])
+                    position += 9
+                else:
+                    value, position = self._decode(position)
+                    values.append(value)
+            return dict(zip(keys, values)), position
+        position += 1
+        if tag == _STRING_REF:
+            return self._string(U32.unpack_from(buffer, position)[0]), position + U32.size
+        if tag == _INT:
+            return I64.unpack_from(buffer, position)[0], position + I64.size
+        if tag == _STRING:
+            length, = U32.unpack_from(buffer, position)
+            start = position + U32.size
+            return buffer[start:start + length].decode(), start + length
+        if tag == _LIST:
+            count, = U32.unpack_from(buffer, position)
+            position += U32.size
+            value = []
+            for _ in range(count):
+                item, position = self._decode(position)
+                value.append(item)
+            return value, position
+        if tag == _MAP:
+            count, = U32.unpack_from(buffer, position)
+            position += U32.size
+            value = {}
+            for _ in range(count):
+                key, position = self._decode(position)
+                value[key], position = self._decode(position)
+            return value, position
+        if tag == _NONE:
+            return None, position
+        if tag == _TRUE:
+            return True, position
+        if tag == _FALSE:
+            return False, position
+        if tag == _FLOAT:
+            return F64.unpack_from(buffer, position)[0], position + F64.size
+        raise ValueError(f"{self.path}: bad value tag {tag} at byte {position - 1}")
+
+    def _record(self, offset: int) -> Dict:
+        return self._decode(offset + U32.size)[0]
+
+    def _materialize(self, table: str, offset: int):
+        record = self._record(offset)
+        if table != "users":
+            return from_record(table, record)
+        user = from_record(table, record, resolve_assignment=self.assignments.get)
+        for notification in self.notifications_for(user.id):
+            user.notifications.add(notification)
+        return user
+
+    # Access
+
+    def get(self, table: str, item_id: int):
+        """An object by table and ID, or None."""
+        return self.tables[table].get(item_id)
+
+    def notifications_for(self, recipient_id: int) -> List:
+        """The notifications of one recipient, from the recipient index."""
+        count = self.notifications._count
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if INDEX_ENTRY.unpack_from(self._buffer, self._recipients + mid * INDEX_ENTRY.size)[0] < recipient_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = []
+        while lo < count:
+            key, offset = INDEX_ENTRY.unpack_from(self._buffer, self._recipients + lo * INDEX_ENTRY.size)
+            if key != recipient_id:
+                break
+            record = self._record(offset)
+            found.append(self.notifications[record["id"]])
+            lo += 1
+        return found
+
+    def records(self, table: str) -> Iterator[Dict]:
+        """The records of a table, by ID, decoded without building objects."""
+        for _, offset in self.tables[table]._entries():
+            yield self._record(offset)
+
+    def load_into(self, storage=None):
+        """
+        Materialize every object into a DataStorage and build its indexes.
+
+        Args:
+            storage (DataStorage, optional): An empty storage to load into; a new one by default.
+
+        Returns:
+            DataStorage: The loaded storage, at the snapshot's change version.
+        """
+        if storage is None:
+            from data.storage import DataStorage
+            storage = DataStorage()
+        for table in SNAPSHOT_TABLES:
+            target = getattr(storage, table)
+            options = {"resolve_assignment": storage.assignments.get} if table == "users" else {}
+            for record in self.records(table):
+                target[record["id"]] = from_record(table, record, **options)
+        # Inboxes are filled from the notifications table here.
+        storage.rebuild_indexes()
+        for table, value in self.sequences.items():
+            storage._advance_sequence(table, value)
+        storage.version = storage._change_log_base = self.version
+        storage._change_log = []
+        return storage
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,758 @@
+"""
+SQLite-backed storage engine with the same API as DataStorage.
+
+Every object lives in a real table (one per collection, plus ``lessons`` for
+schedule slots) with indexes on the foreign-key columns, so the by-key
+lookups and the grade statistics run inside SQLite instead of Python loops.
+
+Objects handed out by the storage are kept in a bounded identity map: asking
+for the same row twice returns the same object, and changes the models make
+directly on those objects (e.g. ``assignment.add_submission``) are written
+back on ``commit()``, ``close()`` or when the object is evicted from the map.
+"""
+import json
+import sqlite3
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+from data.aggregates import EMPTY_STATISTICS
+from data.intervals import slots_overlap
+from data.lazy import model_classes
+from data.timeline import lesson_start
+from data.records import TABLES, Stored, to_record, to_compact_record, from_record
+from data.storage import DataStorage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    role TEXT NOT NULL,
+    full_name TEXT,
+    email TEXT,
+    password_hash TEXT,
+    created_at TEXT,
+    class_id TEXT,
+    state TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_users_class_id ON users (class_id);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS assignments (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    deadline TEXT,
+    subject TEXT NOT NULL,
+    teacher_id INTEGER NOT NULL,
+    class_id TEXT NOT NULL,
+    difficulty TEXT,
+    submissions TEXT NOT NULL DEFAULT '{}',
+    grades TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_class_id ON assignments (class_id);
+CREATE INDEX IF NOT EXISTS idx_assignments_teacher_id ON assignments (teacher_id);
+
+CREATE TABLE IF NOT EXISTS grades (
+    id INTEGER PRIMARY KEY,
+    student_id INTEGER NOT NULL,
+    subject TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    date TEXT,
+    teacher_id INTEGER NOT NULL,
+    comments TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_grades_student_subject ON grades (student_id, subject);
+CREATE INDEX IF NOT EXISTS idx_grades_subject ON grades (subject);
+CREATE INDEX IF NOT EXISTS idx_grades_teacher_id ON grades (teacher_id);
+
+CREATE TABLE IF NOT EXISTS schedules (
+    id INTEGER PRIMARY KEY,
+    class_id TEXT NOT NULL,
+    day TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_schedules_class_id ON schedules (class_id);
+CREATE INDEX IF NOT EXISTS idx_schedules_class_day ON schedules (class_id, day);
+
+CREATE TABLE IF NOT EXISTS lessons (
+    schedule_id INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    teacher_id INTEGER,
+    lesson TEXT NOT NULL,
+    PRIMARY KEY (schedule_id, time)
+);
+CREATE INDEX IF NOT EXISTS idx_lessons_teacher_id ON lessons (teacher_id);
+
+-- Start times of dated lessons (data.timeline.lesson_start) as ISO strings,
+-- which sort in time order, for date-range queries.
+CREATE TABLE IF NOT EXISTS lesson_starts (
+    starts_at TEXT NOT NULL,
+    schedule_id INTEGER NOT NULL,
+    time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lesson_starts ON lesson_starts (starts_at);
+CREATE INDEX IF NOT EXISTS idx_lesson_starts_schedule_id ON lesson_starts (schedule_id);
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY,
+    message TEXT,
+    recipient_id INTEGER NOT NULL,
+    created_at TEXT,
+    priority TEXT NOT NULL,
+    is_read INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_notifications_recipient_id ON notifications (recipient_id);
+CREATE INDEX IF NOT EXISTS idx_notifications_recipient_unread ON notifications (recipient_id, is_read, priority);
+
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+COLUMNS = {
+    "users": ("id", "role", "full_name", "email", "password_hash", "created_at", "class_id", "state"),
+    "assignments": ("id", "title", "description", "deadline", "subject", "teacher_id", "class_id",
+                    "difficulty", "submissions", "grades"),
+    "grades": ("id", "student_id", "subject", "value", "date", "teacher_id", "comments"),
+    "schedules": ("id", "class_id", "day"),
+    "notifications": ("id", "message", "recipient_id", "created_at", "priority", "is_read"),
+}
+
+# Columns holding nested values, stored as JSON text.
+JSON_COLUMNS = {
+    "users": ("state",),
+    "assignments": ("submissions", "grades"),
+    "grades": ("comments",),
+}
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class TableView(Mapping):
+    """Read-only dict-like view of one table, standing in for DataStorage.users & co."""
+
+    def __init__(self, storage: "SQLiteStorage", table: str):
+        self._storage = storage
+        self._table = table
+
+    def __getitem__(self, item_id):
+        obj = self._storage._load(self._table, item_id)
+        if obj is None:
+            raise KeyError(item_id)
+        return obj
+
+    def __contains__(self, item_id) -> bool:
+        return self._storage._exists(self._table, item_id)
+
+    def __len__(self) -> int:
+        return self._storage._conn.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+    def __iter__(self):
+        for (item_id,) in self._storage._conn.execute(f"SELECT id FROM {self._table} ORDER BY id").fetchall():
+            yield item_id
+
+    def values(self):
+        return self._storage._select(self._table, "", ())
+
+    def items(self):
+        return ((obj.id, obj) for obj in self.values())
+
+
+class SQLiteStorage:
+    def __init__(self, path: str = "eduplatform.db", cache_size: int = 10000):
+        """
+        Open (or create) a SQLite database as a storage backend.
+
+        Args:
+            path (str): Database file, or ":memory:" for a throwaway database.
+            cache_size (int): Objects per table kept in the identity map.
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self._conn = sqlite3.connect(path, cached_statements=256)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._batch_depth = 0
+        # table -> OrderedDict(id -> (object, encoded row as last written/read))
+        self._objects = {table: OrderedDict() for table in TABLES}
+        self.users = TableView(self, "users")
+        self.assignments = TableView(self, "assignments")
+        self.grades = TableView(self, "grades")
+        self.schedules = TableView(self, "schedules")
+        self.notifications = TableView(self, "notifications")
+        self.dispatcher = None
+        self.reminders = None
+        self.parent_alerts = None
+        # Reads go to SQLite, so progress is not cached (see DataStorage._progress_cache).
+        self._progress_cache = None
+
+    # Connection and transaction handling
+
+    def commit(self):
+        """Write back objects changed in place and commit the transaction."""
+        for table in TABLES:
+            objects = self._objects[table]
+            for item_id, (obj, encoded) in list(objects.items()):
+                objects[item_id] = (obj, self._write_back(table, obj, encoded))
+        self._conn.commit()
+
+    def close(self):
+        self.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @contextmanager
+    def batch(self):
+        """
+        Group many storage calls into a single transaction.
+
+        If the outermost batch raises, its writes are rolled back and the
+        identity map is emptied, so later reads see what was committed.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._rollback()
+            raise
+        self._batch_depth -= 1
+        self._commit()
+
+    def _rollback(self):
+        self._conn.rollback()
+        for objects in self._objects.values():
+            objects.clear()
+
+    def _commit(self):
+        if self._batch_depth == 0:
+            self._conn.commit()
+
+    # Row <-> object mapping
+
+    def _encode(self, table: str, obj):
+        # A user's inbox is not part of its row: it is read from the notifications table.
+        record = to_compact_record(table, obj) if table == "users" else to_record(table, obj)
+        json_columns = JSON_COLUMNS.get(table, ())
+        row = tuple(_dumps(record[col]) if col in json_columns else record[col] for col in COLUMNS[table])
+        if table == "schedules":
+            lessons = tuple(
+                (obj.id, time, lesson.get("teacher_id"), _dumps(lesson))
+                for time, lesson in record["lessons"].items()
+            )
+            starts = tuple(
+                (start.isoformat(), obj.id, time)
+                for start, time in ((lesson_start(obj.day, time, lesson), time) for time, lesson in obj.lessons.items())
+                if start is not None
+            )
+            return row, lessons, starts
+        return row
+
+    def _decode(self, table: str, row):
+        json_columns = JSON_COLUMNS.get(table, ())
+        record = {col: json.loads(row[col]) if col in json_columns else row[col] for col in COLUMNS[table]}
+        if table == "schedules":
+            record["lessons"] = {
+                time: json.loads(lesson)
+                for time, lesson in self._conn.execute(
+                    "SELECT time, lesson FROM lessons WHERE schedule_id = ? ORDER BY rowid", (record["id"],))
+            }
+        if table == "users":
+            user = from_record(table, record, resolve_assignment=self.get_assignment)
+            user.notifications = model_classes.Inbox(
+                self._select("notifications", "WHERE recipient_id = ?", (user.id,)))
+            return user
+        if table == "grades" and isinstance(record["value"], float) and record["value"].is_integer():
+            # Databases created before grades.value was INTEGER hold REAL values.
+            record["value"] = int(record["value"])
+        return from_record(table, record)
+
+    def _write(self, table: str, encoded):
+        placeholders = ", ".join("?" * len(COLUMNS[table]))
+        if table == "schedules":
+            row, lessons, starts = encoded
+            self._conn.execute(f"INSERT OR REPLACE INTO schedules VALUES ({placeholders})", row)
+            self._conn.execute("DELETE FROM lessons WHERE schedule_id = ?", (row[0],))
+            self._conn.executemany("INSERT INTO lessons VALUES (?, ?, ?, ?)", lessons)
+            self._conn.execute("DELETE FROM lesson_starts WHERE schedule_id = ?", (row[0],))
+            self._conn.executemany("INSERT INTO lesson_starts VALUES (?, ?, ?)", starts)
+        else:
+            self._conn.execute(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", encoded)
+
+    def _write_back(self, table: str, obj, encoded):
+        """Write an object changed in place since it was loaded; returns its current encoding."""
+        current = self._encode(table, obj)
+        if current != encoded:
+            self._write(table, current)
+        return current
+
+    def _remember(self, table: str, obj, encoded):
+        objects = self._objects[table]
+        objects[obj.id] = (obj, encoded)
+        objects.move_to_end(obj.id)
+        if isinstance(obj, Stored):
+            # In-place changes are reported back here (see user_profile_changed).
+            obj._storage = self
+        while len(objects) > self.cache_size:
+            _, (old, old_encoded) = objects.popitem(last=False)
+            self._write_back(table, old, old_encoded)
+
+    def _save(self, table: str, obj):
+        encoded = self._encode(table, obj)
+        self._write(table, encoded)
+        self._remember(table, obj, encoded)
+        self._commit()
+
+    def _delete(self, table: str, item_id: int) -> bool:
+        cached = self._objects[table].pop(item_id, None)
+        if cached is not None and isinstance(cached[0], Stored):
+            cached[0]._storage = None
+        deleted = self._conn.execute(f"DELETE FROM {table} WHERE id = ?", (item_id,)).rowcount
+        if table == "schedules":
+            self._conn.execute("DELETE FROM lessons WHERE schedule_id = ?", (item_id,))
+            self._conn.execute("DELETE FROM lesson_starts WHERE schedule_id = ?", (item_id,))
+        self._commit()
+        return bool(deleted)
+
+    def _materialize(self, table: str, row):
+        cached = self._objects[table].get(row["id"])
+        if cached is not None:
+            self._objects[table].move_to_end(row["id"])
+            return cached[0]
+        obj = self._decode(table, row)
+        self._remember(table, obj, self._encode(table, obj))
+        return obj
+
+    def _load(self, table: str, item_id: int):
+        cached = self._objects[table].get(item_id)
+        if cached is not None:
+            self._objects[table].move_to_end(item_id)
+            return cached[0]
+        row = self._conn.execute(f"SELECT * FROM {table} WHERE id = ?", (item_id,)).fetchone()
+        return self._materialize(table, row) if row is not None else None
+
+    def _select(self, table: str, where: str, params: tuple) -> List:
+        rows = self._conn.execute(f"SELECT * FROM {table} {where} ORDER BY id", params).fetchall()
+        return [self._materialize(table, row) for row in rows]
+
+    def _exists(self, table: str, item_id: int) -> bool:
+        if item_id in self._objects[table]:
+            return True
+        return self._conn.execute(f"SELECT 1 FROM {table} WHERE id = ?", (item_id,)).fetchone() is not None
+
+    # ID sequences
+
+    def reserve_ids(self, table: str, count: int) -> range:
+        """Reserve a block of new, never used IDs for a table (see DataStorage.reserve_ids)."""
+        if table not in TABLES:
+            raise KeyError(table)
+        row = self._conn.execute("SELECT value FROM sequences WHERE name = ?", (table,)).fetchone()
+        highest = self._conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+        start = max(row[0] if row is not None else 0, highest) + 1
+        self._conn.execute("INSERT OR REPLACE INTO sequences VALUES (?, ?)", (table, start + count - 1))
+        self._commit()
+        return range(start, start + count)
+
+    next_id = DataStorage.next_id
+
+    #user management
+    def add_user(self, user):
+        if isinstance(user, model_classes.User):
+            self._save("users", user)
+
+    def get_user(self, user_id: int):
+        return self._load("users", user_id)
+
+    def remove_user(self, user_id):
+        self._delete("users", user_id)
+
+    def get_users_by_email(self, email: str) -> List:
+        """Retrieve the users registered with an email address."""
+        return self._select("users", "WHERE email = ?", (email,))
+
+    def user_profile_changed(self, user, old_email: str = None):
+        """Persist a stored user's changed profile."""
+        cached = self._objects["users"].get(user.id)
+        if cached is not None and cached[0] is user:
+            self._save("users", user)
+
+    def get_students_by_class(self, class_id: str):
+        """Retrieve a list of student IDs for a given class."""
+        rows = self._conn.execute(
+            "SELECT id FROM users WHERE class_id = ? AND role = 'Student' ORDER BY id", (class_id,))
+        return [row[0] for row in rows]
+
+    # Notification management
+
+    def _inbox_of(self, recipient_id: int):
+        """The inbox of a recipient loaded in the identity map, or None (loaded users read theirs on loading)."""
+        cached = self._objects["users"].get(recipient_id)
+        return cached[0].notifications if cached is not None else None
+
+    def add_notification(self, notification):
+        if isinstance(notification, model_classes.Notification):
+            self._save("notifications", notification)
+            inbox = self._inbox_of(notification.recipient_id)
+            if inbox is not None:
+                inbox.add(notification)
+
+    def send_notifications(self, notifications) -> int:
+        """Store many notifications and deliver each to its recipient, in one transaction."""
+        notifications = [n for n in notifications if isinstance(n, model_classes.Notification)]
+        placeholders = ", ".join("?" * len(COLUMNS["notifications"]))
+        by_recipient = defaultdict(list)
+        delivered = 0
+        with self.batch():
+            self._conn.executemany(f"INSERT OR REPLACE INTO notifications VALUES ({placeholders})",
+                                   [self._encode("notifications", n) for n in notifications])
+            for notification in notifications:
+                # A cached copy of a replaced row must not be written back over it.
+                self._objects["notifications"].pop(notification.id, None)
+                notification._storage = self
+                by_recipient[notification.recipient_id].append(notification)
+            recipient_ids = list(by_recipient)
+            for start in range(0, len(recipient_ids), 500):
+                chunk = recipient_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT id FROM users WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+                for (user_id,) in rows:
+                    inbox = self._inbox_of(user_id)
+                    for notification in by_recipient[user_id]:
+                        if inbox is not None:
+                            inbox.add(notification)
+                        delivered += 1
+        return delivered
+
+    dispatch = DataStorage.dispatch
+
+    def get_notification(self, notification_id: int):
+        return self._load("notifications", notification_id)
+
+    def remove_notification(self, notification_id: int):
+        notification = self._load("notifications", notification_id)
+        with self.batch():
+            if self._delete("notifications", notification_id):
+                inbox = self._inbox_of(notification.recipient_id)
+                if inbox is not None:
+                    inbox.remove(notification_id)
+
+    def notification_read(self, notification):
+        """Persist a stored notification marked as read, and mark it read in its loaded recipient's inbox."""
+        cached = self._objects["notifications"].get(notification.id)
+        with self.batch():
+            # The row is marked read even when the caller holds another copy of it
+            # (e.g. the one in the recipient's inbox).
+            if cached is not None:
+                cached[0].is_read = True
+                self._save("notifications", cached[0])
+            else:
+                self._conn.execute("UPDATE notifications SET is_read = 1 WHERE id = ?", (notification.id,))
+            inbox = self._inbox_of(notification.recipient_id)
+            if inbox is not None:
+                inbox.mark_read(notification.id)
+
+    mark_notification_read = DataStorage.mark_notification_read
+
+    @staticmethod
+    def _notification_filters(where: List[str], params: List, unread_only: bool, priority):
+        if unread_only:
+            where.append("is_read = 0")
+        if priority:
+            where.append("priority = ?")
+            params.append(model_classes.Priority(priority).value)
+
+    def _filter_notifications(self, where: List[str], params: List, unread_only: bool, priority) -> List:
+        self._notification_filters(where, params, unread_only, priority)
+        clause = ("WHERE " + " AND ".join(where)) if where else ""
+        return self._select("notifications", clause, tuple(params))
+
+    def get_notifications_by_user(self, user_id: int, unread_only: bool = False, priority = None):
+        """A recipient's notifications in ID order, optionally only unread ones and of one priority."""
+        return self._filter_notifications(["recipient_id = ?"], [user_id], unread_only, priority)
+
+    def count_unread_notifications(self, user_id: int, priority = None) -> int:
+        """Number of unread notifications of a recipient, optionally of one priority."""
+        where, params = ["recipient_id = ?"], [user_id]
+        self._notification_filters(where, params, True, priority)
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM notifications WHERE {' AND '.join(where)}", params).fetchone()[0]
+
+    def get_latest_notifications(self, user_id: int, limit: int = 20, before: int = None,
+                                 unread_only: bool = False, priority = None):
+        """A recipient's newest notifications first, a page at a time; the cursor is a notification ID."""
+        where, params = ["recipient_id = ?"], [user_id]
+        self._notification_filters(where, params, unread_only, priority)
+        if before is not None:
+            where.append("id < ?")
+            params.append(before)
+        rows = self._conn.execute(
+            f"SELECT * FROM notifications WHERE {' AND '.join(where)} ORDER BY id DESC LIMIT ?",
+            params + [limit + 1]).fetchall()
+        page = [self._materialize("notifications", row) for row in rows[:limit]]
+        return page, (page[-1].id if len(rows) > limit else None)
+
+    def filter_notifications(self, unread_only: bool = False, priority = None):
+        """Filter notifications based on read status and priority."""
+        return self._filter_notifications([], [], unread_only, priority)
+
+    send_automatic_notification = DataStorage.send_automatic_notification
+
+    # Schedule Management
+    def add_schedule(self, schedule):
+        """Add a schedule to the storage."""
+        if isinstance(schedule, model_classes.Schedule):
+            with self.batch():
+                self._save("schedules", schedule)
+                model_classes.Notification.notify_schedule_change(schedule, self)
+
+    def add_schedules(self, schedules) -> int:
+        """Add many schedules in one transaction, notifying each class once."""
+        changed = {}
+        added = 0
+        with self.batch():
+            for schedule in schedules:
+                if isinstance(schedule, model_classes.Schedule):
+                    self._save("schedules", schedule)
+                    changed.setdefault(schedule.class_id, schedule)
+                    added += 1
+            for schedule in changed.values():
+                model_classes.Notification.notify_schedule_change(schedule, self)
+        return added
+
+    def get_schedule(self, schedule_id: int):
+        """Retrieve a schedule by its ID."""
+        return self._load("schedules", schedule_id)
+
+    def remove_schedule(self, schedule_id: int):
+        """Remove a schedule by its ID."""
+        self._delete("schedules", schedule_id)
+
+    def reindex_schedule(self, schedule):
+        """Rewrite the lessons of a stored schedule after they changed."""
+        cached = self._objects["schedules"].get(schedule.id)
+        if cached is not None and cached[0] is schedule:
+            self._save("schedules", schedule)
+
+    def get_schedules_by_class(self, class_id: str):
+        """Retrieve all schedules for a specific class."""
+        return self._select("schedules", "WHERE class_id = ?", (class_id,))
+
+    def get_schedules_by_teacher(self, teacher_id: int):
+        """Retrieve all schedules for a specific teacher."""
+        return self._select(
+            "schedules", "WHERE id IN (SELECT schedule_id FROM lessons WHERE teacher_id = ?)", (teacher_id,))
+
+    def find_lesson_conflicts(self, day: str, time: str, class_id: str = None, teacher_id: int = None,
+                              exclude_schedule: int = None) -> List[Dict]:
+        """Find stored lessons that overlap a time slot for a teacher or a class on a day."""
+        conflicts = []
+        for kind, owner, condition in (("teacher", teacher_id, "lessons.teacher_id = ?"),
+                                       ("class", class_id, "schedules.class_id = ?")):
+            if owner is None:
+                continue
+            rows = self._conn.execute(
+                "SELECT lessons.schedule_id, lessons.time FROM lessons"
+                " JOIN schedules ON schedules.id = lessons.schedule_id"
+                f" WHERE schedules.day = ? AND {condition} ORDER BY lessons.time",
+                (day, owner))
+            for schedule_id, slot_time in rows:
+                if schedule_id != exclude_schedule and slots_overlap(slot_time, time):
+                    conflicts.append({"kind": kind, "schedule_id": schedule_id, "time": slot_time})
+        return conflicts
+
+    def get_lessons_between(self, start: datetime, end: datetime, include_end: bool = False):
+        """Lazily yield (start, schedule, time slot, lesson) of the dated lessons starting in [start, end)."""
+        rows = self._conn.execute(
+            f"SELECT starts_at, schedule_id, time FROM lesson_starts"
+            f" WHERE starts_at >= ? AND starts_at {'<=' if include_end else '<'} ? ORDER BY starts_at, rowid",
+            (start.isoformat(), end.isoformat()))
+        for starts_at, schedule_id, time in rows:
+            schedule = self._load("schedules", schedule_id)
+            if schedule is not None and time in schedule.lessons:
+                yield datetime.fromisoformat(starts_at), schedule, time, schedule.lessons[time]
+
+    get_schedules_between = DataStorage.get_schedules_between
+    get_schedules_by_week = DataStorage.get_schedules_by_week
+    get_schedules_by_month = DataStorage.get_schedules_by_month
+
+    # Assignment management
+
+    def add_assignment(self, assignment):
+        if isinstance(assignment, model_classes.Assignment):
+            self._save("assignments", assignment)
+            if self.reminders is not None:
+                self.reminders.schedule(assignment)
+
+    def get_assignment(self, assignment_id: int):
+        return self._load("assignments", assignment_id)
+
+    def remove_assignment(self, assignment_id: int):
+        """Remove an assignment by its ID."""
+        self._delete("assignments", assignment_id)
+        if self.reminders is not None:
+            self.reminders.cancel(assignment_id)
+
+    def get_assignments_by_class(self, class_id: str):
+        """Retrieve all assignments for a specific class."""
+        return self._select("assignments", "WHERE class_id = ?", (class_id,))
+
+    get_assignments_by_student = DataStorage.get_assignments_by_student
+
+    def assign_assignment_to_class(self, assignment_id: int, class_id: str) -> bool:
+        """Assign an assignment to all students in a class."""
+        if not self._exists("assignments", assignment_id):
+            return False
+        with self.batch():
+            for student in self._select("users", "WHERE class_id = ? AND role = 'Student'", (class_id,)):
+                student.assignments[assignment_id] = {"status": "Pending", "content": ""}
+                self._save("users", student)
+        return True
+
+    def update_user_assignments(self, user_id: int, assignments: Dict[int, Dict[str, str]]) -> bool:
+        """Update the assignments dictionary for a user in storage."""
+        user = self.get_user(user_id)
+        if isinstance(user, model_classes.Student):
+            user.assignments = assignments
+            self._save("users", user)
+            return True
+        return False
+
+    def submission_added(self, assignment, student_id: int):
+        """Persist a stored assignment after a submission was added."""
+        cached = self._objects["assignments"].get(assignment.id)
+        if cached is not None and cached[0] is assignment:
+            self._save("assignments", assignment)
+
+    def assignment_graded(self, assignment, student_id: int):
+        """Persist the assignment and student changed by Assignment.set_grade."""
+        with self.batch():
+            self.submission_added(assignment, student_id)
+            cached = self._objects["users"].get(student_id)
+            if cached is not None:
+                self._save("users", cached[0])
+
+    # Grade management
+
+    def add_grade(self, grade):
+        """Add a grade to the storage."""
+        if isinstance(grade, model_classes.Grade):
+            self._save("grades", grade)
+            if self.parent_alerts is not None:
+                self.parent_alerts.grade_stored(grade)
+
+    def get_grade(self, grade_id: int):
+        """Retrieve a grade by its ID."""
+        return self._load("grades", grade_id)
+
+    def remove_grade(self, grade_id: int):
+        """Remove a grade by its ID."""
+        self._delete("grades", grade_id)
+
+    def grade_value_changed(self, grade, old_value):
+        """Persist the new value of a stored grade."""
+        cached = self._objects["grades"].get(grade.id)
+        if cached is not None and cached[0] is grade:
+            self._save("grades", grade)
+            if self.parent_alerts is not None:
+                self.parent_alerts.grade_stored(grade)
+
+    def get_grades_by_student(self, student_id: int, subject: str = None):
+        """Retrieve all grades for a specific student, optionally filtered by subject."""
+        if subject:
+            return self._select("grades", "WHERE student_id = ? AND subject = ?", (student_id, subject))
+        return self._select("grades", "WHERE student_id = ?", (student_id,))
+
+    def _grade_statistics(self, sql: str, params: tuple) -> Dict[str, float]:
+        count, average, highest, lowest = self._conn.execute(sql, params).fetchone()
+        if not count:
+            return dict(EMPTY_STATISTICS)
+        return {
+            "average": round(average, 2),
+            "highest": float(highest),
+            "lowest": float(lowest)
+        }
+
+    def calculate_grade_statistics_by_student(self, student_id: int, subject: str = None) -> Dict[str, float]:
+        """Calculate average, highest, and lowest grades for a student, optionally filtered by subject."""
+        sql = "SELECT COUNT(value), AVG(value), MAX(value), MIN(value) FROM grades WHERE student_id = ?"
+        if subject:
+            return self._grade_statistics(sql + " AND subject = ?", (student_id, subject))
+        return self._grade_statistics(sql, (student_id,))
+
+    def calculate_grade_statistics_by_class(self, class_id: str, subject: str = None) -> Dict[str, float]:
+        """Calculate average, highest, and lowest grades for a class, optionally filtered by subject."""
+        sql = ("SELECT COUNT(g.value), AVG(g.value), MAX(g.value), MIN(g.value) FROM grades g "
+               "JOIN users u ON u.id = g.student_id WHERE u.class_id = ? AND u.role = 'Student'")
+        if subject:
+            return self._grade_statistics(sql + " AND g.subject = ?", (class_id, subject))
+        return self._grade_statistics(sql, (class_id,))
+
+    def calculate_grade_statistics_by_subject(self, subject: str) -> Dict[str, float]:
+        """Calculate average, highest, and lowest grades for a specific subject across all students."""
+        return self._grade_statistics(
+            "SELECT COUNT(value), AVG(value), MAX(value), MIN(value) FROM grades WHERE subject = ?", (subject,))
+
+    view_student_progress = _student_progress = DataStorage._student_progress
+    view_class_progress = DataStorage.view_class_progress
+    view_school_progress = DataStorage.view_school_progress
+    _school_progress_parts = DataStorage._school_progress_parts
+    _progress_report = DataStorage._progress_report
+
+    def add_parent_child(self, parent_id: int, child_id: int) -> bool:
+        """Add a child to a parent's list of children."""
+        parent = self.get_user(parent_id)
+        if isinstance(parent, model_classes.Parent):
+            if child_id not in parent.children:
+                parent.children.append(child_id)
+                self._save("users", parent)
+                return True
+        return False
+
+    def remove_parent_child(self, parent_id: int, child_id: int) -> bool:
+        """Remove a child from a parent's list of children."""
+        parent = self.get_user(parent_id)
+        if isinstance(parent, model_classes.Parent) and child_id in parent.children:
+            parent.children.remove(child_id)
+            self._save("users", parent)
+            return True
+        return False
+
+    def get_parents_by_child(self, child_id: int) -> List[int]:
+        """Retrieve the IDs of the parents of a student."""
+        rows = self._conn.execute(
+            "SELECT users.id FROM users, json_each(users.state, '$.children') AS child"
+            " WHERE users.role = 'Parent' AND child.value = ? ORDER BY users.id", (child_id,))
+        return [row[0] for row in rows]
+
+    # Index maintenance
+
+    def rebuild_indexes(self):
+        """Rebuild every SQLite index, and the lesson start times (e.g. for a database written before they existed)."""
+        with self.batch():
+            self._conn.execute("DELETE FROM lesson_starts")
+            for schedule in self.schedules.values():
+                self._write("schedules", self._encode("schedules", schedule))
+        self._conn.execute("REINDEX")
+
+    def verify_indexes(self, rebuild: bool = False) -> List[str]:
+        """Run SQLite's integrity check; returns its problem reports (empty if consistent)."""
+        problems = [row[0] for row in self._conn.execute("PRAGMA integrity_check") if row[0] != "ok"]
+        if problems and rebuild:
+            self.rebuild_indexes()
+        return problems
+
+    export_row = staticmethod(DataStorage.export_row)
+    iter_export_rows = DataStorage.iter_export_rows
+    export_tables = DataStorage.export_tables
\ No newline at end of file
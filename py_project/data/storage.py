@@ -1,80 +1,689 @@
-from typing import List, Dict, Optional
+import os
+import threading
+from typing import Callable, List, Dict, Optional
 from datetime import datetime,timedelta
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+from data.aggregates import GradeAggregate, EMPTY_STATISTICS, summarize
+from data.intervals import IntervalSet
+from data.lazy import model_classes
+from data.progress_cache import ProgressCache
+from data.timeline import LessonTimeline, lesson_start
+from data.records import TABLES
+
+# Names of the secondary indexes kept by DataStorage (see _build_indexes).
+INDEX_NAMES = (
+    "users_by_email",
+    "students_by_class",
+    "grades_by_student",
+    "grades_by_subject",
+    "schedules_by_class",
+    "schedules_by_teacher",
+    "assignments_by_class",
+    "parents_by_child",
+)
+
+# Tables written by Admin.export_data, in export order.
+EXPORT_TABLES = ("users", "schedules", "assignments", "grades")
+
+
+def _add_tally(tally: List, count: int, total, lowest, highest):
+    """Fold a group of grades into a [count, total, lowest, highest] tally."""
+    if count:
+        tally[0] += count
+        tally[1] += total
+        tally[2] = lowest if tally[2] is None else min(tally[2], lowest)
+        tally[3] = highest if tally[3] is None else max(tally[3], highest)
+
+
+def _school_report(subject: Optional[str], classes: Dict, tally: List, completion_total: float) -> Dict:
+    """The view_school_progress dict from class reports and their combined grade tally."""
+    student_count = sum(report["student_count"] for report in classes.values())
+    return {
+        "subject": subject,
+        "student_count": student_count,
+        "average_completion_rate": round(completion_total / student_count, 2) if student_count else 0.0,
+        "statistics": summarize(*tally),
+        "classes": {class_id: classes[class_id] for class_id in sorted(classes)},
+    }
 
 
 class DataStorage:
-    def __init__(self):
+    """
+    In-memory storage of the school's objects, with secondary indexes kept up to date.
+
+    DataStorage is not thread safe: only the ID sequences (reserve_ids,
+    next_id) have a lock. Adding, changing or removing objects updates the
+    indexes without one, so a storage written to by several threads must be a
+    ConcurrentStorage (data.concurrent_storage), or every thread must hold one
+    common lock around its calls, as NotificationDispatcher workers do with
+    ``dispatcher.storage_lock``.
+    """
+
+    def __init__(self, progress_cache_size: int = 10_000):
         self.users = {}
         self.assignments = {}
         self.grades = {}
         self.schedules = {}
         self.notifications = {}
+        # Secondary indexes: key -> {object id: None}. A dict is used as an
+        # insertion-ordered set so lookups keep the order objects were added in.
+        self._indexes = {name: defaultdict(dict) for name in INDEX_NAMES}
+        # Teachers each schedule was indexed under, so a schedule can be
+        # unindexed even after its lessons have changed.
+        self._schedule_teachers = {}
+        # Lesson time slots per ("teacher", teacher_id, day) and ("class", class_id, day),
+        # as data.intervals.IntervalSet of (time, schedule ID), for conflict checks.
+        self._lesson_slots = defaultdict(IntervalSet)
+        # Slot keys and times each schedule was indexed under, like _schedule_teachers.
+        self._schedule_slots = {}
+        # Start times of dated lessons (see data.timeline.lesson_start), sorted,
+        # and the (start, time) pairs each schedule was indexed under.
+        self._lesson_timeline = LessonTimeline()
+        self._schedule_starts = {}
+        # Notification inboxes of recipients that are not stored users; a stored
+        # user's inbox is user.notifications itself (see _inbox).
+        self._inboxes = {}
+        # Running grade aggregates keyed by ("student", id), ("student_subject", id, subject),
+        # ("class", class_id), ("class_subject", class_id, subject) and ("subject", subject).
+        self._grade_stats = defaultdict(GradeAggregate)
+        # Change journal: every insert, update and delete gets the next version.
+        # _change_log[i] holds the change with version _change_log_base + i + 1.
+        # Versions count from 0 again in a new storage; the random epoch tells
+        # version histories apart (a Journal carries it across recoveries).
+        self.version = 0
+        self.epoch = os.urandom(8).hex()
+        self._change_log = []
+        self._change_log_base = 0
+        # ID sequences: table -> highest ID handed out or stored. IDs reserved
+        # from a sequence are never reused, even after the object is removed.
+        self._sequences = dict.fromkeys(TABLES, 0)
+        # Sequences may be drawn from by several threads (dispatcher workers,
+        # ConcurrentStorage readers), so they have a lock of their own.
+        self._sequence_lock = threading.Lock()
+        # utils.dispatch.NotificationDispatcher that queues sends, if one is attached.
+        self.dispatcher = None
+        # utils.reminders.DeadlineReminders following the assignment deadlines, if one is attached.
+        self.reminders = None
+        # utils.parent_alerts.ParentAlerts told about stored grades, if one is attached.
+        self.parent_alerts = None
+        # view_student_progress results; entries are dropped by _record_change and
+        # the grade index hooks when something they were built from changes.
+        self._progress_cache = ProgressCache(progress_cache_size)
+        # data.journal.Journal writing every change to disk, if one is attached.
+        self.journal = None
+
+    # Change journal
+
+    def _record_change(self, table: str, item_id: int, op: str):
+        self.version += 1
+        self._change_log.append((self.version, table, item_id, op))
+        if op == "insert":
+            self._advance_sequence(table, item_id)
+        if table == "users":
+            self._progress_cache.invalidate_student(item_id)
+        elif table == "assignments":
+            self._progress_cache.invalidate_assignment(item_id)
+        if self.journal is not None:
+            self.journal.log(self.version, table, item_id, op,
+                             None if op == "delete" else getattr(self, table).get(item_id))
+
+    def changes_since(self, watermark: int) -> Dict[str, Dict[int, str]]:
+        """
+        Collapse the changes made after a watermark version into their net effect.
+
+        Args:
+            watermark (int): Version returned by an earlier sync (0 for everything).
+
+        Returns:
+            Dict[str, Dict[int, str]]: table -> {id: "upsert" or "delete"}.
+
+        Raises:
+            ValueError: The changes after the watermark are no longer all in the log
+                (compacted), or the watermark is ahead of the storage (which was
+                reset); either way only a full export is complete.
+        """
+        if watermark > self.version:
+            raise ValueError(f"Watermark {watermark} is ahead of version {self.version}; "
+                             f"the storage was reset, do a full export")
+        if watermark < self._change_log_base:
+            raise ValueError(f"Changes before version {self._change_log_base} were compacted; do a full export")
+        changes = defaultdict(dict)
+        for _, table, item_id, op in self._change_log[watermark - self._change_log_base:]:
+            changes[table][item_id] = "delete" if op == "delete" else "upsert"
+        return dict(changes)
+
+    def compact_change_log(self, watermark: int):
+        """Drop journal entries up to a watermark that every consumer has synced past."""
+        watermark = min(watermark, self.version)
+        if watermark > self._change_log_base:
+            del self._change_log[:watermark - self._change_log_base]
+            self._change_log_base = watermark
+
+    # ID sequences
+
+    def _advance_sequence(self, table: str, item_id):
+        """Keep a sequence ahead of IDs chosen by callers instead of reserved from it."""
+        if isinstance(item_id, int) and item_id > self._sequences[table]:
+            with self._sequence_lock:
+                if item_id > self._sequences[table]:
+                    self._sequences[table] = item_id
+
+    def reserve_ids(self, table: str, count: int) -> range:
+        """
+        Reserve a block of new, never used IDs for a table.
+
+        Args:
+            table (str): One of "users", "assignments", "grades", "schedules", "notifications".
+            count (int): Number of IDs to reserve.
+
+        Returns:
+            range: The reserved IDs, in increasing order.
+        """
+        with self._sequence_lock:
+            start = self._sequences[table] + 1
+            self._sequences[table] += count
+        return range(start, start + count)
+
+    def next_id(self, table: str) -> int:
+        """Reserve a single new ID for a table."""
+        return self.reserve_ids(table, 1)[0]
+
+    @contextmanager
+    def batch(self):
+        """
+        Group storage calls that belong together, like SQLiteStorage.batch.
+
+        Model methods that change several objects and report them to the
+        storage run inside a batch; a ConcurrentStorage holds its write lock
+        for the whole batch, so other threads see all of the changes or none.
+        """
+        yield self
+
+    # Index maintenance
+
+    def _index_add(self, name: str, key, item_id: int):
+        self._indexes[name][key][item_id] = None
+
+    def _index_discard(self, name: str, key, item_id: int):
+        index = self._indexes[name]
+        ids = index.get(key)
+        if ids is not None:
+            ids.pop(item_id, None)
+            if not ids:
+                del index[key]
+
+    def _index_lookup(self, name: str, key):
+        return self._indexes[name].get(key, {})
+
+    def _bind(self, obj):
+        """Make this storage the one an added user, grade or notification reports its in-place changes to."""
+        obj._storage = self
+
+    def _unbind(self, obj):
+        if obj._owner() is self:
+            obj._storage = None
+
+    def _index_user(self, user):
+        self._index_add("users_by_email", user.email, user.id)
+        if isinstance(user, model_classes.Student):
+            self._index_add("students_by_class", user.class_id, user.id)
+            for grade_id in self._index_lookup("grades_by_student", user.id):
+                grade = self.grades[grade_id]
+                self._aggregate_add(self._class_grade_keys(user.class_id, grade), grade.value)
+        elif isinstance(user, model_classes.Parent):
+            for child_id in user.children:
+                self._index_add("parents_by_child", child_id, user.id)
+
+    def _unindex_user(self, user):
+        self._index_discard("users_by_email", user.email, user.id)
+        if isinstance(user, model_classes.Student):
+            self._index_discard("students_by_class", user.class_id, user.id)
+            for grade_id in self._index_lookup("grades_by_student", user.id):
+                grade = self.grades[grade_id]
+                self._aggregate_remove(self._class_grade_keys(user.class_id, grade), grade.value)
+        elif isinstance(user, model_classes.Parent):
+            for child_id in user.children:
+                self._index_discard("parents_by_child", child_id, user.id)
+
+    def _index_grade(self, grade):
+        self._index_add("grades_by_student", grade.student_id, grade.id)
+        self._index_add("grades_by_subject", grade.subject, grade.id)
+        self._aggregate_add(self._grade_keys(grade), grade.value)
+        self._progress_cache.invalidate_student(grade.student_id)
+
+    def _unindex_grade(self, grade):
+        self._index_discard("grades_by_student", grade.student_id, grade.id)
+        self._index_discard("grades_by_subject", grade.subject, grade.id)
+        self._aggregate_remove(self._grade_keys(grade), grade.value)
+        self._progress_cache.invalidate_student(grade.student_id)
+
+    def _index_schedule(self, schedule):
+        self._index_add("schedules_by_class", schedule.class_id, schedule.id)
+        teachers = {lesson["teacher_id"] for lesson in schedule.lessons.values()}
+        for teacher_id in teachers:
+            self._index_add("schedules_by_teacher", teacher_id, schedule.id)
+        self._schedule_teachers[schedule.id] = teachers
+        slots = list(self._slot_entries(schedule))
+        for key, time in slots:
+            self._lesson_slots[key].add(time, schedule.id)
+        self._schedule_slots[schedule.id] = slots
+        starts = list(self._lesson_starts(schedule))
+        for start, time in starts:
+            self._lesson_timeline.add(start, schedule.id, time)
+        self._schedule_starts[schedule.id] = starts
+
+    def _unindex_schedule(self, schedule):
+        self._index_discard("schedules_by_class", schedule.class_id, schedule.id)
+        for teacher_id in self._schedule_teachers.pop(schedule.id, ()):
+            self._index_discard("schedules_by_teacher", teacher_id, schedule.id)
+        for key, time in self._schedule_slots.pop(schedule.id, ()):
+            slots = self._lesson_slots.get(key)
+            if slots is not None:
+                slots.remove(time, schedule.id)
+                if not len(slots):
+                    del self._lesson_slots[key]
+        for start, time in self._schedule_starts.pop(schedule.id, ()):
+            self._lesson_timeline.remove(start, schedule.id, time)
+
+    @staticmethod
+    def _slot_entries(schedule):
+        for time, lesson in schedule.lessons.items():
+            yield ("teacher", lesson["teacher_id"], schedule.day), time
+            yield ("class", schedule.class_id, schedule.day), time
+
+    @staticmethod
+    def _lesson_starts(schedule):
+        for time, lesson in schedule.lessons.items():
+            start = lesson_start(schedule.day, time, lesson)
+            if start is not None:
+                yield start, time
+
+    def _build_lesson_timeline(self) -> LessonTimeline:
+        timeline = LessonTimeline()
+        for schedule in self.schedules.values():
+            for start, time in self._lesson_starts(schedule):
+                timeline.add(start, schedule.id, time)
+        return timeline
+
+    def _build_lesson_slots(self) -> Dict[tuple, IntervalSet]:
+        lesson_slots = defaultdict(IntervalSet)
+        for schedule in self.schedules.values():
+            for key, time in self._slot_entries(schedule):
+                lesson_slots[key].add(time, schedule.id)
+        return lesson_slots
+
+    def reindex_schedule(self, schedule):
+        """Refresh the teacher index after the lessons of a stored schedule changed."""
+        if self.schedules.get(schedule.id) is schedule:
+            self._unindex_schedule(schedule)
+            self._index_schedule(schedule)
+            self._record_change("schedules", schedule.id, "update")
+
+    # Running grade aggregates
+
+    @staticmethod
+    def _class_grade_keys(class_id: str, grade) -> tuple:
+        return (("class", class_id), ("class_subject", class_id, grade.subject))
+
+    def _grade_keys(self, grade) -> tuple:
+        """Aggregate keys a grade counts towards; class keys follow the student's current class."""
+        keys = (
+            ("student", grade.student_id),
+            ("student_subject", grade.student_id, grade.subject),
+            ("subject", grade.subject),
+        )
+        student = self.users.get(grade.student_id)
+        if isinstance(student, model_classes.Student):
+            keys += self._class_grade_keys(student.class_id, grade)
+        return keys
+
+    def _aggregate_add(self, keys, value):
+        for key in keys:
+            self._grade_stats[key].add(value)
+
+    def _aggregate_remove(self, keys, value):
+        for key in keys:
+            aggregate = self._grade_stats[key]
+            aggregate.remove(value)
+            if not aggregate.count:
+                del self._grade_stats[key]
+
+    def _grade_statistics(self, key) -> Dict[str, float]:
+        aggregate = self._grade_stats.get(key)
+        if aggregate is None:
+            return dict(EMPTY_STATISTICS)
+        return aggregate.statistics()
+
+    def grade_value_changed(self, grade, old_value):
+        """Move a stored grade from its old value to its new one in the running aggregates."""
+        if self.grades.get(grade.id) is grade:
+            keys = self._grade_keys(grade)
+            self._aggregate_remove(keys, old_value)
+            self._aggregate_add(keys, grade.value)
+            self._progress_cache.invalidate_student(grade.student_id)
+            self._record_change("grades", grade.id, "update")
+            if self.parent_alerts is not None:
+                self.parent_alerts.grade_stored(grade)
+
+    def _build_grade_statistics(self) -> Dict:
+        stats = defaultdict(GradeAggregate)
+        for grade in self.grades.values():
+            for key in self._grade_keys(grade):
+                stats[key].add(grade.value)
+        return stats
+
+    def _build_indexes(self) -> Dict[str, Dict]:
+        """Build every secondary index from a full scan of the primary dicts."""
+        indexes = {name: defaultdict(dict) for name in INDEX_NAMES}
+        for user in self.users.values():
+            indexes["users_by_email"][user.email][user.id] = None
+            if isinstance(user, model_classes.Student):
+                indexes["students_by_class"][user.class_id][user.id] = None
+            elif isinstance(user, model_classes.Parent):
+                for child_id in user.children:
+                    indexes["parents_by_child"][child_id][user.id] = None
+        for grade in self.grades.values():
+            indexes["grades_by_student"][grade.student_id][grade.id] = None
+            indexes["grades_by_subject"][grade.subject][grade.id] = None
+        for schedule in self.schedules.values():
+            indexes["schedules_by_class"][schedule.class_id][schedule.id] = None
+            for lesson in schedule.lessons.values():
+                indexes["schedules_by_teacher"][lesson["teacher_id"]][schedule.id] = None
+        for assignment in self.assignments.values():
+            indexes["assignments_by_class"][assignment.class_id][assignment.id] = None
+        return indexes
+
+    def _all_inboxes(self):
+        for user in self.users.values():
+            inbox = user.inbox(create=False)
+            if inbox is not None:
+                yield inbox
+        yield from self._inboxes.values()
+
+    def _inboxes_in_sync(self) -> bool:
+        """Every stored notification is in its recipient's inbox, and every inbox's unread index is current."""
+        for notification in self.notifications.values():
+            inbox = self._inbox(notification.recipient_id, create=False)
+            if inbox is None or inbox.get(notification.id) is not notification:
+                return False
+        return all(
+            inbox.unread_count() == sum(1 for n in inbox.query() if not n.is_read)
+            for inbox in self._all_inboxes()
+        )
+
+    def rebuild_indexes(self):
+        """Throw away the secondary indexes and grade aggregates and rebuild them from a full scan."""
+        self._indexes = self._build_indexes()
+        self._grade_stats = self._build_grade_statistics()
+        self._progress_cache.clear()
+        self._schedule_teachers = {
+            schedule.id: {lesson["teacher_id"] for lesson in schedule.lessons.values()}
+            for schedule in self.schedules.values()
+        }
+        self._lesson_slots = self._build_lesson_slots()
+        self._schedule_slots = {
+            schedule.id: list(self._slot_entries(schedule)) for schedule in self.schedules.values()
+        }
+        self._lesson_timeline = self._build_lesson_timeline()
+        self._schedule_starts = {
+            schedule.id: list(self._lesson_starts(schedule)) for schedule in self.schedules.values()
+        }
+        for table in TABLES:
+            self._advance_sequence(table, max(getattr(self, table), default=0))
+        for user in self.users.values():
+            self._bind(user)
+        for grade in self.grades.values():
+            self._bind(grade)
+        for notification in self.notifications.values():
+            self._bind(notification)
+        for inbox in self._all_inboxes():
+            inbox.reindex()
+        for notification in self.notifications.values():
+            self._inbox(notification.recipient_id).add(notification)
+
+    def verify_indexes(self, rebuild: bool = False) -> List[str]:
+        """
+        Compare the live indexes and grade aggregates with ones rebuilt from a full scan.
+
+        Args:
+            rebuild (bool): Replace the live indexes with the rebuilt ones when they differ.
+
+        Returns:
+            List[str]: Names of the indexes that are out of sync (empty if consistent).
+        """
+        expected = self._build_indexes()
+        mismatched = []
+        for name in INDEX_NAMES:
+            live = {key: set(ids) for key, ids in self._indexes[name].items() if ids}
+            fresh = {key: set(ids) for key, ids in expected[name].items()}
+            if live != fresh:
+                mismatched.append(name)
+        if dict(self._grade_stats) != dict(self._build_grade_statistics()):
+            mismatched.append("grade_statistics")
+        live_slots = {key: sorted(slots) for key, slots in self._lesson_slots.items() if len(slots)}
+        if live_slots != {key: sorted(slots) for key, slots in self._build_lesson_slots().items()}:
+            mismatched.append("lesson_slots")
+        if sorted(self._lesson_timeline) != sorted(self._build_lesson_timeline()):
+            mismatched.append("lesson_timeline")
+        if not self._inboxes_in_sync():
+            mismatched.append("notification_inboxes")
+        if mismatched and rebuild:
+            self.rebuild_indexes()
+        return mismatched
 
     #user management
     def add_user(self, user):
-        from core.user import User
-        if isinstance(user, User):
+        if isinstance(user, model_classes.User):
+            existed = user.id in self.users
+            if existed:
+                old = self.users[user.id]
+                self._unindex_user(old)
+                self._unbind(old)
+                previous_inbox = old.inbox(create=False)
+            else:
+                previous_inbox = self._inboxes.pop(user.id, None)
             self.users[user.id] = user
+            self._index_user(user)
+            self._bind(user)
+            if previous_inbox is not None and previous_inbox is not user.inbox(create=False):
+                # The stored notifications of this recipient move to the new user object.
+                for notification in previous_inbox.query():
+                    if self.notifications.get(notification.id) is notification:
+                        user.notifications.add(notification)
+            self._record_change("users", user.id, "update" if existed else "insert")
     
     def get_user(self, user_id: int):
         return self.users.get(user_id)
     
     def remove_user(self, user_id):
         if user_id in self.users:
-            del self.users[user_id]
+            user = self.users.pop(user_id)
+            self._unindex_user(user)
+            self._unbind(user)
+            # Stored notifications stay queryable; the removed object's inbox is left alone.
+            inbox = user.inbox(create=False)
+            kept = [n for n in inbox.query() if self.notifications.get(n.id) is n] if inbox is not None else []
+            if kept:
+                self._inboxes[user_id] = model_classes.Inbox(kept)
+            self._record_change("users", user_id, "delete")
+
+    def get_users_by_email(self, email: str) -> List:
+        """Retrieve the users registered with an email address."""
+        return [self.users[u_id] for u_id in self._index_lookup("users_by_email", email)]
+
+    def user_profile_changed(self, user, old_email: str = None):
+        """Record an in-place profile change of a stored user, moving it to its new email in the email index."""
+        if self.users.get(user.id) is user:
+            if old_email is not None and old_email != user.email:
+                self._index_discard("users_by_email", old_email, user.id)
+                self._index_add("users_by_email", user.email, user.id)
+            self._record_change("users", user.id, "update")
+
+    def view_all_users(self) -> List[Dict]:
+        """The profiles of all users."""
+        return [user.get_profile() for user in self.users.values()]
 
     def get_students_by_class(self, class_id: str):
-        from core.student import Student
         """Retrieve a list of student IDs for a given class."""
-        return [user.id for user in self.users.values() if isinstance(user, Student) and user.grades == class_id]        
+        return list(self._index_lookup("students_by_class", class_id))
     
     # Notification management
 
+    def _inbox(self, recipient_id: int, create: bool = True):
+        """The Inbox holding a recipient's notifications (None if there is none and create is False)."""
+        user = self.users.get(recipient_id)
+        if user is not None:
+            return user.inbox(create)
+        inbox = self._inboxes.get(recipient_id)
+        if inbox is None and create:
+            inbox = self._inboxes[recipient_id] = model_classes.Inbox()
+        return inbox
+
+    def _unfile_notification(self, notification):
+        inbox = self._inbox(notification.recipient_id, create=False)
+        if inbox is not None and inbox.get(notification.id) is notification:
+            inbox.remove(notification.id)
+
     def add_notification(self, notification):
-        from models.notifications import Notification
-        from models.notifications import Priority
-        if isinstance(notification, Notification):
+        if isinstance(notification, model_classes.Notification):
+            old = self.notifications.get(notification.id)
+            if old is not None and old is not notification:
+                self._unfile_notification(old)
+                self._unbind(old)
             self.notifications[notification.id] = notification
+            self._bind(notification)
+            self._inbox(notification.recipient_id).add(notification)
+            self._record_change("notifications", notification.id, "insert" if old is None else "update")
     
+    def send_notifications(self, notifications) -> int:
+        """
+        Store many notifications and deliver each to its recipient, in one pass.
+
+        Does what Notification.send does for each notification, without the
+        per-call overhead: each notification is filed by reference in its
+        recipient's inbox.
+
+        Args:
+            notifications (Iterable[Notification]): Notifications with their IDs set.
+
+        Returns:
+            int: Number of notifications delivered to an existing user.
+        """
+        stored = self.notifications
+        users = self.users
+        record_change = self._record_change
+        bind = self._bind
+        delivered = 0
+        for notification in notifications:
+            if not isinstance(notification, model_classes.Notification):
+                continue
+            old = stored.get(notification.id)
+            if old is not None and old is not notification:
+                self._unfile_notification(old)
+                self._unbind(old)
+            stored[notification.id] = notification
+            bind(notification)
+            record_change("notifications", notification.id, "insert" if old is None else "update")
+            user = users.get(notification.recipient_id)
+            if user is not None:
+                user.notifications.add(notification)
+                delivered += 1
+            else:
+                self._inbox(notification.recipient_id).add(notification)
+        return delivered
+
+    def dispatch(self, notifications):
+        """Deliver notifications now, or queue them if a dispatcher is attached."""
+        if self.dispatcher is not None:
+            self.dispatcher.submit(notifications)
+        else:
+            self.send_notifications(notifications)
+
     def get_notification(self, notification_id: int):
         return self.notifications.get(notification_id)
     
     def remove_notification(self, notification_id: int):
         if notification_id in self.notifications:
-            del self.notifications[notification_id]
+            notification = self.notifications.pop(notification_id)
+            self._unfile_notification(notification)
+            self._unbind(notification)
+            self._record_change("notifications", notification_id, "delete")
+
+    def notification_read(self, notification):
+        """Called after a stored notification was marked as read."""
+        if self.notifications.get(notification.id) is notification:
+            inbox = self._inbox(notification.recipient_id, create=False)
+            if inbox is not None:
+                inbox.mark_read(notification.id)
+            self._record_change("notifications", notification.id, "update")
+
+    def mark_notification_read(self, notification_id: int) -> bool:
+        """Mark a stored notification as read; returns False if there is no such notification."""
+        notification = self.notifications.get(notification_id)
+        if notification is None:
+            return False
+        notification.mark_as_read()
+        return True
     
     def get_notifications_by_user(self, user_id: int, unread_only: bool = False, priority = None):
-        from models.notifications import Notification, Priority
-        if isinstance(priority, Priority):
-            notifications = [n for n in self.notifications.values() if n.recipient_id == user_id]
-            if unread_only:
-                notifications = [n for n in notifications if not n.is_read]
-            if priority:
-                notifications = [n for n in notifications if n.priority == priority]
-            return notifications
+        """A recipient's notifications oldest first, optionally only unread ones and of one priority."""
+        if isinstance(priority, str):
+            priority = model_classes.Priority(priority)
+        inbox = self._inbox(user_id, create=False)
+        return inbox.query(unread_only, priority) if inbox is not None else []
+
+    def count_unread_notifications(self, user_id: int, priority = None) -> int:
+        """Number of unread notifications of a recipient, optionally of one priority."""
+        inbox = self._inbox(user_id, create=False)
+        return inbox.unread_count(priority) if inbox is not None else 0
+
+    def get_latest_notifications(self, user_id: int, limit: int = 20, before: int = None,
+                                 unread_only: bool = False, priority = None):
+        """
+        A recipient's newest notifications first, a page at a time.
+
+        Returns:
+            Tuple[List[Notification], Optional[int]]: The page and the cursor to pass
+            as before for the next one (None after the last page).
+        """
+        inbox = self._inbox(user_id, create=False)
+        if inbox is None:
+            return [], None
+        return inbox.newest(limit, before, unread_only, priority)
     
     def filter_notifications(self, unread_only: bool = False, priority = None):
         """Filter notifications based on read status and priority."""
-        from models.notifications import Notification, Priority
-        if isinstance(priority, Priority):
-            notifications = list(self.notifications.values())
-            if unread_only:
-                notifications = [n for n in notifications if not n.is_read]
-            if priority:
-                notifications = [n for n in notifications if n.priority == priority]
-            return notifications
+        notifications = list(self.notifications.values())
+        if unread_only:
+            notifications = [n for n in notifications if not n.is_read]
+        if priority:
+            notifications = [n for n in notifications if n.priority == priority]
+        return notifications
     
     def send_automatic_notification(self, recipient_id: int, priority):
-        from models.notifications import Notification, Priority
+        """
+        Remind a student of one of their assignments that is due within a day.
+
+        Sends one reminder per call; utils.reminders.DeadlineReminders sends
+        them to every student on its own.
+
+        Returns:
+            bool: Whether a reminder was sent.
+        """
         if not priority:
-            priority = Priority.HIGH
-        from core.student import Student
-        if isinstance(self.get_user(recipient_id),Student):
-            for assignment in self.assignments.values():
-                deadline = datetime.fromisoformat(assignment.deadline)
-                if assignment.deadline and deadline + timedelta(days =1) == datetime.now():
-                    notification = Notification(
-                        id=len(self.notifications) + 1,
+            priority = model_classes.Priority.HIGH
+        if isinstance(self.get_user(recipient_id),model_classes.Student):
+            now = datetime.now()
+            for assignment in self.get_assignments_by_student(recipient_id):
+                try:
+                    deadline = datetime.fromisoformat(assignment.deadline)
+                except (TypeError, ValueError):
+                    continue
+                if now < deadline <= now + timedelta(days=1):
+                    notification = model_classes.Notification(
+                        id=self.next_id("notifications"),
                         message= f"Reminder: Assignment '{assignment.title}' is due tomorrow.",
                         recipient_id=recipient_id,
                         created_at=datetime.now(),
@@ -82,16 +691,48 @@ class DataStorage:
                     )
                     notification.send(self)
                     return True
+        return False
     
     
     # Schedule Management
     def add_schedule(self, schedule):
         """Add a schedule to the storage."""
-        from models.schedule import Schedule
-        from models.notifications import Notification
-        if isinstance(schedule, Schedule):
+        if isinstance(schedule, model_classes.Schedule):
+            existed = schedule.id in self.schedules
+            if existed:
+                self._unindex_schedule(self.schedules[schedule.id])
             self.schedules[schedule.id] = schedule
-        Notification.notify_schedule_change(schedule, self)
+            self._index_schedule(schedule)
+            self._record_change("schedules", schedule.id, "update" if existed else "insert")
+            model_classes.Notification.notify_schedule_change(schedule, self)
+
+    def add_schedules(self, schedules) -> int:
+        """
+        Add many schedules at once, e.g. a generated timetable.
+
+        Unlike add_lesson, this does not check the lessons for conflicts (see
+        utils.validation.validate_timetable), and each class is notified once
+        rather than once per schedule.
+
+        Returns:
+            int: Number of schedules added or replaced.
+        """
+        changed = {}
+        added = 0
+        for schedule in schedules:
+            if not isinstance(schedule, model_classes.Schedule):
+                continue
+            added += 1
+            existed = schedule.id in self.schedules
+            if existed:
+                self._unindex_schedule(self.schedules[schedule.id])
+            self.schedules[schedule.id] = schedule
+            self._index_schedule(schedule)
+            self._record_change("schedules", schedule.id, "update" if existed else "insert")
+            changed.setdefault(schedule.class_id, schedule)
+        for schedule in changed.values():
+            model_classes.Notification.notify_schedule_change(schedule, self)
+        return added
 
     def get_schedule(self, schedule_id: int):
         """Retrieve a schedule by its ID."""
@@ -100,38 +741,89 @@ class DataStorage:
     def remove_schedule(self, schedule_id: int):
         """Remove a schedule by its ID."""
         if schedule_id in self.schedules:
-            del self.schedules[schedule_id]
+            self._unindex_schedule(self.schedules.pop(schedule_id))
+            self._record_change("schedules", schedule_id, "delete")
 
     def get_schedules_by_class(self, class_id: str):
         """Retrieve all schedules for a specific class."""
-        return [schedule for schedule in self.schedules.values() if schedule.class_id == class_id]
+        return [self.schedules[s_id] for s_id in self._index_lookup("schedules_by_class", class_id)]
 
     def get_schedules_by_teacher(self, teacher_id: int):
         """Retrieve all schedules for a specific teacher."""
-        return [schedule for schedule in self.schedules.values() if any(lesson["teacher_id"] == teacher_id for lesson in schedule.lessons.values())]
+        return [self.schedules[s_id] for s_id in self._index_lookup("schedules_by_teacher", teacher_id)]
+
+    def find_lesson_conflicts(self, day: str, time: str, class_id: str = None, teacher_id: int = None,
+                              exclude_schedule: int = None) -> List[Dict]:
+        """
+        Find stored lessons that overlap a time slot for a teacher or a class on a day.
+
+        Args:
+            day (str): Day of the week.
+            time (str): Time slot, 'HH:MM-HH:MM'.
+            class_id (str, optional): Class whose lessons are checked.
+            teacher_id (int, optional): Teacher whose lessons are checked.
+            exclude_schedule (int, optional): Schedule to leave out, e.g. the one being replaced.
+
+        Returns:
+            List[Dict]: One {"kind", "schedule_id", "time"} per clash; kind is "teacher" or "class".
+        """
+        conflicts = []
+        for kind, owner in (("teacher", teacher_id), ("class", class_id)):
+            slots = self._lesson_slots.get((kind, owner, day)) if owner is not None else None
+            if slots is None:
+                continue
+            for slot_time, schedule_id in slots.overlapping(time):
+                if schedule_id != exclude_schedule:
+                    conflicts.append({"kind": kind, "schedule_id": schedule_id, "time": slot_time})
+        return conflicts
+
+    def get_lessons_between(self, start: datetime, end: datetime, include_end: bool = False):
+        """
+        Lazily yield the dated lessons starting in [start, end), in time order.
+
+        Args:
+            start (datetime): Range start.
+            end (datetime): Range end.
+            include_end (bool): Include lessons starting exactly at end.
+
+        Yields:
+            Tuple[datetime, Schedule, str, Dict]: Lesson start, its schedule, time slot and lesson.
+        """
+        for starts_at, schedule_id, time in self._lesson_timeline.between(start, end, include_end):
+            schedule = self.schedules[schedule_id]
+            yield starts_at, schedule, time, schedule.lessons[time]
+
+    def get_schedules_between(self, start: datetime, end: datetime, include_end: bool = False):
+        """Lazily yield each schedule with a lesson starting in [start, end) once, by its first such lesson."""
+        seen = set()
+        for _, schedule, _, _ in self.get_lessons_between(start, end, include_end):
+            if schedule.id not in seen:
+                seen.add(schedule.id)
+                yield schedule
+
     def get_schedules_by_week(self, week_start: datetime, week_end: datetime):
-        """Retrieve all schedules that fall within a specific week."""
-        return [schedule for schedule in self.schedules.values() if any(
-            datetime.fromisoformat(lesson["time"]) >= week_start and datetime.fromisoformat(lesson["time"]) <= week_end
-            for lesson in schedule.lessons.values()
-        )]
-    
+        """Retrieve all schedules with a lesson between week_start and week_end (inclusive)."""
+        return list(self.get_schedules_between(week_start, week_end, include_end=True))
+
     def get_schedules_by_month(self, month: int, year: int):
-        """Retrieve all schedules that fall within a specific month."""
+        """Retrieve all schedules with a lesson in a specific month."""
         start_date = datetime(year, month, 1)
         end_date = datetime(year, month + 1, 1) if month < 12 else datetime(year + 1, 1, 1)
-        return [schedule for schedule in self.schedules.values() if any(
-            start_date <= datetime.fromisoformat(lesson["time"]) < end_date
-            for lesson in schedule.lessons.values()
-        )]
-    
+        return list(self.get_schedules_between(start_date, end_date))
+
     # Assignment management
 
     def add_assignment(self, assignment):
-        from models.assignments import Assignment
-        if isinstance(assignment, Assignment):
+        if isinstance(assignment, model_classes.Assignment):
+            existed = assignment.id in self.assignments
+            if existed:
+                old = self.assignments[assignment.id]
+                self._index_discard("assignments_by_class", old.class_id, old.id)
             self.assignments[assignment.id] = assignment
-        
+            self._index_add("assignments_by_class", assignment.class_id, assignment.id)
+            self._record_change("assignments", assignment.id, "update" if existed else "insert")
+            if self.reminders is not None:
+                self.reminders.schedule(assignment)
 
     def get_assignment(self, assignment_id: int) :
         return self.assignments.get(assignment_id)
@@ -139,47 +831,70 @@ class DataStorage:
     def remove_assignment(self, assignment_id: int):
         """Remove an assignment by its ID."""
         if assignment_id in self.assignments:
-            del self.assignments[assignment_id]
+            assignment = self.assignments.pop(assignment_id)
+            self._index_discard("assignments_by_class", assignment.class_id, assignment_id)
+            self._record_change("assignments", assignment_id, "delete")
+            if self.reminders is not None:
+                self.reminders.cancel(assignment_id)
 
     def get_assignments_by_class(self, class_id: str):
         """Retrieve all assignments for a specific class."""
-        return [assignment for assignment in self.assignments.values() if assignment.class_id == class_id]
+        return [self.assignments[a_id] for a_id in self._index_lookup("assignments_by_class", class_id)]
 
     def get_assignments_by_student(self, student_id: int):
         """Retrieve all assignments assigned to a specific student."""
-        from core.student import Student
         student = self.get_user(student_id)
-        if isinstance(student, Student):
+        if isinstance(student, model_classes.Student):
             return [self.assignments[assignment_id] for assignment_id in student.assignments.keys() if assignment_id in self.assignments]
         return []
     
     def assign_assignment_to_class(self, assignment_id: int, class_id: str) -> bool:
         """Assign an assignment to all students in a class."""
-        from core.student import Student
         if assignment_id not in self.assignments:
             return False
         student_ids = self.get_students_by_class(class_id)
         for student_id in student_ids:
             student = self.get_user(student_id)
-            if isinstance(student, Student):
+            if isinstance(student, model_classes.Student):
                 student.assignments[assignment_id] = {"status": "Pending", "content": ""}
+                self._record_change("users", student_id, "update")
         return True
     def update_user_assignments(self, user_id: int, assignments: Dict[int, Dict[str, str]]) -> bool:
-        from core.student import Student
         """Update the assignments dictionary for a user in storage."""
         user = self.get_user(user_id)
-        if isinstance(user, Student):
+        if isinstance(user, model_classes.Student):
             user.assignments = assignments
+            self._record_change("users", user_id, "update")
             return True
         return False
 
+    def submission_added(self, assignment, student_id: int):
+        """Called after a student's submission was added to a stored assignment."""
+        if self.assignments.get(assignment.id) is assignment:
+            self._record_change("assignments", assignment.id, "update")
+
+    def assignment_graded(self, assignment, student_id: int):
+        """Called after Assignment.set_grade updated the assignment and the student."""
+        if self.assignments.get(assignment.id) is assignment:
+            self._record_change("assignments", assignment.id, "update")
+        if student_id in self.users:
+            self._record_change("users", student_id, "update")
+
     # Grade management
 
     def add_grade(self, grade):
         """Add a grade to the storage."""
-        from models.grades import Grade
-        if isinstance(grade, Grade):
+        if isinstance(grade, model_classes.Grade):
+            existed = grade.id in self.grades
+            if existed:
+                self._unindex_grade(self.grades[grade.id])
+                self._unbind(self.grades[grade.id])
             self.grades[grade.id] = grade
+            self._index_grade(grade)
+            self._bind(grade)
+            self._record_change("grades", grade.id, "update" if existed else "insert")
+            if self.parent_alerts is not None:
+                self.parent_alerts.grade_stored(grade)
 
     def get_grade(self, grade_id: int):
         """Retrieve a grade by its ID."""
@@ -188,75 +903,42 @@ class DataStorage:
     def remove_grade(self, grade_id: int):
         """Remove a grade by its ID."""
         if grade_id in self.grades:
-            del self.grades[grade_id]
+            grade = self.grades.pop(grade_id)
+            self._unindex_grade(grade)
+            self._unbind(grade)
+            self._record_change("grades", grade_id, "delete")
 
     def get_grades_by_student(self, student_id: int, subject: str = None):
         """Retrieve all grades for a specific student, optionally filtered by subject."""
-        grades = [grade for grade in self.grades.values() if grade.student_id == student_id]
+        grades = [self.grades[g_id] for g_id in self._index_lookup("grades_by_student", student_id)]
         if subject:
             grades = [grade for grade in grades if grade.subject == subject]
         return grades
     
     def calculate_grade_statistics_by_student(self, student_id: int, subject: str = None) -> Dict[str, float]:
         """Calculate average, highest, and lowest grades for a student, optionally filtered by subject."""
-        grades = self.get_grades_by_student(student_id, subject)
-        if not grades:
-            return {"average": 0.0, "highest": 0.0, "lowest": 0.0}
-
-        grade_values = [grade.value for grade in grades]
-        average = sum(grade_values) / len(grade_values)
-        highest = max(grade_values)
-        lowest = min(grade_values)
-
-        return {
-            "average": round(average, 2),
-            "highest": float(highest),
-            "lowest": float(lowest)
-        }
+        if subject:
+            return self._grade_statistics(("student_subject", student_id, subject))
+        return self._grade_statistics(("student", student_id))
 
     def calculate_grade_statistics_by_class(self, class_id: str, subject: str = None) -> Dict[str, float]:
         """Calculate average, highest, and lowest grades for a class, optionally filtered by subject."""
-        student_ids = self.get_students_by_class(class_id)
-        all_grades = []
-        for student_id in student_ids:
-            grades = self.get_grades_by_student(student_id, subject)
-            all_grades.extend([grade.value for grade in grades])
-
-        if not all_grades:
-            return {"average": 0.0, "highest": 0.0, "lowest": 0.0}
-
-        average = sum(all_grades) / len(all_grades)
-        highest = max(all_grades)
-        lowest = min(all_grades)
-
-        return {
-            "average": round(average, 2),
-            "highest": float(highest),
-            "lowest": float(lowest)
-        }
+        if subject:
+            return self._grade_statistics(("class_subject", class_id, subject))
+        return self._grade_statistics(("class", class_id))
 
     def calculate_grade_statistics_by_subject(self, subject: str) -> Dict[str, float]:
         """Calculate average, highest, and lowest grades for a specific subject across all students."""
-        grades = [grade for grade in self.grades.values() if grade.subject == subject]
-        if not grades:
-            return {"average": 0.0, "highest": 0.0, "lowest": 0.0}
-
-        grade_values = [grade.value for grade in grades]
-        average = sum(grade_values) / len(grade_values)
-        highest = max(grade_values)
-        lowest = min(grade_values)
-
-        return {
-            "average": round(average, 2),
-            "highest": float(highest),
-            "lowest": float(lowest)
-        }
+        return self._grade_statistics(("subject", subject))
     
     # New Method for Viewing Student Progress
     def view_student_progress(self, student_id: int, subject: str = None) -> Dict:
         """
         View a student's academic progress, including grades, assignments, and statistics.
-        
+
+        Results are cached until a grade, submission or assignment of the student
+        changes through the storage; treat the returned dict as read-only.
+
         Args:
             student_id (int): ID of the student.
             subject (str, optional): Filter progress by subject (e.g., "Math").
@@ -264,37 +946,66 @@ class DataStorage:
         Returns:
             Dict: Summary of the student's progress, including grades, assignment status, and statistics.
         """
-        from core.student import Student
+        progress = self._progress_cache.get(student_id, subject)
+        if progress is None:
+            progress = self._student_progress(student_id, subject)
+            if "error" not in progress:
+                student = self.users[student_id]
+                self._progress_cache.put(student_id, subject, progress, student.assignments.keys())
+        return progress
+
+    def progress_cache_stats(self) -> Dict[str, int]:
+        """Hit, miss, eviction and invalidation counters of the view_student_progress cache."""
+        return self._progress_cache.stats()
+
+    def invalidate_progress(self, student_id: int = None):
+        """Drop cached progress of one student, or of everyone, after changes made behind the storage's back."""
+        if student_id is None:
+            self._progress_cache.clear()
+        else:
+            self._progress_cache.invalidate_student(student_id)
+
+    def _student_progress(self, student_id: int, subject: str = None, assignment_rows: Dict = None) -> Dict:
+        """
+        Build view_student_progress from the grades and assignments.
+
+        assignment_rows caches assignment ID -> (assignment, its row fields) and
+        can be shared between calls, so that a class report looks up and formats
+        each assignment once.
+        """
         student = self.get_user(student_id)
-        if not isinstance(student, Student):
+        if not isinstance(student, model_classes.Student):
             return {"error": "Student not found or invalid ID"}
+        if assignment_rows is None:
+            assignment_rows = {}
 
         # Get grades
         grades = self.get_grades_by_student(student_id, subject)
         grades_info = [grade.get_grade_info() for grade in grades]
 
         # Get assignments
-        assignments = self.get_assignments_by_student(student_id)
         assignment_status = []
-        total_assignments = 0
         submitted_assignments = 0
-        for assignment in assignments:
-            if subject and assignment.subject != subject:
+        for assignment_id, status in student.assignments.items():
+            row = assignment_rows.get(assignment_id)
+            if row is None:
+                assignment = self.get_assignment(assignment_id)
+                row = assignment_rows[assignment_id] = (assignment, None if assignment is None else {
+                    "assignment_id": assignment.id,
+                    "title": assignment.title,
+                    "subject": assignment.subject,
+                    "deadline": assignment.deadline,
+                })
+            assignment, fields = row
+            if assignment is None or (subject and assignment.subject != subject):
                 continue
-            total_assignments += 1
-            status = student.assignments.get(assignment.id, {"status": "Not Assigned", "content": ""})
             if status["status"] == "Submitted":
                 submitted_assignments += 1
-            assignment_status.append({
-                "assignment_id": assignment.id,
-                "title": assignment.title,
-                "subject": assignment.subject,
-                "deadline": assignment.deadline,
-                "status": status["status"],
-                "grade": assignment.grades.get(student_id, None)
-            })
+            assignment_status.append({**fields, "status": status["status"],
+                                      "grade": assignment.grades.get(student_id, None)})
 
         # Calculate completion rate
+        total_assignments = len(assignment_status)
         completion_rate = (submitted_assignments / total_assignments * 100) if total_assignments > 0 else 0.0
 
         # Get statistics
@@ -302,20 +1013,165 @@ class DataStorage:
 
         return {
             "student_id": student_id,
-            "full_name": student._full_name,
-            "class_id": student.grade,
+            "full_name": student.full_name,
+            "class_id": student.class_id,
             "grades": grades_info,
             "assignments": assignment_status,
             "completion_rate": round(completion_rate, 2),
             "statistics": stats
         }
-    
+
+    def view_class_progress(self, class_id: str, subject: str = None) -> Dict:
+        """
+        View the progress of every student of a class, with class-level rollups.
+
+        Each assignment is looked up and formatted once for the whole class, and
+        students whose progress is in the progress cache are not rebuilt, so a
+        report refreshed after a few changes only rebuilds the students affected.
+
+        Args:
+            class_id (str): The class.
+            subject (str, optional): Filter progress by subject (e.g., "Math").
+
+        Returns:
+            Dict: {"class_id", "subject", "student_count", "students": [view_student_progress
+            dicts], "average_completion_rate", "statistics", "assignments": [per assignment
+            {"assignment_id", "title", "subject", "deadline", "assigned", "submitted", "graded"}]}
+        """
+        students = [self.get_user(student_id) for student_id in self.get_students_by_class(class_id)]
+        return self._progress_report(class_id, students, subject, {})[0]
+
+    def view_school_progress(self, subject: str = None) -> Dict:
+        """
+        View the progress of every student, grouped by class, in a single pass.
+
+        Returns:
+            Dict: {"subject", "student_count", "average_completion_rate", "statistics",
+            "classes": {class_id: view_class_progress dict}}
+        """
+        return _school_report(subject, *self._school_progress_parts(subject))
+
+    def _school_progress_parts(self, subject: str = None):
+        """Class reports, their combined grade tally and summed completion rates, for _school_report."""
+        by_class = defaultdict(list)
+        for user in self.users.values():
+            if isinstance(user, model_classes.Student):
+                by_class[user.class_id].append(user)
+        assignment_rows = {}
+        classes = {}
+        school = [0, 0, None, None]
+        completion_total = 0.0
+        for class_id in sorted(by_class):
+            report, tally = self._progress_report(class_id, by_class[class_id], subject, assignment_rows)
+            classes[class_id] = report
+            _add_tally(school, *tally)
+            completion_total += sum(progress["completion_rate"] for progress in report["students"])
+        return classes, school, completion_total
+
+    def _progress_report(self, class_id: str, students, subject: str, assignment_rows: Dict):
+        """
+        Progress of a group of students and its rollups, as (report, [count, total, lowest,
+        highest] of their grades).
+
+        Students' progress comes from the progress cache where it is current, and
+        is built and cached otherwise.
+        """
+        cache = self._progress_cache
+        progress = []
+        group = [0, 0, None, None]
+        assignments = {}  # assignment ID -> [row fields, assigned, submitted, graded]
+        completion_total = 0.0
+        for student in students:
+            if not isinstance(student, model_classes.Student):
+                continue
+            entry = cache.get(student.id, subject) if cache is not None else None
+            if entry is None:
+                entry = self._student_progress(student.id, subject, assignment_rows)
+                if cache is not None:
+                    cache.put(student.id, subject, entry, student.assignments.keys())
+            progress.append(entry)
+            completion_total += entry["completion_rate"]
+            values = [grade["value"] for grade in entry["grades"]]
+            if values:
+                _add_tally(group, len(values), sum(values), min(values), max(values))
+            for row in entry["assignments"]:
+                tally = assignments.get(row["assignment_id"])
+                if tally is None:
+                    tally = assignments[row["assignment_id"]] = [row, 0, 0, 0]
+                tally[1] += 1
+                if row["status"] == "Submitted":
+                    tally[2] += 1
+                if row["grade"] is not None:
+                    tally[3] += 1
+
+        report = {
+            "class_id": class_id,
+            "subject": subject,
+            "student_count": len(progress),
+            "students": progress,
+            "average_completion_rate": round(completion_total / len(progress), 2) if progress else 0.0,
+            "statistics": summarize(*group),
+            "assignments": [
+                {"assignment_id": assignment_id, "title": row["title"], "subject": row["subject"],
+                 "deadline": row["deadline"], "assigned": assigned, "submitted": submitted, "graded": graded}
+                for assignment_id, (row, assigned, submitted, graded) in sorted(assignments.items())
+            ],
+        }
+        return report, group
+
     def add_parent_child(self, parent_id: int, child_id: int) -> bool:
         """Add a child to a parent's list of children."""
-        from core.parent import Parent
         parent = self.get_user(parent_id)
-        if isinstance(parent, Parent):
+        if isinstance(parent, model_classes.Parent):
             if child_id not in parent.children:
                 parent.children.append(child_id)
+                self._index_add("parents_by_child", child_id, parent_id)
+                self._record_change("users", parent_id, "update")
                 return True
-        return False
\ No newline at end of file
+        return False
+
+    def remove_parent_child(self, parent_id: int, child_id: int) -> bool:
+        """Remove a child from a parent's list of children."""
+        parent = self.get_user(parent_id)
+        if isinstance(parent, model_classes.Parent) and child_id in parent.children:
+            parent.children.remove(child_id)
+            self._index_discard("parents_by_child", child_id, parent_id)
+            self._record_change("users", parent_id, "update")
+            return True
+        return False
+
+    def get_parents_by_child(self, child_id: int) -> List[int]:
+        """Retrieve the IDs of the parents of a student."""
+        return list(self._index_lookup("parents_by_child", child_id))
+
+    # Export
+
+    @staticmethod
+    def export_row(table: str, obj) -> Dict:
+        """The export row of one object from one of EXPORT_TABLES."""
+        if table == "users":
+            return obj.get_profile()
+        if table in EXPORT_TABLES:
+            return obj.to_dict()
+        raise ValueError(f"Unknown export table: {table}")
+
+    def iter_export_rows(self, table: str, ids = None):
+        """
+        Yield the export rows of a table (or of the given IDs in it), one at a time.
+
+        The objects are listed up front, one reference each, so the storage can
+        change while the rows are read; the row dicts are built as they are yielded.
+        """
+        objects = getattr(self, table) if table in EXPORT_TABLES else None
+        if objects is None:
+            raise ValueError(f"Unknown export table: {table}")
+        if ids is None:
+            items = tuple(objects.values())
+        else:
+            items = tuple(objects[item_id] for item_id in ids if item_id in objects)
+        for obj in items:
+            yield self.export_row(table, obj)
+
+    def export_tables(self) -> Dict[str, Callable]:
+        """Streaming export input for DataExporter: table name -> callable returning a row iterator."""
+        return {table: partial(self.iter_export_rows, table) for table in EXPORT_TABLES}
\ No newline at end of file
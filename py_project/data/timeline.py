@@ -0,0 +1,73 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from data.intervals import parse_time_slot
+
+
+def lesson_start(day: str, time_slot: str, lesson: dict) -> Optional[datetime]:
+    """
+    When a lesson starts, or None for a weekly lesson that is not tied to a date.
+
+    A lesson is dated by an ISO datetime in lesson["time"], or by its schedule's
+    day being an ISO date, in which case it starts at the start of its time slot.
+    """
+    value = lesson.get("time") if isinstance(lesson, dict) else None
+    if value:
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+    try:
+        lesson_date = date.fromisoformat(day)
+    except (TypeError, ValueError):
+        return None
+    interval = parse_time_slot(time_slot)
+    start = datetime(lesson_date.year, lesson_date.month, lesson_date.day)
+    return start + timedelta(minutes=interval[0]) if interval else start
+
+
+class LessonTimeline:
+    """
+    Start times of dated lessons, sorted, with (schedule ID, time slot) of each.
+
+    Start times are parsed once, when a schedule is indexed, so a date-range
+    query is two binary searches and a slice of the entries in between.
+    """
+    __slots__ = ("_starts", "_refs")
+
+    def __init__(self):
+        self._starts: List[datetime] = []
+        self._refs: List[Tuple[int, str]] = []  # (schedule ID, time slot), parallel to _starts
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self):
+        return zip(self._starts, self._refs)
+
+    def add(self, start: datetime, schedule_id: int, time_slot: str):
+        pos = bisect_right(self._starts, start)
+        self._starts.insert(pos, start)
+        self._refs.insert(pos, (schedule_id, time_slot))
+
+    def remove(self, start: datetime, schedule_id: int, time_slot: str):
+        ref = (schedule_id, time_slot)
+        pos = bisect_left(self._starts, start)
+        while pos < len(self._starts) and self._starts[pos] == start:
+            if self._refs[pos] == ref:
+                del self._starts[pos]
+                del self._refs[pos]
+                return
+            pos += 1
+
+    def between(self, start: datetime, end: datetime, include_end: bool = False
+                ) -> Iterator[Tuple[datetime, int, str]]:
+        """
+        (start, schedule ID, time slot) of the lessons starting in [start, end),
+        or [start, end] with include_end, in time order.
+        """
+        lo = bisect_left(self._starts, start)
+        hi = (bisect_right if include_end else bisect_left)(self._starts, end)
+        for pos in range(lo, hi):
+            yield (self._starts[pos],) + self._refs[pos]
@@ -1,9 +1,14 @@
 from datetime import datetime
 from data.storage import DataStorage as storage
 from models.grades import Grade
+from models.notifications import Notification, Priority
 from core.student import Student
 from utils.validation import validate_class_id
+from utils.interning import intern_string
 class Assignment:
+    __slots__ = ("id", "title", "description", "deadline", "subject", "teacher_id", "class_id", "difficulty",
+                 "submissions", "grades")
+
     def __init__(self, id: int, title: str, description: str, deadline: str, subject: str, teacher_id: int, class_id: str,difficulty: str = "o'rta"):
         
         if not isinstance(id, int) or id <= 0:
@@ -24,46 +29,52 @@ class Assignment:
         self.title = title
         self.description = description
         self.deadline = deadline
-        self.subject = subject
+        self.subject = intern_string(subject)
         self.teacher_id = teacher_id
-        self.class_id = class_id
-        self.difficulty = difficulty
+        self.class_id = intern_string(class_id)
+        self.difficulty = intern_string(difficulty)
         self.submissions = {}
         self.grades = {}
 
-    def add_submission(self, student_id: int, content: str):
+    def add_submission(self, student_id: int, content: str, storage = None):
         
             self.submissions[student_id] = content
+            if storage is not None:
+                storage.submission_added(self, student_id)
            
     def set_grade(self,student_id: int, grade: int,storage: storage):
         if not isinstance(grade, int) or grade < 1 or grade > 5:
             return False
         if student_id in self.submissions:
-            self.grades[student_id] = grade 
-            if storage:
-                # Create a Grade object and store it
-                grade_obj = Grade(
-                    id=len(storage.grades) + 1,
-                    student_id=student_id,
-                    subject=self.subject,
-                    value=grade,
-                    date=datetime.now(),
-                    teacher_id=self.teacher_id
-                )
-                storage.add_grade(grade_obj)
-            student = storage.get_user(student_id)
-            if isinstance(student, Student):
-                student.grades[self.subject] = grade
-                student.assignments[self.id] = self.title
-                # Notify the student about the new grade
-                notification_message = f"Your assignment '{self.title}' has been graded with {grade}."
-                notification = {
-                    "message": notification_message,
-                    "recipient_id": student_id,
-                    "created_at": datetime.now().isoformat(),
-                    "priority": "Medium"
-                }
-                student.add_notification(notification)
+            with storage.batch():
+                self.grades[student_id] = grade 
+                if storage:
+                    # Create a Grade object and store it
+                    grade_obj = Grade(
+                        id=storage.next_id("grades"),
+                        student_id=student_id,
+                        subject=self.subject,
+                        value=grade,
+                        date=datetime.now(),
+                        teacher_id=self.teacher_id
+                    )
+                    storage.add_grade(grade_obj)
+                student = storage.get_user(student_id)
+                if isinstance(student, Student):
+                    student.grades[self.subject] = grade
+                    if not isinstance(student.assignments.get(self.id), dict):
+                        student.assignments[self.id] = {"status": "Submitted", "content": self.submissions[student_id]}
+                    # Notify the student about the new grade
+                    notification_message = f"Your assignment '{self.title}' has been graded with {grade}."
+                    notification = Notification(
+                        id=storage.next_id("notifications"),
+                        message=notification_message,
+                        recipient_id=student_id,
+                        created_at=datetime.now().isoformat(),
+                        priority=Priority.MEDIUM
+                    )
+                    notification.send(storage)
+                storage.assignment_graded(self, student_id)
 
             return True   
             return True
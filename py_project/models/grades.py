@@ -1,6 +1,10 @@
 from datetime import datetime
 from data.storage import DataStorage as storage
-class Grade:
+from utils.interning import intern_string
+from data.records import Stored
+class Grade(Stored):
+    __slots__ = ("id", "student_id", "subject", "value", "date", "teacher_id", "comments")
+
     def __init__(self,id: int, student_id: int, subject: str, value: int, date: datetime, teacher_id: int, comments: list = []):
         
         if not isinstance(id, int) or id <= 0:
@@ -17,7 +21,7 @@ class Grade:
         
         self.id = id
         self.student_id = student_id
-        self.subject = subject
+        self.subject = intern_string(subject)
         if value <= 5 and value >= 1:
             self.value = value
         self.date = date.isoformat()
@@ -26,7 +30,15 @@ class Grade:
 
     def update_grade(self, new_value: int, comment: str = None) -> bool:
         if new_value <= 5 and new_value >= 1:
-            self.value = new_value
+            # The storage the grade was added to keeps its aggregates in step.
+            storage = self._owner()
+            if storage is None:
+                self.value = new_value
+                return True
+            with storage.batch():
+                old_value = self.value
+                self.value = new_value
+                storage.grade_value_changed(self, old_value)
             return True
         if comment is not None:
             self.comments.append(comment)
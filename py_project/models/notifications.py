@@ -1,5 +1,7 @@
 from datetime import datetime
 from enum import Enum
+from typing import Iterable, List
+from data.records import Stored
 from data.storage import DataStorage as storage
 from models.schedule import Schedule
 class Priority(Enum):
@@ -7,7 +9,9 @@ class Priority(Enum):
     MEDIUM = "Medium"
     HIGH = "High"
 
-class Notification:
+class Notification(Stored):
+    __slots__ = ("id", "message", "recipient_id", "created_at", "priority", "is_read")
+
     def __init__(self, id : int, message: str, recipient_id: int, created_at= datetime.now().isoformat(), priority: Priority = Priority.MEDIUM, is_read: bool = False): 
         self.id = id
         self.message = message
@@ -17,15 +21,27 @@ class Notification:
         self.is_read = is_read
 
     def mark_as_read(self):
-        self.is_read = True
+        # The storage the notification was added to keeps the recipient's inbox in step.
+        storage = self._owner()
+        if storage is None:
+            self.is_read = True
+            return
+        with storage.batch():
+            self.is_read = True
+            storage.notification_read(self)
     
     def send(self,storage):
-        storage.add_notification(self)
-        user = storage.get_user(self.recipient_id)
-        if user:
-            user.add_notification(self)
+        if storage.dispatcher is not None:
+            # Delivered later by the dispatcher's workers.
+            storage.dispatcher.submit(self)
             return True
-        return False
+        with storage.batch():
+            storage.add_notification(self)
+            user = storage.get_user(self.recipient_id)
+            if user:
+                user.add_notification(self)
+                return True
+            return False
     
     
     def to_dict(self):
@@ -38,13 +54,35 @@ class Notification:
             "priority": self.priority.value
         }
     
-    def notify_schedule_change(self, schedule: Schedule, storage: storage):
-        student_ids = storage.get_students_by_class(schedule.class_id)
-        for student_id in student_ids:
-            notification = Notification(
-                id=len(storage.notifications) + 1,
-                message=f"New schedule added for class {schedule.class_id}",
-                recipient_id=student_id,
-                priority=Priority.MEDIUM
-            )
-            notification.send(storage)
\ No newline at end of file
+    @classmethod
+    def broadcast(cls, recipient_ids: Iterable[int], message: str, storage: storage,
+                  priority: Priority = Priority.MEDIUM) -> List["Notification"]:
+        """
+        Send the same message to many recipients.
+
+        The IDs are reserved from the storage as one block and all
+        notifications are stored and delivered with one storage call (or
+        queued, if the storage has a dispatcher).
+
+        Returns:
+            List[Notification]: The sent notifications, one per recipient.
+        """
+        recipient_ids = list(recipient_ids)
+        created_at = datetime.now().isoformat()
+        ids = storage.reserve_ids("notifications", len(recipient_ids))
+        notifications = [
+            cls(notification_id, message, recipient_id, created_at, priority)
+            for notification_id, recipient_id in zip(ids, recipient_ids)
+        ]
+        storage.dispatch(notifications)
+        return notifications
+
+    @staticmethod
+    def notify_schedule_change(schedule: Schedule, storage: storage) -> List["Notification"]:
+        """Tell every student of the schedule's class about it."""
+        return Notification.broadcast(
+            storage.get_students_by_class(schedule.class_id),
+            f"New schedule added for class {schedule.class_id}",
+            storage,
+            priority=Priority.MEDIUM
+        )
\ No newline at end of file
@@ -1,25 +1,36 @@
 from datetime import datetime
 from data.storage import DataStorage as storage
 from utils.validation import validate_class_id, validate_time_slot, check_schedule_conflict
+from utils.interning import intern_string
 class Schedule:
+    __slots__ = ("id", "class_id", "day", "lessons")
+
     def __init__(self, id: int, class_id: str, day: str):
         self.id = id
-        self.class_id = class_id
-        self.day = day
+        self.class_id = intern_string(class_id)
+        self.day = intern_string(day)
         self.lessons = {} # (lug‘at: {time: {subject, teacher_id}})
 
     def add_lesson(self, time: str, subject: str, teacher_id: int, storage = storage()):
         """Add a lesson to the schedule with conflict checking."""
-        if check_schedule_conflict(self.lessons, time, self.class_id, self.day, teacher_id, storage):
-            raise ValueError(f"Conflict: Teacher {teacher_id} or class {self.class_id} already has a lesson at {time} on {self.day}")
-        if time not in self.lessons:
-            self.lessons[time] = {}
-            self.lessons[time]['subject'] = subject
-            self.lessons[time]['teacher_id'] = teacher_id
+        with storage.batch():
+            if check_schedule_conflict(self.lessons, time, self.class_id, self.day, teacher_id, storage):
+                raise ValueError(f"Conflict: Teacher {teacher_id} or class {self.class_id} already has a lesson at {time} on {self.day}")
+            if time not in self.lessons:
+                time = intern_string(time)
+                self.lessons[time] = {}
+                self.lessons[time]['subject'] = intern_string(subject)
+                self.lessons[time]['teacher_id'] = teacher_id
+                storage.reindex_schedule(self)
 
-    def remove_lesson(self, time: str):
-        if time in self.lessons:
-            del self.lessons[time]
+    def remove_lesson(self, time: str, storage = None):
+        if storage is None:
+            self.lessons.pop(time, None)
+            return
+        with storage.batch():
+            if time in self.lessons:
+                del self.lessons[time]
+                storage.reindex_schedule(self)
     
     def view_schedule(self):
         schedule = {
@@ -29,4 +40,7 @@ class Schedule:
             'lessons': self.lessons
         }
         return schedule
+
+    def to_dict(self):
+        return self.view_schedule()
     
\ No newline at end of file
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules import each other from the py_project directory (``from data.storage import ...``).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,66 @@
+import random
+from datetime import datetime
+
+from core.student import Student
+from data.aggregates import EMPTY_STATISTICS, GradeAggregate
+from data.storage import DataStorage
+from models.grades import Grade
+
+
+def brute_force(grades):
+    values = [grade.value for grade in grades]
+    if not values:
+        return dict(EMPTY_STATISTICS)
+    return {"average": round(sum(values) / len(values), 2), "highest": float(max(values)),
+            "lowest": float(min(values))}
+
+
+def test_aggregate_keeps_min_and_max_after_removals():
+    aggregate = GradeAggregate()
+    for value in (2, 5, 5, 3):
+        aggregate.add(value)
+    aggregate.remove(5)
+    assert aggregate.statistics() == {"average": 3.33, "highest": 5.0, "lowest": 2.0}
+    aggregate.remove(5)
+    aggregate.remove(2)
+    assert aggregate.statistics() == {"average": 3.0, "highest": 3.0, "lowest": 3.0}
+    aggregate.remove(3)
+    assert aggregate.statistics() == EMPTY_STATISTICS
+
+
+def test_statistics_match_a_full_scan_after_random_changes():
+    rng = random.Random(0)
+    storage = DataStorage()
+    for student_id in range(1, 11):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x",
+                                 "9-A" if student_id <= 5 else "9-B"))
+    for step in range(400):
+        grade_id = rng.randint(1, 60)
+        action = rng.random()
+        if action < 0.5:
+            storage.add_grade(Grade(grade_id, rng.randint(1, 10), rng.choice(("Math", "Physics")),
+                                    rng.randint(1, 5), datetime(2025, 1, 1), 100))
+        elif action < 0.8 and grade_id in storage.grades:
+            storage.grades[grade_id].update_grade(rng.randint(1, 5))
+        else:
+            storage.remove_grade(grade_id)
+
+    grades = list(storage.grades.values())
+    for student_id in range(1, 11):
+        assert storage.calculate_grade_statistics_by_student(student_id) == brute_force(
+            [g for g in grades if g.student_id == student_id])
+    for class_id, students in (("9-A", range(1, 6)), ("9-B", range(6, 11))):
+        assert storage.calculate_grade_statistics_by_class(class_id, "Math") == brute_force(
+            [g for g in grades if g.student_id in students and g.subject == "Math"])
+    assert storage.calculate_grade_statistics_by_subject("Physics") == brute_force(
+        [g for g in grades if g.subject == "Physics"])
+    assert storage.verify_indexes() == []
+
+
+def test_moving_a_student_moves_their_grades_between_classes():
+    storage = DataStorage()
+    storage.add_user(Student(1, "Student", "s@school.uz", "x", "9-A"))
+    storage.add_grade(Grade(1, 1, "Math", 4, datetime(2025, 1, 1), 100))
+    storage.add_user(Student(1, "Student", "s@school.uz", "x", "9-B"))
+    assert storage.calculate_grade_statistics_by_class("9-A") == EMPTY_STATISTICS
+    assert storage.calculate_grade_statistics_by_class("9-B")["average"] == 4.0
@@ -0,0 +1,51 @@
+from core.student import Student
+from core.teacher import Teacher
+from data.sqlite_storage import SQLiteStorage
+from data.storage import DataStorage
+from utils import auth
+from utils.auth import authenticate_user, hash_password
+
+
+def make_storage(storage=None):
+    storage = storage if storage is not None else DataStorage()
+    storage.add_user(Student(1, "Student", "s@school.uz", hash_password("secret"), "9-A"))
+    storage.add_user(Teacher(2, "Teacher", "t@school.uz", hash_password("chalk")))
+    return storage
+
+
+def test_login_by_email_and_password():
+    storage = make_storage()
+    assert authenticate_user("s@school.uz", "secret", storage) == (1, "Student")
+    assert authenticate_user("t@school.uz", "chalk", storage) == (2, "Teacher")
+    assert authenticate_user("s@school.uz", "chalk", storage) is None
+    assert authenticate_user("nobody@school.uz", "secret", storage) is None
+
+
+def test_password_is_hashed_once_per_login(monkeypatch):
+    storage = make_storage()
+    for user_id in range(3, 100):
+        storage.add_user(Student(user_id, "Student", f"s{user_id}@school.uz", "x", "9-A"))
+    calls = []
+    monkeypatch.setattr(auth, "hash_password", lambda password: calls.append(password) or hash_password(password))
+    assert authenticate_user("s@school.uz", "secret", storage) == (1, "Student")
+    assert calls == ["secret"]
+
+
+def test_index_follows_removed_users():
+    storage = make_storage()
+    storage.remove_user(1)
+    assert authenticate_user("s@school.uz", "secret", storage) is None
+
+
+def test_a_directly_assigned_email_does_not_log_in_under_the_old_address():
+    storage = make_storage()
+    storage.get_user(1).email = "changed@school.uz"
+    assert authenticate_user("s@school.uz", "secret", storage) is None
+
+
+def test_login_against_sqlite_storage(tmp_path):
+    with SQLiteStorage(str(tmp_path / "school.db")) as storage:
+        make_storage(storage)
+        storage.get_user(1).update_profile(email="new@school.uz")
+        assert authenticate_user("new@school.uz", "secret", storage) == (1, "Student")
+        assert authenticate_user("s@school.uz", "secret", storage) is None
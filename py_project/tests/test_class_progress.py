@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+from core.student import Student
+from data.sqlite_storage import SQLiteStorage
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+
+
+def fill(storage):
+    for student_id, class_id in ((1, "9-A"), (2, "9-A"), (3, "9-B")):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", class_id))
+    storage.add_assignment(Assignment(1, "Essay", "", "2025-01-10", "Math", 100, "9-A"))
+    storage.add_assignment(Assignment(2, "Lab", "", "2025-01-12", "Physics", 101, "9-A"))
+    storage.assign_assignment_to_class(1, "9-A")
+    storage.assign_assignment_to_class(2, "9-A")
+    storage.get_user(1).submit_assignment(1, "done", storage)
+    storage.get_assignment(1).set_grade(1, 5, storage)
+    storage.add_grade(Grade(10, 2, "Math", 2, datetime(2025, 1, 1), 100))
+    storage.add_grade(Grade(11, 3, "Physics", 3, datetime(2025, 1, 1), 101))
+    return storage
+
+
+@pytest.fixture(params=[DataStorage, SQLiteStorage])
+def storage(request, tmp_path):
+    if request.param is DataStorage:
+        yield fill(DataStorage())
+    else:
+        storage = fill(SQLiteStorage(str(tmp_path / "school.db")))
+        yield storage
+        storage.close()
+
+
+def test_class_report_rolls_up_the_students(storage):
+    report = storage.view_class_progress("9-A")
+    assert report["student_count"] == 2
+    assert report["students"] == [storage.view_student_progress(1), storage.view_student_progress(2)]
+    assert report["statistics"] == {"average": 3.5, "highest": 5.0, "lowest": 2.0}
+    assert report["average_completion_rate"] == 25.0
+    assert [(row["assignment_id"], row["assigned"], row["submitted"], row["graded"])
+            for row in report["assignments"]] == [(1, 2, 1, 1), (2, 2, 0, 0)]
+
+
+def test_class_report_filters_by_subject(storage):
+    report = storage.view_class_progress("9-A", "Physics")
+    assert report["statistics"]["average"] == 0
+    assert [row["assignment_id"] for row in report["assignments"]] == [2]
+    assert storage.view_class_progress("10-C")["student_count"] == 0
+
+
+def test_school_report_matches_the_class_reports(storage):
+    school = storage.view_school_progress()
+    assert sorted(school["classes"]) == ["9-A", "9-B"]
+    for class_id, report in school["classes"].items():
+        assert report == storage.view_class_progress(class_id)
+    assert school["student_count"] == 3
+    assert school["statistics"] == {"average": 3.33, "highest": 5.0, "lowest": 2.0}
+    assert school["average_completion_rate"] == round(25.0 * 2 / 3, 2)
+
+
+def test_class_report_sees_changes_made_after_it(storage):
+    storage.view_class_progress("9-A")
+    storage.get_user(2).submit_assignment(2, "done", storage)
+    report = storage.view_class_progress("9-A")
+    assert report["students"][1] == storage._student_progress(2)
+    assert [row["submitted"] for row in report["assignments"]] == [1, 1]
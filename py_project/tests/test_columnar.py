@@ -0,0 +1,83 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.student import Student
+from data.columnar import ColumnarGradeStore
+from data.storage import DataStorage
+from models.grades import Grade
+
+
+def percentile(values, p):
+    values = sorted(values)
+    position = (len(values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+@pytest.fixture
+def storage():
+    rng = random.Random(1)
+    storage = DataStorage()
+    for student_id in range(1, 21):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x",
+                                 "9-A" if student_id % 2 else "9-B"))
+    start = datetime(2025, 1, 1)
+    for grade_id in range(1, 501):
+        storage.add_grade(Grade(grade_id, rng.randint(1, 20), rng.choice(("Math", "Physics", "History")),
+                                rng.randint(1, 5), start + timedelta(hours=rng.randint(0, 24 * 30)),
+                                rng.randint(100, 103)))
+    return storage
+
+
+def test_statistics_match_the_storage(storage):
+    store = ColumnarGradeStore.from_storage(storage)
+    assert len(store) == 500
+    for student_id in (1, 7, 20):
+        assert store.calculate_grade_statistics_by_student(student_id, "Math") == \
+            storage.calculate_grade_statistics_by_student(student_id, "Math")
+    for class_id in ("9-A", "9-B"):
+        assert store.calculate_grade_statistics_by_class(class_id) == storage.calculate_grade_statistics_by_class(class_id)
+    assert store.calculate_grade_statistics_by_subject("History") == \
+        storage.calculate_grade_statistics_by_subject("History")
+
+
+def test_group_stats_match_a_scan(storage):
+    store = ColumnarGradeStore.from_storage(storage)
+    start, end = datetime(2025, 1, 5), datetime(2025, 1, 20)
+    stats = store.group_stats("teacher", start=start, end=end, subject="Physics")
+    expected = {}
+    for grade in storage.grades.values():
+        if grade.subject == "Physics" and start <= datetime.fromisoformat(grade.date) < end:
+            expected.setdefault(grade.teacher_id, []).append(grade.value)
+    assert set(stats) == set(expected)
+    for teacher_id, values in expected.items():
+        assert stats[teacher_id]["count"] == len(values)
+        assert stats[teacher_id]["mean"] == pytest.approx(sum(values) / len(values))
+        assert stats[teacher_id]["percentiles"][25] == pytest.approx(percentile(values, 25))
+        assert stats[teacher_id]["percentiles"][75] == pytest.approx(percentile(values, 75))
+    days = store.group_stats("date", percentiles=())
+    assert sum(day["count"] for day in days.values()) == 500
+
+
+def test_removal_keeps_the_rows_consistent(storage):
+    store = ColumnarGradeStore.from_storage(storage)
+    for grade_id in range(1, 501, 3):
+        store.remove_grade(grade_id)
+        storage.remove_grade(grade_id)
+    store.get_grade(2).update_grade(5)
+    storage.get_grade(2).update_grade(5)
+    for student_id in range(1, 21):
+        assert sorted(g.id for g in store.get_grades_by_student(student_id)) == \
+            sorted(g.id for g in storage.get_grades_by_student(student_id))
+    assert store.group_stats("subject", percentiles=())["Math"]["count"] == \
+        sum(1 for g in storage.grades.values() if g.subject == "Math")
+
+
+def test_group_stats_rejects_unknown_groupings():
+    with pytest.raises(ValueError):
+        ColumnarGradeStore().group_stats("week")
+    with pytest.raises(ValueError):
+        ColumnarGradeStore().group_stats("class")
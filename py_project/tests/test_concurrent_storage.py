@@ -0,0 +1,154 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from core.student import Student
+from data.concurrent_storage import ConcurrentStorage
+from data.rwlock import RWLock
+from models.assignments import Assignment
+from models.grades import Grade
+
+
+def test_readers_share_the_lock():
+    lock = RWLock()
+    inside = threading.Barrier(3, timeout=5)
+
+    def read():
+        with lock.read():
+            inside.wait()
+
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    inside.wait()
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_waiting_writer_goes_before_new_readers():
+    lock = RWLock()
+    order = []
+    lock.acquire_read()
+
+    def write():
+        with lock.write():
+            order.append("write")
+
+    def read():
+        with lock.read():
+            order.append("read")
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not lock._writers_waiting:
+        pass
+    reader = threading.Thread(target=read)
+    reader.start()
+    reader.join(0.1)
+    assert order == []
+    lock.release_read()
+    writer.join(5)
+    reader.join(5)
+    assert order == ["write", "read"]
+
+
+def test_lock_is_reentrant_and_a_writer_may_read():
+    lock = RWLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                assert lock.held()
+        assert lock.held()
+    assert not lock.held()
+    with lock.read():
+        with lock.read():
+            pass
+        assert lock.held()
+    assert not lock.held()
+
+
+def test_reader_cannot_upgrade():
+    lock = RWLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+    with lock.write():
+        pass
+
+
+def make_storage(students=20):
+    storage = ConcurrentStorage()
+    for student_id in range(1, students + 1):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+    storage.add_assignment(Assignment(1, "Essay", "", "2025-01-10", "Math", 100, "9-A"))
+    storage.assign_assignment_to_class(1, "9-A")
+    return storage
+
+
+def test_concurrent_grading_gets_unique_ids():
+    storage = make_storage()
+
+    def work(student_id):
+        student = storage.get_user(student_id)
+        student.submit_assignment(1, "done", storage)
+        storage.get_assignment(1).set_grade(student_id, 1 + student_id % 5, storage)
+        storage.add_grade(Grade(storage.next_id("grades"), student_id, "Physics", 3, datetime(2025, 1, 1), 101))
+        return storage.view_student_progress(student_id)
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(work, range(1, 21)))
+    assert len(storage.grades) == 40
+    assert sorted(storage.grades) == list(range(1, 41))
+    assert storage.verify_indexes() == []
+    for student_id in range(1, 21):
+        assert storage.view_student_progress(student_id) == storage._student_progress(student_id)
+        assert storage.get_user(student_id).assignments[1]["status"] == "Submitted"
+
+
+def test_reserved_ranges_do_not_overlap():
+    storage = ConcurrentStorage()
+    with ThreadPoolExecutor(8) as pool:
+        ranges = list(pool.map(lambda _: storage.reserve_ids("notifications", 10), range(50)))
+    ids = [item_id for reserved in ranges for item_id in reserved]
+    assert len(set(ids)) == 500
+
+
+def test_readers_never_see_half_a_batch():
+    storage = make_storage(students=2)
+    stop = threading.Event()
+    torn = []
+
+    def write():
+        for _ in range(200):
+            with storage.batch():
+                for student_id in (1, 2):
+                    student = storage.get_user(student_id)
+                    student.assignments[1] = {"status": "Submitted" if student.assignments[1]["status"] == "Pending"
+                                              else "Pending", "content": ""}
+        stop.set()
+
+    def read():
+        while not stop.is_set():
+            with storage.read_lock():
+                statuses = {storage.get_user(student_id).assignments[1]["status"] for student_id in (1, 2)}
+            if len(statuses) != 1:
+                torn.append(statuses)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    write()
+    for reader in readers:
+        reader.join(5)
+    assert torn == []
+
+
+def test_generator_methods_return_collected_results():
+    storage = make_storage(students=3)
+    rows = storage.iter_export_rows("users")
+    storage.add_user(Student(4, "Student 4", "s4@school.uz", "x", "9-A"))
+    assert len(list(rows)) == 3
+    assert not storage.lock_held()
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+
+from core.student import Student
+from data.concurrent_storage import ConcurrentStorage
+from data.storage import DataStorage
+from models.notifications import Notification, Priority
+from models.schedule import Schedule
+from utils.dispatch import NotificationDispatcher
+
+
+def make_storage(cls=DataStorage, students=5):
+    storage = cls()
+    for student_id in range(1, students + 1):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+    return storage
+
+
+def make_schedule(schedule_id=1):
+    schedule = Schedule(schedule_id, "9-A", "Monday")
+    schedule.lessons["08:00-08:45"] = {"subject": "Math", "teacher_id": 100}
+    return schedule
+
+
+def test_flush_without_workers_delivers_on_the_calling_thread():
+    storage = make_storage()
+    dispatcher = NotificationDispatcher(storage)
+    Notification(1, "hello", 1).send(storage)
+    assert not storage.notifications
+    assert dispatcher.flush()
+    assert storage.get_notifications_by_user(1)[0].message == "hello"
+    dispatcher.close()
+
+
+def test_block_policy_does_not_deadlock_under_the_storage_write_lock():
+    storage = make_storage(ConcurrentStorage)
+    dispatcher = NotificationDispatcher(storage, max_queue=1, workers=1).start()
+    try:
+        thread = threading.Thread(target=storage.add_schedule, args=(make_schedule(),))
+        thread.start()
+        thread.join(5)
+        assert not thread.is_alive()
+        assert dispatcher.flush(5)
+        metrics = dispatcher.metrics()
+        assert metrics["delivered"] == 5
+        assert metrics["over_limit"] > 0
+        assert len(storage.notifications) == 5
+    finally:
+        dispatcher.close()
+
+
+def test_block_policy_does_not_deadlock_under_storage_lock():
+    storage = make_storage()
+    dispatcher = NotificationDispatcher(storage, max_queue=1, workers=1).start()
+    try:
+        def add():
+            with dispatcher.storage_lock:
+                storage.add_schedule(make_schedule())
+
+        thread = threading.Thread(target=add)
+        thread.start()
+        thread.join(5)
+        assert not thread.is_alive()
+        assert dispatcher.flush(5)
+        assert len(storage.notifications) == 5
+    finally:
+        dispatcher.close()
+
+
+def test_drop_low_policy_drops_lower_priority_first():
+    storage = make_storage()
+    dispatcher = NotificationDispatcher(storage, max_queue=2, policy="drop_low")
+    dispatcher.submit([Notification(1, "low", 1, priority=Priority.LOW),
+                       Notification(2, "medium", 1, priority=Priority.MEDIUM),
+                       Notification(3, "high", 1, priority=Priority.HIGH),
+                       Notification(4, "low again", 1, priority=Priority.LOW)])
+    dispatcher.flush()
+    assert sorted(storage.notifications) == [2, 3]
+    assert dispatcher.metrics()["dropped"] == 2
+    dispatcher.close()
+
+
+def test_spill_policy_keeps_every_notification():
+    storage = make_storage()
+    dispatcher = NotificationDispatcher(storage, max_queue=2, policy="spill")
+    dispatcher.submit([Notification(notification_id, "n", 1) for notification_id in range(1, 11)])
+    assert dispatcher.metrics()["spilled"] == 8
+    dispatcher.flush()
+    assert sorted(storage.notifications) == list(range(1, 11))
+    dispatcher.close()
+
+
+def test_higher_priorities_are_delivered_first():
+    storage = make_storage()
+    dispatcher = NotificationDispatcher(storage, batch_size=1)
+    dispatcher.submit([Notification(1, "low", 1, priority=Priority.LOW),
+                       Notification(2, "medium", 1, priority=Priority.MEDIUM),
+                       Notification(3, "high", 1, priority=Priority.HIGH)])
+    assert dispatcher.metrics()["queue_depth_by_priority"] == {"High": 1, "Medium": 1, "Low": 1}
+    dispatcher.flush()
+    assert list(storage.notifications) == [3, 2, 1]
+    metrics = dispatcher.metrics()
+    assert metrics["queue_depth"] == 0 and metrics["delivered"] == 3
+    dispatcher.close()
+
+
+def test_serve_delivers_from_an_asyncio_task():
+    storage = make_storage()
+    dispatcher = NotificationDispatcher(storage)
+
+    async def run():
+        task = asyncio.create_task(dispatcher.serve(poll_interval=0.001))
+        Notification.broadcast(range(1, 6), "hello", storage)
+        while dispatcher.metrics()["delivered"] < 5:
+            await asyncio.sleep(0.001)
+        task.cancel()
+
+    asyncio.run(run())
+    assert storage.count_unread_notifications(3) == 1
+    dispatcher.close()
+
+
+def test_workers_and_writers_share_a_concurrent_storage():
+    storage = make_storage(ConcurrentStorage, students=20)
+    dispatcher = NotificationDispatcher(storage, max_queue=8, workers=2).start()
+
+    def write(first_id):
+        for schedule_id in range(first_id, first_id + 10):
+            storage.add_schedule(make_schedule(schedule_id))
+
+    threads = [threading.Thread(target=write, args=(first_id,)) for first_id in (1, 101)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert dispatcher.flush(10)
+    dispatcher.close()
+    assert len(storage.notifications) == 20 * 20
+    assert storage.verify_indexes() == []
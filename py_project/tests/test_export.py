@@ -0,0 +1,148 @@
+import csv
+import os
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from core.student import Student
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+from utils.export import DataExporter, export_changes, load_watermark, save_watermark
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = DataStorage()
+    for student_id in range(1, 6):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+    for grade_id in range(1, 4):
+        storage.add_grade(Grade(grade_id, grade_id, "Math", 4, datetime(2025, 1, 1), 10))
+    storage.add_assignment(Assignment(1, "HW", "Read", "2025-06-15T23:59:00", "Math", 10, "9-A"))
+    return storage
+
+
+def exported(pattern):
+    return sorted(name for name in os.listdir("exports") if pattern in name)
+
+
+def test_first_export_is_full_and_saves_the_watermark(storage):
+    assert export_changes(storage, "csv")
+    assert exported("_full_users.csv")
+    assert load_watermark(os.path.join("exports", "watermark.json"), storage.epoch) == storage.version
+
+
+def test_delta_csv_holds_only_changed_rows_and_tombstones(storage):
+    assert export_changes(storage, "csv")
+    storage.remove_grade(2)
+    storage.grades[3].update_grade(5)
+    assert export_changes(storage, "csv")
+
+    with open(os.path.join("exports", exported("_delta_grades.csv")[0]), newline="") as f:
+        assert [row["id"] for row in csv.DictReader(f)] == ["3"]
+    with open(os.path.join("exports", exported("_delta_deleted.csv")[0]), newline="") as f:
+        assert list(csv.DictReader(f)) == [{"table": "grades", "id": "2"}]
+
+
+def test_sql_delta_keeps_tombstones_with_the_same_id_and_the_full_database(storage):
+    assert export_changes(storage, "sql")
+    full_db = os.path.join("exports", exported("_full_eduplatform.db")[0])
+    storage.remove_grade(1)
+    storage.remove_user(1)
+    storage.remove_assignment(1)
+    assert export_changes(storage, "sql")
+
+    with sqlite3.connect(os.path.join("exports", exported("_delta_eduplatform.db")[0])) as conn:
+        rows = conn.execute('SELECT "table", "id" FROM "deleted" ORDER BY "table"').fetchall()
+    assert rows == [("assignments", 1), ("grades", 1), ("users", 1)]
+    with sqlite3.connect(full_db) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM "users"').fetchone()[0] == 5
+
+
+def test_new_epoch_falls_back_to_a_full_export(storage):
+    assert export_changes(storage, "csv")
+    storage.epoch = "restarted"
+    storage.remove_grade(1)
+    assert export_changes(storage, "csv")
+    assert not exported("_delta_")
+    with open(os.path.join("exports", exported("_full_grades.csv")[-1]), newline="") as f:
+        assert [row["id"] for row in csv.DictReader(f)] == ["2", "3"]
+
+
+def test_watermark_is_never_lowered(storage):
+    watermark_file = os.path.join("exports", "watermark.json")
+    assert export_changes(storage, "csv")
+    save_watermark(watermark_file, storage.version + 10, storage.epoch)
+    assert export_changes(storage, "csv", since=0)
+    assert load_watermark(watermark_file, storage.epoch) == storage.version + 10
+
+
+def unavailable_rows():
+    raise RuntimeError("database is gone")
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_export_all_reports_why_a_task_failed(tmp_path, monkeypatch, parallel):
+    monkeypatch.chdir(tmp_path)
+    exporter = DataExporter({"users": unavailable_rows})
+    assert not exporter.export_all(parallel=parallel, executor="thread")
+    errors = {result["task"]: result["error"] for result in exporter.task_results}
+    assert errors["sql"] == "database is gone"
+    assert errors["csv" if not parallel else "csv:users"] == "database is gone"
+    assert all(errors.values())
+
+
+def test_streamed_tables_export_like_lists(storage):
+    streamed = DataExporter(storage.export_tables(), timestamp="streamed")
+    listed = DataExporter({table: list(rows()) for table, rows in storage.export_tables().items()},
+                          timestamp="listed")
+    for exporter in (streamed, listed):
+        assert exporter.export_to_csv()
+        assert exporter.export_to_sql(db_name=exporter.timestamp)
+    for name in ("users.csv", "grades.csv", "sql_export.sql"):
+        with open(os.path.join("exports", f"streamed_{name}")) as a, open(os.path.join("exports", f"listed_{name}")) as b:
+            assert a.read() == b.read()
+    assert streamed.stats["csv"]["rows"] == 5 + 3 + 1
+    assert streamed.stats["sql"]["rows_per_second"] > 0
+
+
+def test_sql_script_rebuilds_the_exported_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = {"grades": [{"id": i, "student_id": i % 7, "subject": "Math", "value": i % 5 + 1, "comments": ["ok"]}
+                       for i in range(1, 1201)],
+            "users": [{"id": 1, "full_name": "O'Brien", "email": None}]}
+    exporter = DataExporter(data, chunk_size=100, timestamp="t")
+    assert exporter.export_to_sql(statement_rows=500)
+    with open(os.path.join("exports", "t_sql_export.sql"), encoding="utf-8") as f:
+        script = f.read()
+    assert script.count('INSERT INTO "grades"') == 3
+    rebuilt = sqlite3.connect(":memory:")
+    rebuilt.executescript(script)
+    with sqlite3.connect(os.path.join("exports", "eduplatform.db")) as exported:
+        for table in ("grades", "users"):
+            query = f'SELECT * FROM "{table}" ORDER BY "id"'
+            assert rebuilt.execute(query).fetchall() == exported.execute(query).fetchall()
+        indexes = {row[0] for row in exported.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "idx_grades_student_id" in indexes
+        assert exported.execute('SELECT "comments" FROM "grades" WHERE "id" = 1').fetchone() == ('["ok"]',)
+    rebuilt.close()
+
+    first_script = script
+    assert DataExporter(data, chunk_size=7, timestamp="t").export_to_sql()
+    with open(os.path.join("exports", "t_sql_export.sql"), encoding="utf-8") as f:
+        assert f.read() == first_script
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_parallel_export_writes_the_sequential_files(storage, executor):
+    DataExporter(storage.export_tables(), timestamp="sequential").export_all()
+    parallel = DataExporter(storage.export_tables(), timestamp="parallel", db_name="parallel")
+    parallel.export_all(parallel=True, max_workers=2, executor=executor)
+    results = {result["task"]: result["status"] for result in parallel.task_results}
+    assert results["sql"] == "ok"
+    assert all(results[f"csv:{table}"] == "ok" for table in ("users", "grades", "assignments"))
+    for name in ("users.csv", "grades.csv", "sql_export.sql"):
+        with open(os.path.join("exports", f"sequential_{name}")) as a, open(os.path.join("exports", f"parallel_{name}")) as b:
+            assert a.read() == b.read()
@@ -0,0 +1,93 @@
+from data.intervals import IntervalSet, parse_time_slot, slots_overlap
+from data.storage import DataStorage
+from models.schedule import Schedule
+from utils.validation import check_schedule_conflict, find_schedule_conflicts, validate_timetable
+
+
+def make_schedule(schedule_id, class_id, day, lessons):
+    schedule = Schedule(schedule_id, class_id, day)
+    for time, teacher_id in lessons.items():
+        schedule.lessons[time] = {"subject": "Math", "teacher_id": teacher_id}
+    return schedule
+
+
+def test_parse_time_slot_rejects_bad_slots():
+    assert parse_time_slot("08:00-08:45") == (480, 525)
+    assert parse_time_slot("09:00-08:00") is None
+    assert parse_time_slot("09:00-09:00") is None
+    assert parse_time_slot("nine") is None
+    assert parse_time_slot(None) is None
+
+
+def test_slots_overlap_counts_partial_overlap_but_not_touching():
+    assert slots_overlap("09:00-09:45", "09:30-10:15")
+    assert not slots_overlap("09:00-09:45", "09:45-10:30")
+    assert slots_overlap("morning", "morning")
+    assert not slots_overlap("morning", "09:00-09:45")
+
+
+def test_interval_set_finds_overlapping_slots():
+    slots = IntervalSet()
+    for ref, time in enumerate(["08:00-08:45", "08:50-09:35", "10:00-10:45"]):
+        slots.add(time, ref)
+    assert slots.overlapping("08:30-09:00") == [("08:00-08:45", 0), ("08:50-09:35", 1)]
+    assert slots.overlapping("09:35-10:00") == []
+    assert slots.overlapping("07:00-18:00") == [("08:00-08:45", 0), ("08:50-09:35", 1), ("10:00-10:45", 2)]
+
+
+def test_interval_set_with_stored_conflicts_falls_back_to_a_scan():
+    slots = IntervalSet()
+    slots.add("08:00-12:00", "long")
+    slots.add("08:30-08:45", "short")
+    slots.add("11:00-11:45", "late")
+    assert slots.overlapping("09:00-09:15") == [("08:00-12:00", "long")]
+    slots.remove("08:00-12:00", "long")
+    assert slots.overlapping("09:00-09:15") == []
+    assert slots.overlapping("11:30-12:30") == [("11:00-11:45", "late")]
+
+
+def test_interval_set_keeps_unparsed_slots_aside():
+    slots = IntervalSet()
+    slots.add("first period", 1)
+    slots.add("08:00-08:45", 2)
+    assert slots.overlapping("first period") == [("first period", 1)]
+    assert slots.overlapping("07:00-18:00") == [("08:00-08:45", 2)]
+    assert len(slots) == 2
+    slots.remove("first period", 1)
+    slots.remove("first period", 1)
+    assert list(slots) == [("08:00-08:45", 2)]
+
+
+def test_storage_conflicts_follow_schedule_changes():
+    storage = DataStorage()
+    storage.add_schedule(make_schedule(1, "9-A", "Monday", {"08:00-08:45": 100}))
+    assert storage.find_lesson_conflicts("Monday", "08:30-09:15", teacher_id=100) == [
+        {"kind": "teacher", "schedule_id": 1, "time": "08:00-08:45"}]
+    assert storage.find_lesson_conflicts("Monday", "08:30-09:15", class_id="9-A", exclude_schedule=1) == []
+    assert storage.find_lesson_conflicts("Tuesday", "08:30-09:15", teacher_id=100) == []
+    storage.remove_schedule(1)
+    assert storage.find_lesson_conflicts("Monday", "08:30-09:15", teacher_id=100, class_id="9-A") == []
+
+
+def test_check_schedule_conflict_sees_overlaps_not_just_equal_slots():
+    storage = DataStorage()
+    storage.add_schedule(make_schedule(1, "9-A", "Monday", {"09:00-09:45": 100}))
+    assert check_schedule_conflict({}, "09:30-10:15", "9-B", "Monday", 100, storage)
+    assert check_schedule_conflict({"10:00-10:45": {}}, "10:30-11:15", "9-B", "Monday", 200, storage)
+    assert not check_schedule_conflict({}, "09:45-10:30", "9-A", "Monday", 100, storage)
+
+
+def test_validate_timetable_reports_each_clashing_pair():
+    first = make_schedule(1, "9-A", "Monday", {"08:00-08:45": 100})
+    second = make_schedule(2, "9-B", "Monday", {"08:30-09:15": 100, "09:20-10:05": 200})
+    conflicts = validate_timetable([first, second])
+    assert conflicts == [{"kind": "teacher", "owner": 100, "day": "Monday",
+                          "first": {"schedule_id": 1, "time": "08:00-08:45"},
+                          "second": {"schedule_id": 2, "time": "08:30-09:15"}}]
+
+
+def test_find_schedule_conflicts_ignores_the_stored_copy():
+    storage = DataStorage()
+    schedule = make_schedule(1, "9-A", "Monday", {"08:00-08:45": 100})
+    storage.add_schedule(schedule)
+    assert find_schedule_conflicts(schedule, storage) == []
@@ -0,0 +1,72 @@
+import os
+import time
+from datetime import datetime
+
+from core.student import Student
+from data.journal import Journal
+from models.grades import Grade
+
+
+def add_students(storage, count, start=1):
+    for student_id in range(start, start + count):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+
+
+def journal_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith("journal-"))
+
+
+def test_recovery_replays_the_journal_after_the_snapshot(tmp_path):
+    journal = Journal(str(tmp_path), snapshot_every=5)
+    storage = journal.recover()
+    add_students(storage, 7)
+    storage.add_grade(Grade(1, 3, "Math", 5, datetime(2025, 1, 1), 10))
+    storage.remove_user(2)
+    journal.close()
+
+    with Journal(str(tmp_path)) as recovered_journal:
+        recovered = recovered_journal.recover()
+        assert sorted(recovered.users) == [1, 3, 4, 5, 6, 7]
+        assert recovered.grades[1].value == 5
+        assert recovered.version == storage.version
+        assert recovered.epoch == storage.epoch
+        assert recovered_journal.stats()["replayed"] < storage.version
+        assert recovered.verify_indexes() == []
+
+
+def test_recovery_discards_a_torn_tail(tmp_path):
+    journal = Journal(str(tmp_path), snapshot_every=None, group_size=1)
+    storage = journal.recover()
+    add_students(storage, 3)
+    journal.close()
+    path = os.path.join(str(tmp_path), journal_files(str(tmp_path))[-1])
+    with open(path, "ab") as f:
+        f.write(b"0123abcd {\"version\": 4, \"op\"")
+
+    with Journal(str(tmp_path)) as recovered_journal:
+        recovered = recovered_journal.recover()
+        assert sorted(recovered.users) == [1, 2, 3]
+        add_students(recovered, 1, start=4)
+    with Journal(str(tmp_path)) as recovered_journal:
+        assert sorted(recovered_journal.recover().users) == [1, 2, 3, 4]
+
+
+def test_reserved_ids_are_not_handed_out_again(tmp_path):
+    journal = Journal(str(tmp_path), snapshot_every=None)
+    storage = journal.recover()
+    reserved = storage.reserve_ids("grades", 10)
+    journal.close()
+    with Journal(str(tmp_path)) as recovered_journal:
+        assert recovered_journal.recover().next_id("grades") > reserved[-1]
+
+
+def test_a_lone_change_is_written_within_the_group_interval(tmp_path):
+    journal = Journal(str(tmp_path), group_size=64, group_interval=0.05, snapshot_every=None)
+    storage = journal.recover()
+    add_students(storage, 1)
+    deadline = time.monotonic() + 5
+    while journal.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert journal.stats()["pending"] == 0
+    assert journal.stats()["groups"] == 1
+    journal.close()
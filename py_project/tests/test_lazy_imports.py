@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.startup_time import HEAVY_MODULES
+from data.lazy import model_classes
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_after_import(module, cwd):
+    """Modules of HEAVY_MODULES loaded by importing module in a fresh interpreter."""
+    script = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=cwd, env=dict(os.environ, PYTHONPATH=PROJECT))
+    return result.stdout.strip()
+
+
+@pytest.mark.parametrize("module", ["main", "core.admin", "utils.export", "data.storage", "utils.auth"])
+def test_entry_points_do_not_load_export_dependencies(module, tmp_path):
+    assert loaded_after_import(module, tmp_path) == ""
+    assert not (tmp_path / "export.log").exists()
+
+
+def test_model_classes_resolve_once():
+    from core.student import Student
+    from models.notifications import Priority
+
+    assert model_classes.Student is Student
+    assert model_classes.Priority is Priority
+    assert "Student" in vars(model_classes)
+
+
+def test_unknown_model_class_is_an_attribute_error():
+    with pytest.raises(AttributeError):
+        model_classes.Classroom
+    assert getattr(model_classes, "Classroom", None) is None
@@ -0,0 +1,58 @@
+import copy
+import pickle
+from datetime import datetime
+
+import pytest
+
+from core.parent import Parent
+from core.student import Student
+from core.teacher import Teacher
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+from models.notifications import Notification
+from models.schedule import Schedule
+
+
+def fresh(value):
+    return "".join(list(value))
+
+
+def make_objects():
+    return [
+        Student(1, "Student", "s@school.uz", "x", "9-A"),
+        Teacher(2, "Teacher", "t@school.uz", "x"),
+        Parent(3, "Parent", "p@school.uz", "x"),
+        Grade(1, 1, "Math", 5, datetime(2025, 1, 1), 2),
+        Assignment(1, "HW", "Read", "2025-06-15T23:59:00", "Math", 2, "9-A"),
+        Schedule(1, "9-A", "Monday"),
+        Notification(1, "hello", 1),
+    ]
+
+
+@pytest.mark.parametrize("obj", make_objects(), ids=lambda obj: type(obj).__name__)
+def test_objects_have_no_instance_dict(obj):
+    assert not hasattr(obj, "__dict__")
+
+
+def test_repeated_values_share_one_string():
+    first = Student(1, "A", "a@school.uz", "x", fresh("9-A"))
+    second = Student(2, "B", "b@school.uz", "x", fresh("9-A"))
+    assert first.class_id is second.class_id
+    grades = [Grade(i, 1, fresh("Math"), 5, datetime(2025, 1, 1), 2) for i in (1, 2)]
+    assert grades[0].subject is grades[1].subject
+
+
+def test_stored_objects_copy_without_their_storage():
+    storage = DataStorage()
+    student, grade = Student(1, "Student", "s@school.uz", "x", "9-A"), Grade(1, 1, "Math", 5, datetime(2025, 1, 1), 2)
+    storage.add_user(student)
+    storage.add_grade(grade)
+    for obj in (student, grade):
+        for clone in (pickle.loads(pickle.dumps(obj)), copy.copy(obj)):
+            assert clone._owner() is None
+            assert clone.id == obj.id
+    clone = pickle.loads(pickle.dumps(grade))
+    version = storage.version
+    clone.update_grade(2)
+    assert storage.version == version and grade.value == 5
@@ -0,0 +1,132 @@
+from core.inbox import Inbox
+from core.student import Student
+from data.sqlite_storage import SQLiteStorage
+from data.storage import DataStorage
+from models.notifications import Notification, Priority
+from models.schedule import Schedule
+
+
+def make_storage(cls=DataStorage, *args):
+    storage = cls(*args)
+    storage.add_user(Student(1, "Student 1", "s1@school.uz", "x", "9-A"))
+    return storage
+
+
+def test_inbox_indexes_follow_changes():
+    inbox = Inbox([Notification(3, "c", 1, priority=Priority.HIGH), Notification(1, "a", 1),
+                   Notification(2, "b", 1, is_read=True)])
+    assert [n.id for n in inbox.query()] == [1, 2, 3]
+    assert [n.id for n in inbox.query(unread_only=True)] == [1, 3]
+    assert inbox.unread_count(Priority.HIGH) == 1
+    assert inbox.mark_read(3)
+    assert inbox.unread_count() == 1
+    assert inbox.remove(1).message == "a"
+    assert inbox.remove(1) is None
+    assert inbox.unread_count() == 0 and len(inbox) == 2
+
+
+def test_inbox_pages_newest_first():
+    inbox = Inbox(Notification(i, str(i), 1) for i in range(1, 6))
+    page, cursor = inbox.newest(2)
+    assert [n.id for n in page] == [5, 4]
+    page, cursor = inbox.newest(2, before=cursor)
+    assert [n.id for n in page] == [3, 2]
+    page, cursor = inbox.newest(2, before=cursor)
+    assert [n.id for n in page] == [1] and cursor is None
+
+
+def test_inbox_lists_like_the_old_dict_list():
+    inbox = Inbox([Notification(1, "a", 1), Notification(2, "b", 1)])
+    assert inbox[0]["message"] == "a"
+    assert inbox[-1]["id"] == 2
+    assert [view["id"] for view in inbox] == [1, 2]
+
+
+def test_mark_as_read_without_a_storage_updates_the_inbox():
+    storage = make_storage()
+    notification = Notification(1, "hello", 1)
+    notification.send(storage)
+    user = storage.get_user(1)
+    notification.mark_as_read()
+    assert user.unread_notification_count() == 0
+    assert user.view_notifications(unread_only=True) == []
+    assert storage.verify_indexes() == []
+
+
+def test_removed_notification_no_longer_reports_to_the_storage():
+    storage = make_storage()
+    notification = Notification(1, "hello", 1)
+    notification.send(storage)
+    version = storage.version
+    storage.remove_notification(1)
+    notification.mark_as_read()
+    assert storage.version == version + 1
+
+
+def test_delete_notification_removes_it_from_the_storage():
+    storage = make_storage()
+    Notification(1, "hello", 1).send(storage)
+    storage.get_user(1).delete_notification(1)
+    assert storage.get_notification(1) is None
+    assert storage.get_notifications_by_user(1) == []
+    assert storage.verify_indexes() == []
+
+
+def test_sqlite_delete_notification_removes_the_row(tmp_path):
+    storage = make_storage(SQLiteStorage, str(tmp_path / "school.db"))
+    Notification(1, "hello", 1).send(storage)
+    user = storage.get_user(1)
+    user.delete_notification(1)
+    assert storage.get_notification(1) is None
+    assert len(user.notifications) == 0
+    storage.close()
+
+
+def test_broadcast_delivers_one_notification_per_recipient():
+    storage = DataStorage()
+    for student_id in range(1, 6):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+    storage.next_id("notifications")
+    sent = Notification.broadcast([1, 2, 3, 4, 5, 99], "Exam moved", storage, priority=Priority.HIGH)
+    assert [n.id for n in sent] == [2, 3, 4, 5, 6, 7]
+    for student_id in range(1, 6):
+        assert [n.message for n in storage.get_notifications_by_user(student_id, priority=Priority.HIGH)] == ["Exam moved"]
+    assert storage.count_unread_notifications(99) == 1
+    assert storage.verify_indexes() == []
+
+
+def test_reserved_ids_are_never_reused():
+    storage = make_storage()
+    first = storage.reserve_ids("notifications", 3)
+    Notification(first[0], "a", 1).send(storage)
+    storage.remove_notification(first[0])
+    assert storage.next_id("notifications") == first[-1] + 1
+    Notification(50, "chosen by the caller", 1).send(storage)
+    assert storage.next_id("notifications") == 51
+
+
+def test_resending_an_id_replaces_the_stored_notification():
+    storage = make_storage()
+    storage.send_notifications([Notification(1, "old", 1)])
+    storage.send_notifications([Notification(1, "new", 1)])
+    assert [n.message for n in storage.get_notifications_by_user(1)] == ["new"]
+    assert storage.count_unread_notifications(1) == 1
+
+
+def test_schedule_change_notifies_the_class():
+    storage = make_storage()
+    storage.add_user(Student(2, "Student 2", "s2@school.uz", "x", "9-B"))
+    schedule = Schedule(1, "9-A", "Monday")
+    Notification.notify_schedule_change(schedule, storage)
+    assert [n.message for n in storage.get_notifications_by_user(1)] == ["New schedule added for class 9-A"]
+    assert storage.get_notifications_by_user(2) == []
+
+
+def test_sqlite_send_notifications_fills_the_inboxes(tmp_path):
+    storage = make_storage(SQLiteStorage, str(tmp_path / "school.db"))
+    storage.add_user(Student(2, "Student 2", "s2@school.uz", "x", "9-A"))
+    sent = Notification.broadcast([1, 2], "Holiday", storage)
+    assert [n.id for n in sent] == [1, 2]
+    assert [n.message for n in storage.get_notifications_by_user(2)] == ["Holiday"]
+    assert storage.count_unread_notifications(1) == 1
+    storage.close()
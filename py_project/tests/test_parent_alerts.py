@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from core.parent import Parent
+from core.student import Student
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+from utils.parent_alerts import ParentAlerts
+
+NOW = datetime(2025, 1, 20)
+
+
+def make_storage():
+    storage = DataStorage()
+    for student_id in (1, 2):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+    for parent_id in (10, 11):
+        parent = Parent(parent_id, f"Parent {parent_id}", f"p{parent_id}@school.uz", "x")
+        storage.add_user(parent)
+        parent.add_child(1, storage)
+    storage.add_assignment(Assignment(1, "Essay", "", "2025-01-10", "Math", 100, "9-A"))
+    storage.add_assignment(Assignment(2, "Lab", "", "2025-02-10", "Physics", 100, "9-A"))
+    storage.assign_assignment_to_class(1, "9-A")
+    storage.assign_assignment_to_class(2, "9-A")
+    return storage
+
+
+def messages(storage, user_id):
+    return sorted(n.message for n in storage.get_notifications_by_user(user_id))
+
+
+def test_low_grades_alert_every_parent_once():
+    storage = make_storage()
+    alerts = ParentAlerts(storage)
+    storage.add_grade(Grade(1, 1, "Math", 2, NOW, 100))
+    storage.add_grade(Grade(2, 1, "Math", 5, NOW, 100))
+    storage.add_grade(Grade(3, 2, "Math", 1, NOW, 100))
+    for parent_id in (10, 11):
+        assert messages(storage, parent_id) == ["Child 1: Low grade (2) in Math"]
+    storage.add_grade(Grade(1, 1, "Math", 2, NOW, 100))
+    assert len(messages(storage, 10)) == 1
+    assert len(alerts) == 2
+
+
+def test_lowered_grade_is_alerted():
+    storage = make_storage()
+    ParentAlerts(storage)
+    storage.add_grade(Grade(1, 1, "Math", 5, NOW, 100))
+    assert messages(storage, 10) == []
+    storage.get_grade(1).update_grade(3)
+    assert messages(storage, 10) == ["Child 1: Low grade (3) in Math"]
+
+
+def test_run_alerts_missed_deadlines_only_once():
+    storage = make_storage()
+    alerts = ParentAlerts(storage)
+    storage.get_user(2).submit_assignment(1, "done", storage)
+    sent = alerts.run(NOW)
+    assert sorted((n.recipient_id, n.message) for n in sent) == [
+        (10, "Child 1: Missed deadline for Essay in Math"), (11, "Child 1: Missed deadline for Essay in Math")]
+    assert alerts.run(NOW) == []
+    assert len(alerts.run(datetime(2025, 3, 1))) == 2
+
+
+def test_submitted_assignments_are_not_missed():
+    storage = make_storage()
+    storage.get_user(1).submit_assignment(1, "done", storage)
+    assert ParentAlerts(storage).run(NOW) == []
+
+
+def test_alerts_in_the_inboxes_are_not_sent_again():
+    storage = make_storage()
+    ParentAlerts(storage).run(NOW)
+    storage.parent_alerts = None
+    restarted = ParentAlerts(storage)
+    assert len(restarted) == 2
+    assert restarted.run(NOW) == []
+
+
+def test_parent_gets_new_alerts_about_one_child():
+    storage = make_storage()
+    parent = storage.get_user(10)
+    storage.add_grade(Grade(1, 1, "Math", 1, NOW, 100))
+    notifications = parent.receive_child_notification(1, storage, generate_new=True)
+    assert {n["message"] for n in notifications} >= {"Child 1: Low grade (1) in Math"}
+    assert isinstance(storage.parent_alerts, ParentAlerts)
+    again = parent.receive_child_notification(1, storage, generate_new=True)
+    assert len(again) == len(notifications)
+    assert parent.receive_child_notification(2, storage) == [{"error": "Child ID 2 is not linked to this parent"}]
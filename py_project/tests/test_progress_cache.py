@@ -0,0 +1,105 @@
+from datetime import datetime
+
+from core.student import Student
+from data.progress_cache import ProgressCache
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+
+
+def make_storage(**kwargs):
+    storage = DataStorage(**kwargs)
+    for student_id in (1, 2):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+    storage.add_assignment(Assignment(1, "Essay", "", "2025-01-10", "Math", 100, "9-A"))
+    storage.assign_assignment_to_class(1, "9-A")
+    storage.add_grade(Grade(1, 1, "Math", 4, datetime(2025, 1, 1), 100))
+    return storage
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ProgressCache(max_size=2)
+    cache.put(1, None, {"id": 1}, [10])
+    cache.put(2, None, {"id": 2}, [10])
+    assert cache.get(1, None) == {"id": 1}
+    cache.put(3, None, {"id": 3}, [])
+    assert cache.get(2, None) is None
+    assert cache.get(1, None) == {"id": 1}
+    assert cache.stats() == {"hits": 2, "misses": 1, "evictions": 1, "invalidations": 0,
+                             "size": 2, "max_size": 2}
+
+
+def test_cache_invalidates_by_student_and_assignment():
+    cache = ProgressCache()
+    cache.put(1, None, {}, [10, 11])
+    cache.put(1, "Math", {}, [10])
+    cache.put(2, None, {}, [11])
+    cache.invalidate_assignment(10)
+    assert cache.get(1, None) is None and cache.get(1, "Math") is None
+    assert cache.get(2, None) == {}
+    cache.invalidate_student(2)
+    cache.invalidate_student(3)
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 3
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ProgressCache(max_size=0)
+    cache.put(1, None, {}, [])
+    assert len(cache) == 0
+
+
+def test_repeated_progress_is_served_from_the_cache():
+    storage = make_storage()
+    first = storage.view_student_progress(1)
+    assert storage.view_student_progress(1) is first
+    assert storage.progress_cache_stats()["hits"] == 1
+    assert "error" in storage.view_student_progress(99)
+    assert storage.progress_cache_stats()["size"] == 1
+
+
+def test_grade_changes_invalidate_the_student_only():
+    storage = make_storage()
+    before = storage.view_student_progress(1)
+    other = storage.view_student_progress(2)
+    storage.add_grade(Grade(2, 1, "Math", 2, datetime(2025, 1, 2), 100))
+    assert storage.view_student_progress(1) != before
+    assert storage.view_student_progress(2) is other
+
+    before = storage.view_student_progress(1)
+    storage.get_grade(1).update_grade(5)
+    updated = storage.view_student_progress(1)
+    assert updated != before
+    storage.remove_grade(2)
+    assert storage.view_student_progress(1) == storage._student_progress(1)
+
+
+def test_submissions_and_grading_invalidate_the_progress():
+    storage = make_storage()
+    storage.view_student_progress(1)
+    storage.get_user(1).submit_assignment(1, "done", storage)
+    progress = storage.view_student_progress(1)
+    assert progress == storage._student_progress(1)
+    storage.get_assignment(1).set_grade(1, 5, storage)
+    assert storage.view_student_progress(1) == storage._student_progress(1)
+    assert storage.view_student_progress(1) != progress
+
+
+def test_assignment_changes_invalidate_every_student_using_it():
+    storage = make_storage()
+    storage.view_student_progress(1)
+    storage.view_student_progress(2)
+    storage.add_assignment(Assignment(1, "Long essay", "", "2025-01-20", "Math", 100, "9-A"))
+    for student_id in (1, 2):
+        progress = storage.view_student_progress(student_id)
+        assert [row["title"] for row in progress["assignments"]] == ["Long essay"]
+
+
+def test_invalidate_progress_after_direct_changes():
+    storage = make_storage()
+    storage.view_student_progress(1)
+    storage.get_user(1).assignments[1]["status"] = "Submitted"
+    storage.invalidate_progress(1)
+    assert storage.view_student_progress(1) == storage._student_progress(1)
+    storage.invalidate_progress()
+    assert storage.progress_cache_stats()["size"] == 0
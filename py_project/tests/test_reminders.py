@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.student import Student
+from data.storage import DataStorage
+from models.assignments import Assignment
+from utils.reminders import DeadlineReminders
+
+NOW = datetime(2025, 1, 10, 8, 0)
+
+
+def make_storage():
+    storage = DataStorage()
+    for student_id, class_id in ((1, "9-A"), (2, "9-A"), (3, "9-B")):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", class_id))
+    return storage
+
+
+def assignment(assignment_id, deadline, class_id="9-A"):
+    return Assignment(assignment_id, f"Task {assignment_id}", "", deadline.isoformat(), "Math", 100, class_id)
+
+
+def messages(storage, user_id):
+    return [n.message for n in storage.get_notifications_by_user(user_id)]
+
+
+def test_reminders_are_sent_before_each_deadline():
+    storage = make_storage()
+    reminders = DeadlineReminders(storage)
+    storage.add_assignment(assignment(1, NOW + timedelta(days=2)))
+    assert reminders.tick(NOW) == []
+    assert reminders.next_due() == NOW + timedelta(days=1)
+    sent = reminders.tick(NOW + timedelta(days=1))
+    assert sorted(n.recipient_id for n in sent) == [1, 2]
+    assert messages(storage, 1) == ["Reminder: Assignment 'Task 1' is due 2025-01-12 08:00."]
+    assert messages(storage, 3) == []
+    reminders.tick(NOW + timedelta(days=2, minutes=-30))
+    assert len(messages(storage, 1)) == 2
+    assert reminders.stats()["notifications"] == 4
+
+
+def test_only_one_reminder_after_a_long_pause():
+    storage = make_storage()
+    reminders = DeadlineReminders(storage)
+    storage.add_assignment(assignment(1, NOW + timedelta(days=2)))
+    reminders.tick(NOW + timedelta(days=2, minutes=-10))
+    assert len(messages(storage, 1)) == 1
+    assert reminders.tick(NOW + timedelta(days=3)) == []
+
+
+def test_passed_deadlines_are_skipped():
+    storage = make_storage()
+    storage.add_assignment(assignment(1, NOW + timedelta(hours=2)))
+    reminders = DeadlineReminders(storage, offsets=[timedelta(hours=1)])
+    assert reminders.tick(NOW + timedelta(hours=3)) == []
+    assert reminders.stats()["skipped"] == 1
+
+
+def test_removed_and_moved_assignments():
+    storage = make_storage()
+    reminders = DeadlineReminders(storage, offsets=[timedelta(hours=1)])
+    storage.add_assignment(assignment(1, NOW + timedelta(hours=2)))
+    storage.add_assignment(assignment(2, NOW + timedelta(hours=2)))
+    storage.remove_assignment(1)
+    storage.get_assignment(2).deadline = (NOW + timedelta(hours=5)).isoformat()
+    assert reminders.tick(NOW + timedelta(hours=1, minutes=30)) == []
+    assert reminders.next_due() == NOW + timedelta(hours=4)
+    assert [n.message for n in reminders.tick(NOW + timedelta(hours=4))][:1] == [
+        "Reminder: Assignment 'Task 2' is due 2025-01-10 13:00."]
+    storage.add_assignment(assignment(2, NOW + timedelta(hours=6)))
+    assert len(reminders) == 1
+
+
+def test_undated_assignments_are_not_scheduled():
+    storage = make_storage()
+    reminders = DeadlineReminders(storage)
+    storage.add_assignment(Assignment(1, "Task 1", "", "next week", "Math", 100, "9-A"))
+    assert len(reminders) == 0
+    assert reminders.next_due() is None
+
+
+def test_offsets_must_be_positive():
+    with pytest.raises(ValueError):
+        DeadlineReminders(make_storage(), offsets=[timedelta(0)])
+    with pytest.raises(ValueError):
+        DeadlineReminders(make_storage(), offsets=[])
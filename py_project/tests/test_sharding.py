@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import pytest
+
+from core.student import Student
+from core.teacher import Teacher
+from data.sharding import ShardedStorage, school_prefix
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+
+CLASSES = ("9-A", "9-B", "10-A", "10-B", "11-A")
+
+
+def fill(storage):
+    storage.add_user(Teacher(100, "Teacher", "t100@school.uz", "x"))
+    for student_id in range(1, 21):
+        class_id = CLASSES[student_id % len(CLASSES)]
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", class_id))
+        storage.add_grade(Grade(student_id, student_id, "Math", 1 + student_id % 5, datetime(2025, 1, 1), 100))
+    for assignment_id, class_id in enumerate(CLASSES, 1):
+        storage.add_assignment(Assignment(assignment_id, "Essay", "", "2025-01-10", "Math", 100, class_id))
+        storage.assign_assignment_to_class(assignment_id, class_id)
+    return storage
+
+
+def _submit_and_grade(storage, student_id, assignment_id):
+    storage.get_user(student_id).submit_assignment(assignment_id, "done", storage)
+    storage.get_assignment(assignment_id).set_grade(student_id, 5, storage)
+    return storage.view_student_progress(student_id)["completion_rate"]
+
+
+def profiles(storage):
+    """view_all_users by ID, without the creation times, which differ between fills."""
+    return sorted(({k: v for k, v in profile.items() if k != "created_at"} for profile in storage.view_all_users()),
+                  key=lambda profile: profile["id"])
+
+
+@pytest.fixture(scope="module")
+def sharded():
+    with ShardedStorage.start(3) as storage:
+        yield fill(storage)
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return fill(DataStorage())
+
+
+def test_data_is_spread_by_class(sharded):
+    shards = {sharded._class_shard(class_id) for class_id in CLASSES}
+    assert len(shards) > 1
+    for student_id in range(1, 21):
+        student = sharded.get_user(student_id)
+        assert sharded._locate("users", student_id) == sharded._class_shard(student.class_id)
+
+
+def test_scatter_gather_matches_a_single_storage(sharded, reference):
+    assert profiles(sharded) == profiles(reference)
+    assert sharded.calculate_grade_statistics_by_subject("Math") == \
+        reference.calculate_grade_statistics_by_subject("Math")
+    assert sharded.view_school_progress() == reference.view_school_progress()
+    for class_id in CLASSES:
+        assert sharded.calculate_grade_statistics_by_class(class_id) == \
+            reference.calculate_grade_statistics_by_class(class_id)
+    assert sharded.verify_indexes() == []
+
+
+def test_lookups_are_routed_to_the_owning_shard(sharded, reference):
+    assert sharded.get_user(7).full_name == reference.get_user(7).full_name
+    assert [g.id for g in sharded.get_grades_by_student(7)] == [7]
+    assert sharded.get_user(999) is None
+    assert sharded.get_grade(999) is None
+    assert sharded.mark_notification_read(999) is False
+
+
+def test_run_in_shard_changes_the_stored_objects(sharded):
+    student = sharded.get_user(3)
+    assignment_id = CLASSES.index(student.class_id) + 1
+    assert sharded.run_in_shard(student.class_id, _submit_and_grade, 3, assignment_id) == 100.0
+    assert sharded.get_user(3).assignments[assignment_id]["status"] == "Submitted"
+    assert sharded.get_assignment(assignment_id).grades[3] == 5
+
+
+def test_reserved_ids_are_unique_across_shards(sharded):
+    ranges = [sharded.reserve_ids("grades", 4) for _ in range(6)]
+    ids = [item_id for reserved in ranges for item_id in reserved]
+    assert len(set(ids)) == len(ids)
+    assert {reserved.step for reserved in ranges} == {sharded.shard_count}
+    assert {(reserved[0] - 1) % sharded.shard_count for reserved in ranges} == set(range(sharded.shard_count))
+
+
+def test_students_cannot_move_between_shards(sharded):
+    student = sharded.get_user(1)
+    other = next(class_id for class_id in CLASSES
+                 if sharded._class_shard(class_id) != sharded._class_shard(student.class_id))
+    with pytest.raises(ValueError, match="cannot move between shards"):
+        sharded.add_user(Student(1, "Student 1", "s1@school.uz", "x", other))
+
+
+def test_shard_errors_reach_the_caller(sharded):
+    with pytest.raises(AttributeError):
+        sharded._call(0, "_record_change", "users", 1, "update")
+    with pytest.raises(AttributeError):
+        sharded._call(0, "no_such_method")
+
+
+def test_school_prefix_keeps_a_school_together():
+    assert school_prefix("north/7-B") == "north"
+    assert school_prefix("7-B") == "7-B"
+    router = ShardedStorage([object()] * 4, shard_key=school_prefix)
+    assert router._class_shard("north/7-B") == router._class_shard("north/11-A")
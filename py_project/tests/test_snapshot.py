@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from core.student import Student
+from data.journal import Journal
+from data.snapshot import SnapshotReader, write_snapshot
+from data.storage import DataStorage
+from models.grades import Grade
+from models.notifications import Notification
+
+
+@pytest.fixture
+def storage():
+    storage = DataStorage()
+    for student_id in range(1, 4):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", "9-A"))
+        storage.add_grade(Grade(student_id, student_id, "Math", 5, datetime(2025, 1, 1), 10))
+    for notification_id, recipient_id in enumerate((2, 1, 2), start=1):
+        storage.add_notification(Notification(notification_id, "New grade posted", recipient_id))
+    storage.reserve_ids("grades", 10)
+    return storage
+
+
+def test_reader_decodes_records_on_demand(storage, tmp_path):
+    path = str(tmp_path / "storage.bin")
+    write_snapshot(storage, path)
+    with SnapshotReader(path) as reader:
+        assert reader.version == storage.version
+        assert len(reader.users) == 3 and 4 not in reader.users
+        user = reader.users[2]
+        assert user is reader.get("users", 2)
+        assert user.class_id == "9-A"
+        assert [n.id for n in user.notifications.query()] == [1, 3]
+        assert reader.get("grades", 99) is None
+        assert [record["id"] for record in reader.records("grades")] == [1, 2, 3]
+
+
+def test_load_into_gives_the_same_storage(storage, tmp_path):
+    path = str(tmp_path / "storage.bin")
+    write_snapshot(storage, path)
+    with SnapshotReader(path) as reader:
+        loaded = reader.load_into()
+    assert loaded.view_all_users() == storage.view_all_users()
+    assert loaded.get_students_by_class("9-A") == storage.get_students_by_class("9-A")
+    assert loaded.count_unread_notifications(2) == 2
+    assert loaded.next_id("grades") == storage.next_id("grades")
+    assert loaded.verify_indexes() == []
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "storage.bin"
+    path.write_bytes(b"not a snapshot at all")
+    with pytest.raises(ValueError):
+        SnapshotReader(str(path))
+
+
+def test_journal_recovers_from_a_binary_snapshot(storage, tmp_path):
+    journal = Journal(str(tmp_path), snapshot_format="binary")
+    journal.attach(storage)
+    storage.remove_grade(1)
+    journal.close()
+    with Journal(str(tmp_path), snapshot_format="binary") as journal:
+        recovered = journal.recover()
+        assert sorted(recovered.grades) == [2, 3]
+        assert recovered.version == storage.version
+        assert recovered.epoch == storage.epoch
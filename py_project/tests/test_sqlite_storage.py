@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+from core.student import Student
+from core.teacher import Teacher
+from data.sqlite_storage import SQLiteStorage
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+from models.schedule import Schedule
+
+
+def fill(storage):
+    for student_id, class_id in ((1, "9-A"), (2, "9-A"), (3, "9-B")):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", class_id))
+    storage.add_user(Teacher(100, "Teacher", "t@school.uz", "x"))
+    for grade_id, (student_id, value) in enumerate(((1, 5), (1, 3), (2, 4), (3, 2)), start=1):
+        storage.add_grade(Grade(grade_id, student_id, "Math", value, datetime(2025, 1, grade_id), 100))
+    storage.add_assignment(Assignment(1, "HW", "Read", "2025-06-15T23:59:00", "Math", 100, "9-A"))
+    schedule = Schedule(1, "9-A", "Monday")
+    schedule.lessons["08:00-08:45"] = {"subject": "Math", "teacher_id": 100}
+    storage.add_schedule(schedule)
+    return storage
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "school.db")
+
+
+def test_queries_match_the_in_memory_storage(path):
+    with SQLiteStorage(path) as storage:
+        fill(storage)
+        memory = fill(DataStorage())
+        assert storage.get_students_by_class("9-A") == memory.get_students_by_class("9-A")
+        assert [s.id for s in storage.get_schedules_by_teacher(100)] == [1]
+        assert [a.id for a in storage.get_assignments_by_class("9-A")] == [1]
+        for class_id in ("9-A", "9-B"):
+            assert (storage.calculate_grade_statistics_by_class(class_id)
+                    == memory.calculate_grade_statistics_by_class(class_id))
+        assert storage.calculate_grade_statistics_by_subject("Math") == memory.calculate_grade_statistics_by_subject("Math")
+        assert storage.get_notifications_by_user(1)[0].message == memory.get_notifications_by_user(1)[0].message
+
+
+def test_data_survives_reopening(path):
+    with SQLiteStorage(path) as storage:
+        fill(storage)
+        storage.get_grade(2).update_grade(4)
+    with SQLiteStorage(path) as storage:
+        assert storage.get_user(3).class_id == "9-B"
+        assert storage.get_grade(2).value == 4
+        assert storage.get_schedule(1).lessons["08:00-08:45"]["teacher_id"] == 100
+        assert storage.next_id("grades") == 5
+
+
+def test_identity_map_returns_the_same_object(path):
+    with SQLiteStorage(path) as storage:
+        fill(storage)
+        assert storage.get_user(1) is storage.get_user(1)
+        assert storage.users[1] is storage.get_user(1)
+
+
+def test_a_failed_batch_is_rolled_back(path):
+    with SQLiteStorage(path) as storage:
+        fill(storage)
+        with pytest.raises(RuntimeError):
+            with storage.batch():
+                storage.remove_user(1)
+                raise RuntimeError("abort")
+        assert storage.get_user(1) is not None
+        assert storage.get_students_by_class("9-A") == [1, 2]
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from core.parent import Parent
+from core.student import Student
+from core.teacher import Teacher
+from data.storage import DataStorage
+from models.assignments import Assignment
+from models.grades import Grade
+from models.schedule import Schedule
+
+
+def make_storage():
+    storage = DataStorage()
+    for student_id, class_id in ((1, "9-A"), (2, "9-A"), (3, "9-B")):
+        storage.add_user(Student(student_id, f"Student {student_id}", f"s{student_id}@school.uz", "x", class_id))
+    storage.add_user(Teacher(100, "Teacher", "t@school.uz", "x"))
+    return storage
+
+
+def make_schedule(schedule_id, class_id="9-A", teacher_id=100, time="08:00-08:45"):
+    schedule = Schedule(schedule_id, class_id, "Monday")
+    schedule.lessons[time] = {"subject": "Math", "teacher_id": teacher_id}
+    return schedule
+
+
+def test_user_indexes_follow_add_replace_and_remove():
+    storage = make_storage()
+    assert storage.get_students_by_class("9-A") == [1, 2]
+    storage.add_user(Student(2, "Student 2", "new2@school.uz", "x", "9-B"))
+    assert storage.get_students_by_class("9-A") == [1]
+    assert storage.get_students_by_class("9-B") == [3, 2]
+    assert storage.get_users_by_email("s2@school.uz") == []
+    storage.remove_user(3)
+    assert storage.get_students_by_class("9-B") == [2]
+    assert storage.verify_indexes() == []
+
+
+def test_schedule_indexes_follow_lesson_changes():
+    storage = make_storage()
+    schedule = make_schedule(1)
+    storage.add_schedule(schedule)
+    assert storage.get_schedules_by_teacher(100) == [schedule]
+    schedule.lessons["08:00-08:45"]["teacher_id"] = 200
+    storage.reindex_schedule(schedule)
+    assert storage.get_schedules_by_teacher(100) == []
+    assert storage.get_schedules_by_teacher(200) == [schedule]
+    storage.remove_schedule(1)
+    assert storage.get_schedules_by_class("9-A") == []
+    assert storage.verify_indexes() == []
+
+
+def test_grade_assignment_and_parent_indexes():
+    storage = make_storage()
+    storage.add_grade(Grade(1, 1, "Math", 5, datetime(2025, 1, 1), 100))
+    storage.add_grade(Grade(2, 1, "Physics", 3, datetime(2025, 1, 2), 100))
+    storage.add_assignment(Assignment(1, "HW", "Read", "2025-06-15T23:59:00", "Math", 100, "9-A"))
+    parent = Parent(50, "Parent", "p@school.uz", "x")
+    storage.add_user(parent)
+    parent.add_child(1, storage)
+    assert [g.id for g in storage.get_grades_by_student(1, "Physics")] == [2]
+    assert [a.id for a in storage.get_assignments_by_class("9-A")] == [1]
+    assert storage.get_parents_by_child(1) == [50]
+    storage.remove_grade(2)
+    storage.remove_assignment(1)
+    assert [g.id for g in storage.get_grades_by_student(1)] == [1]
+    assert storage.get_assignments_by_class("9-A") == []
+    assert storage.verify_indexes() == []
+
+
+def test_verify_indexes_finds_and_repairs_changes_behind_the_storage():
+    storage = make_storage()
+    storage.users[1].class_id = "9-C"
+    assert storage.verify_indexes(rebuild=True) == ["students_by_class"]
+    assert storage.get_students_by_class("9-C") == [1]
+    assert storage.verify_indexes() == []
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+
+from data.sqlite_storage import SQLiteStorage
+from data.storage import DataStorage
+from data.timeline import LessonTimeline, lesson_start
+from models.schedule import Schedule
+
+
+def make_schedule(schedule_id, day, lessons):
+    schedule = Schedule(schedule_id, "9-A", day)
+    for time, lesson in lessons.items():
+        schedule.lessons[time] = dict(lesson, subject="Math", teacher_id=100)
+    return schedule
+
+
+@pytest.fixture(params=[DataStorage, SQLiteStorage])
+def storage(request, tmp_path):
+    if request.param is DataStorage:
+        yield DataStorage()
+    else:
+        storage = SQLiteStorage(str(tmp_path / "school.db"))
+        yield storage
+        storage.close()
+
+
+def test_lesson_start_uses_the_lesson_time_or_a_dated_day():
+    assert lesson_start("Monday", "08:00-08:45", {"time": "2024-03-04T09:30"}) == datetime(2024, 3, 4, 9, 30)
+    assert lesson_start("2024-03-04", "08:00-08:45", {}) == datetime(2024, 3, 4, 8, 0)
+    assert lesson_start("2024-03-04", "first period", {}) == datetime(2024, 3, 4)
+    assert lesson_start("Monday", "08:00-08:45", {}) is None
+    assert lesson_start("Monday", "08:00-08:45", {"time": "soon"}) is None
+
+
+def test_timeline_ranges_are_half_open_unless_asked():
+    timeline = LessonTimeline()
+    timeline.add(datetime(2024, 3, 5, 8), 2, "08:00-08:45")
+    timeline.add(datetime(2024, 3, 4, 8), 1, "08:00-08:45")
+    timeline.add(datetime(2024, 3, 4, 8), 3, "08:00-08:45")
+    assert [ref for _, ref, _ in timeline.between(datetime(2024, 3, 4), datetime(2024, 3, 5, 8))] == [1, 3]
+    assert [ref for _, ref, _ in timeline.between(datetime(2024, 3, 4), datetime(2024, 3, 5, 8), True)] == [1, 3, 2]
+    timeline.remove(datetime(2024, 3, 4, 8), 3, "08:00-08:45")
+    timeline.remove(datetime(2024, 3, 4, 8), 9, "08:00-08:45")
+    assert [ref for _, (ref, _) in timeline] == [1, 2]
+
+
+def test_lessons_between_are_in_time_order(storage):
+    storage.add_schedule(make_schedule(1, "Monday", {"10:00-10:45": {"time": "2024-03-06T10:00"},
+                                                     "08:00-08:45": {"time": "2024-03-04T08:00"}}))
+    storage.add_schedule(make_schedule(2, "2024-03-05", {"08:00-08:45": {}}))
+    storage.add_schedule(make_schedule(3, "Tuesday", {"08:00-08:45": {}}))
+    lessons = list(storage.get_lessons_between(datetime(2024, 3, 4), datetime(2024, 3, 7)))
+    assert [(start, schedule.id, time) for start, schedule, time, _ in lessons] == [
+        (datetime(2024, 3, 4, 8), 1, "08:00-08:45"),
+        (datetime(2024, 3, 5, 8), 2, "08:00-08:45"),
+        (datetime(2024, 3, 6, 10), 1, "10:00-10:45"),
+    ]
+
+
+def test_schedules_by_week_and_month(storage):
+    storage.add_schedule(make_schedule(1, "2024-03-04", {"08:00-08:45": {}}))
+    storage.add_schedule(make_schedule(2, "2024-03-10", {"08:00-08:45": {}}))
+    storage.add_schedule(make_schedule(3, "2024-04-01", {"08:00-08:45": {}}))
+    storage.add_schedule(make_schedule(4, "2024-12-31", {"08:00-08:45": {}}))
+    assert [s.id for s in storage.get_schedules_by_week(datetime(2024, 3, 4), datetime(2024, 3, 10, 8))] == [1, 2]
+    assert [s.id for s in storage.get_schedules_by_month(3, 2024)] == [1, 2]
+    assert [s.id for s in storage.get_schedules_by_month(12, 2024)] == [4]
+
+
+def test_timeline_follows_lesson_changes(storage):
+    schedule = make_schedule(1, "2024-03-04", {})
+    storage.add_schedule(schedule)
+    schedule = storage.get_schedule(1)
+    schedule.add_lesson("08:00-08:45", "Math", 100, storage)
+    assert [s.id for s in storage.get_schedules_by_month(3, 2024)] == [1]
+    schedule.remove_lesson("08:00-08:45", storage)
+    assert storage.get_schedules_by_month(3, 2024) == []
+    schedule.add_lesson("09:00-09:45", "Math", 100, storage)
+    storage.remove_schedule(1)
+    assert list(storage.get_lessons_between(datetime(2024, 3, 1), datetime(2024, 4, 1))) == []
@@ -0,0 +1,106 @@
+import pytest
+
+from core.student import Student
+from data.sqlite_storage import SQLiteStorage
+from data.storage import DataStorage
+from utils.timetable import TimetableBuilder, TimetableError
+from utils.validation import validate_timetable
+
+
+def make_builder(**kwargs):
+    builder = TimetableBuilder(seed=1, **kwargs)
+    builder.add_teacher(100, subjects=["Math"])
+    builder.add_teacher(101, subjects=["Math"])
+    builder.add_teacher(200, subjects=["Physics"], unavailable=[("Monday", "08:00-08:45")])
+    for class_id in ("9-A", "9-B", "10-A"):
+        builder.add_requirement(class_id, "Math", 6)
+        builder.add_requirement(class_id, "Physics", 4)
+        builder.add_requirement(class_id, "History", 2, teacher_id=300)
+    return builder
+
+
+def lesson_counts(schedules):
+    counts = {}
+    for schedule in schedules:
+        for lesson in schedule.lessons.values():
+            key = (schedule.class_id, lesson["subject"])
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def test_build_meets_every_requirement_without_conflicts():
+    schedules = make_builder().build()
+    assert validate_timetable(schedules) == []
+    assert [s.id for s in schedules] == list(range(1, 16))
+    counts = lesson_counts(schedules)
+    for class_id in ("9-A", "9-B", "10-A"):
+        assert counts[(class_id, "Math")] == 6
+        assert counts[(class_id, "Physics")] == 4
+        assert counts[(class_id, "History")] == 2
+    monday = [s for s in schedules if s.day == "Monday"]
+    assert all(s.lessons.get("08:00-08:45", {}).get("teacher_id") != 200 for s in monday)
+
+
+def test_build_is_reproducible_with_a_seed():
+    first = [(s.class_id, s.day, dict(s.lessons)) for s in make_builder().build()]
+    second = [(s.class_id, s.day, dict(s.lessons)) for s in make_builder().build()]
+    assert first == second
+
+
+def test_build_spreads_teachers_by_load():
+    schedules = make_builder().build()
+    teachers = {lesson["teacher_id"] for s in schedules for lesson in s.lessons.values() if lesson["subject"] == "Math"}
+    assert teachers == {100, 101}
+
+
+@pytest.mark.parametrize("storage_class", [DataStorage, SQLiteStorage])
+def test_build_into_storage_reserves_ids_and_notifies_each_class_once(storage_class, tmp_path):
+    storage = storage_class() if storage_class is DataStorage else storage_class(str(tmp_path / "school.db"))
+    storage.add_user(Student(1, "Student 1", "s1@school.uz", "x", "9-A"))
+    storage.reserve_ids("schedules", 4)
+    schedules = make_builder().build(storage)
+    assert [s.id for s in schedules] == list(range(5, 20))
+    assert len(storage.get_schedules_by_class("9-A")) == 5
+    assert len(storage.get_notifications_by_user(1)) == 1
+    if storage_class is SQLiteStorage:
+        storage.close()
+
+
+def test_build_starts_at_first_id():
+    assert make_builder().build(first_id=40)[0].id == 40
+
+
+def test_impossible_requirements_raise():
+    builder = TimetableBuilder(days=["Monday"], slots=["08:00-08:45", "08:55-09:40"], seed=1, attempts=2)
+    builder.add_requirement("9-A", "Math", 2, teacher_id=100)
+    builder.add_requirement("9-A", "Physics", 1, teacher_id=200)
+    with pytest.raises(TimetableError, match="needs 3 lessons"):
+        builder.build()
+
+    builder = TimetableBuilder(days=["Monday"], slots=["08:00-08:45", "08:55-09:40"], seed=1, attempts=2)
+    builder.add_teacher(100, subjects=["Math"], unavailable=[("Monday", "08:00-08:45")])
+    builder.add_requirement("9-A", "Math", 2, teacher_id=100)
+    with pytest.raises(TimetableError, match="Could not place 1 lessons"):
+        builder.build()
+
+
+def test_missing_or_overloaded_teachers_raise():
+    builder = TimetableBuilder(seed=1)
+    builder.add_requirement("9-A", "Chemistry", 2)
+    with pytest.raises(TimetableError, match="No teacher available"):
+        builder.build()
+
+    builder = TimetableBuilder(seed=1)
+    builder.add_teacher(100, subjects=["Math"], max_hours=3)
+    builder.add_requirement("9-A", "Math", 4, teacher_id=100)
+    with pytest.raises(TimetableError, match="more than their maximum"):
+        builder.build()
+
+
+def test_invalid_slots_and_hours_are_rejected():
+    with pytest.raises(ValueError, match="Invalid time slot"):
+        TimetableBuilder(slots=["8-9"])
+    with pytest.raises(ValueError, match="overlap"):
+        TimetableBuilder(slots=["08:00-08:45", "08:30-09:15"])
+    with pytest.raises(ValueError, match="negative"):
+        TimetableBuilder().add_requirement("9-A", "Math", -1)
@@ -0,0 +1,107 @@
+import pickle
+
+from core.parent import Parent
+from core.student import Student
+from data.journal import Journal
+from data.records import from_record, to_record
+from data.sqlite_storage import SQLiteStorage
+from data.storage import DataStorage
+from models.notifications import Notification
+from utils.auth import authenticate_user, hash_password
+
+
+def make_student(student_id=1, name="Ali Valiyev", email="ali@school.uz"):
+    return Student(student_id, name, email, hash_password("secret"), "9-A")
+
+
+def test_name_change_is_recorded():
+    storage = DataStorage()
+    student = make_student()
+    storage.add_user(student)
+    version = storage.version
+    student.update_profile(full_name="Ali Karimov")
+    assert storage.version == version + 1
+    assert storage.changes_since(version) == {"users": {1: "upsert"}}
+
+
+def test_name_change_reaches_the_progress_cache():
+    storage = DataStorage()
+    student = make_student()
+    storage.add_user(student)
+    assert storage.view_student_progress(1)["full_name"] == "Ali Valiyev"
+    student.update_profile(full_name="Ali Karimov")
+    assert storage.view_student_progress(1)["full_name"] == "Ali Karimov"
+
+
+def test_name_change_survives_journal_recovery(tmp_path):
+    journal = Journal(str(tmp_path), group_size=1)
+    storage = journal.recover()
+    storage.add_user(make_student())
+    storage.users[1].update_profile(full_name="Ali Karimov")
+    journal.close()
+    with Journal(str(tmp_path)) as recovered:
+        assert recovered.recover().users[1].full_name == "Ali Karimov"
+
+
+def test_email_change_moves_the_email_index():
+    storage = DataStorage()
+    student = make_student()
+    storage.add_user(student)
+    student.update_profile(email="ali.k@school.uz")
+    assert storage.get_users_by_email("ali@school.uz") == []
+    assert authenticate_user("ali.k@school.uz", "secret", storage) == (1, "Student")
+    assert storage.verify_indexes() == []
+
+
+def test_sqlite_storage_persists_profile_changes(tmp_path):
+    path = str(tmp_path / "school.db")
+    storage = SQLiteStorage(path)
+    storage.add_user(make_student())
+    storage.get_user(1).update_profile(full_name="Ali Karimov")
+    storage.close()
+    reopened = SQLiteStorage(path)
+    assert reopened.get_user(1).full_name == "Ali Karimov"
+    reopened.close()
+
+
+def test_inbox_is_created_with_the_first_notification():
+    storage = DataStorage()
+    student = make_student()
+    storage.add_user(student)
+    assert student.view_notifications() == [] and student.unread_notification_count() == 0
+    assert not student.delete_notification(1) and not student.mark_notification_read(1)
+    assert storage.verify_indexes() == []
+    assert student.inbox(create=False) is None
+    Notification(1, "hello", 1).send(storage)
+    assert student.inbox(create=False) is not None
+    assert student.unread_notification_count() == 1
+
+
+def test_users_without_an_inbox_round_trip():
+    student = make_student()
+    copy = from_record("users", to_record("users", student))
+    assert copy.inbox(create=False) is None
+    assert pickle.loads(pickle.dumps(student)).view_notifications() == []
+
+
+def test_remove_child_updates_the_parent_index():
+    storage = DataStorage()
+    storage.add_user(make_student())
+    parent = Parent(10, "Parent", "p@school.uz", "x")
+    storage.add_user(parent)
+    parent.add_child(1, storage)
+    assert storage.get_parents_by_child(1) == [10]
+    parent.remove_child(1)
+    assert storage.get_parents_by_child(1) == []
+    assert parent.children == []
+
+
+def test_mark_notification_read_goes_through_the_storage():
+    storage = DataStorage()
+    student = make_student()
+    storage.add_user(student)
+    Notification(1, "hello", 1).send(storage)
+    version = storage.version
+    assert student.mark_notification_read(1)
+    assert storage.version == version + 1
+    assert storage.count_unread_notifications(1) == 0
@@ -18,7 +18,10 @@ def authenticate_user(email: str, password: str, storage: DataStorage) -> Option
     Returns:
         Tuple[int, str]: (user_id, role) if authenticated, None otherwise
     """
-    for user in storage.users.values():
-        if user.email == email and user.password_hash == hash_password(password):
+    password_hash = hash_password(password)
+    for user in storage.get_users_by_email(email):
+        # The index follows email changes made through update_profile; a user whose
+        # email was assigned directly may still be listed under the old address.
+        if user.email == email and user.password_hash == password_hash:
             return (user.id, user.role.value)
     return None
\ No newline at end of file
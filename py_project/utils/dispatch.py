@@ -0,0 +1,420 @@
+"""
+Background delivery of notifications.
+
+A NotificationDispatcher attached to a storage takes over delivery from
+Notification.send / Notification.broadcast: the user action that caused a
+notification only queues it, and worker threads (or an asyncio task running
+serve()) deliver the queue in batches with storage.send_notifications.
+
+The storages are not thread safe. Worker threads deliver while holding
+``dispatcher.storage_lock``; code writing to the storage from other threads at
+the same time must hold it too, or use serve() / flush() so that delivery
+happens on the caller's thread. A ConcurrentStorage (data.concurrent_storage)
+locks for itself, so code writing to it does not need storage_lock; the
+workers still wait for its write lock to deliver. SQLiteStorage connections
+are bound to the thread that opened them, so use serve() or flush() with it,
+not start().
+
+Storage writes submit notifications while holding the storage lock (a
+ConcurrentStorage write method or batch(), or storage_lock). The workers can
+only make room with that lock, so under the "block" policy a submit from a
+thread holding it does not wait: the notification is queued past max_queue
+(counted as "over_limit").
+"""
+import asyncio
+import json
+import logging
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from data.records import to_record, from_record
+from models.notifications import Notification, Priority
+
+POLICIES = ("block", "drop_low", "spill")
+
+# Delivery order: every HIGH notification goes before any MEDIUM one, and so on.
+PRIORITY_ORDER = (Priority.HIGH, Priority.MEDIUM, Priority.LOW)
+_RANK = {priority: rank for rank, priority in enumerate(PRIORITY_ORDER)}
+
+
+class _StorageLock:
+    """Reentrant lock that knows whether the calling thread holds it."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            self._local.depth = getattr(self._local, "depth", 0) + 1
+        return acquired
+
+    def release(self):
+        self._local.depth -= 1
+        self._lock.release()
+
+    def held(self) -> bool:
+        return bool(getattr(self._local, "depth", 0))
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class NotificationDispatcher:
+    def __init__(self, storage, max_queue: int = 10_000, policy: str = "block", workers: int = 1,
+                 batch_size: int = 500, spill_path: Optional[str] = None, attach: bool = True):
+        """
+        Create a dispatcher for a storage.
+
+        Args:
+            storage: DataStorage or SQLiteStorage the notifications are delivered to.
+            max_queue (int): Notifications held in memory before back-pressure applies.
+            policy (str): What submit() does when the queue is full:
+                "block" waits for room (or delivers inline if no worker thread runs,
+                or queues past max_queue if the caller holds the storage lock),
+                "drop_low" drops the newest queued notification of a lower priority
+                than the new one, or the new one if there is none,
+                "spill" writes the new one to a spill file, read back as room frees up.
+            workers (int): Worker threads started by start().
+            batch_size (int): Most notifications delivered per storage call.
+            spill_path (str, optional): Spill file; an anonymous temporary file by default.
+            attach (bool): Set storage.dispatcher so Notification.send and broadcast queue here.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown back-pressure policy {policy!r}; expected one of {POLICIES}")
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        self.storage = storage
+        self.max_queue = max_queue
+        self.policy = policy
+        self.workers = workers
+        self.batch_size = batch_size
+        self.spill_path = spill_path
+        self.storage_lock = _StorageLock()
+        # One FIFO per priority; entries are (notification, time queued).
+        self._queues = {priority: deque() for priority in PRIORITY_ORDER}
+        self._size = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self._spill_file = None
+        self._spill_read_offset = 0
+        self._spill_size = 0
+        self._counters = dict.fromkeys(
+            ("submitted", "delivered", "dropped", "spilled", "over_limit", "failed", "peak_queue_depth"), 0)
+        self._latencies = deque(maxlen=1000)
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        if attach:
+            storage.dispatcher = self
+
+    # Lifecycle
+
+    def start(self) -> "NotificationDispatcher":
+        """Start the worker threads."""
+        with self._lock:
+            self._closed = False
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"notification-dispatch-{len(self._threads)}",
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        return self
+
+    def close(self, drain: bool = True, timeout: Optional[float] = None):
+        """
+        Stop the workers and detach from the storage.
+
+        Args:
+            drain (bool): Deliver everything still queued first; otherwise it is discarded.
+            timeout (float, optional): Longest wait for the queue to drain.
+        """
+        if drain:
+            self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            if not drain:
+                self._counters["dropped"] += self._size + self._spill_size
+                for pending in self._queues.values():
+                    pending.clear()
+                self._size = 0
+                self._reset_spill()
+            self._changed.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        if getattr(self.storage, "dispatcher", None) is self:
+            self.storage.dispatcher = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Queueing
+
+    def submit(self, notifications, timeout: Optional[float] = None) -> int:
+        """
+        Queue one notification or an iterable of them.
+
+        Args:
+            notifications (Notification | Iterable[Notification]): Notifications with their IDs set.
+            timeout (float, optional): Longest wait for room under the "block" policy.
+
+        Returns:
+            int: Number of notifications queued or spilled (dropped ones are not counted).
+
+        Raises:
+            queue.Full: The "block" policy timed out.
+        """
+        if isinstance(notifications, Notification):
+            notifications = (notifications,)
+        accepted = 0
+        with self._lock:
+            queued_at = time.perf_counter()
+            try:
+                for notification in notifications:
+                    if isinstance(notification, Notification) and self._put(notification, queued_at, timeout):
+                        accepted += 1
+            finally:
+                if self._size > self._counters["peak_queue_depth"]:
+                    self._counters["peak_queue_depth"] = self._size
+                self._changed.notify_all()
+        return accepted
+
+    def _put(self, notification: Notification, queued_at: float, timeout: Optional[float]) -> bool:
+        """Queue one notification, applying the back-pressure policy (lock held)."""
+        self._counters["submitted"] += 1
+        if self._size >= self.max_queue or self._spill_size:
+            if self.policy == "block":
+                if self._threads and self._holds_storage():
+                    # Waiting would deadlock: the workers need the lock this thread holds.
+                    self._counters["over_limit"] += 1
+                else:
+                    self._wait_for_room(timeout)
+            elif self.policy == "drop_low":
+                if not self._drop_lower_than(notification.priority):
+                    self._counters["dropped"] += 1
+                    return False
+            else:
+                # Once anything is spilled, new notifications queue behind it.
+                self._spill(notification, queued_at)
+                return True
+        self._queues[self._priority(notification)].append((notification, queued_at))
+        self._size += 1
+        return True
+
+    def _holds_storage(self) -> bool:
+        """Whether the calling thread holds a lock the workers need to deliver."""
+        lock_held = getattr(self.storage, "lock_held", None)
+        return self.storage_lock.held() or (lock_held is not None and lock_held())
+
+    def _wait_for_room(self, timeout: Optional[float]):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._size >= self.max_queue:
+            if self._size > self._counters["peak_queue_depth"]:
+                self._counters["peak_queue_depth"] = self._size
+            self._changed.notify_all()
+            if not self._threads:
+                # Nobody else will make room: the caller delivers a batch itself.
+                batch = self._take_batch()
+                self._lock.release()
+                try:
+                    self._deliver(batch)
+                finally:
+                    self._lock.acquire()
+                self._finish(batch)
+                continue
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                self._counters["submitted"] -= 1
+                raise queue.Full(f"Notification queue is full ({self.max_queue})")
+            self._changed.wait(remaining)
+
+    def _drop_lower_than(self, priority) -> bool:
+        rank = _RANK.get(priority, _RANK[Priority.MEDIUM])
+        for lower in reversed(PRIORITY_ORDER[rank + 1:]):
+            if self._queues[lower]:
+                self._queues[lower].pop()
+                self._size -= 1
+                self._counters["dropped"] += 1
+                return True
+        return False
+
+    @staticmethod
+    def _priority(notification: Notification):
+        return notification.priority if notification.priority in _RANK else Priority.MEDIUM
+
+    # Spilling
+
+    def _spill(self, notification: Notification, queued_at: float):
+        if self._spill_file is None:
+            self._spill_file = open(self.spill_path, "w+b") if self.spill_path else tempfile.TemporaryFile("w+b")
+        record = to_record("notifications", notification)
+        record["queued_at"] = queued_at
+        self._spill_file.seek(0, 2)
+        self._spill_file.write(json.dumps(record).encode() + b"\n")
+        self._spill_size += 1
+        self._counters["spilled"] += 1
+
+    def _unspill(self):
+        """Move spilled notifications back into the queue while there is room."""
+        if not self._spill_size or self._size >= self.max_queue:
+            return
+        self._spill_file.flush()
+        self._spill_file.seek(self._spill_read_offset)
+        while self._spill_size and self._size < self.max_queue:
+            record = json.loads(self._spill_file.readline())
+            queued_at = record.pop("queued_at")
+            notification = from_record("notifications", record)
+            self._queues[self._priority(notification)].append((notification, queued_at))
+            self._size += 1
+            self._spill_size -= 1
+        self._spill_read_offset = self._spill_file.tell()
+        if not self._spill_size:
+            self._reset_spill()
+
+    def _reset_spill(self):
+        self._spill_size = 0
+        self._spill_read_offset = 0
+        if self._spill_file is not None:
+            self._spill_file.seek(0)
+            self._spill_file.truncate()
+
+    # Delivery
+
+    def _take_batch(self) -> List:
+        """Pop up to batch_size queued entries, highest priority first (lock held)."""
+        self._unspill()
+        batch = []
+        for priority in PRIORITY_ORDER:
+            pending = self._queues[priority]
+            while pending and len(batch) < self.batch_size:
+                batch.append(pending.popleft())
+        self._size -= len(batch)
+        self._in_flight += len(batch)
+        self._unspill()
+        self._changed.notify_all()
+        return batch
+
+    def _deliver(self, batch: List):
+        """Hand a batch to the storage (lock not held)."""
+        try:
+            with self.storage_lock:
+                self.storage.send_notifications([notification for notification, _ in batch])
+        except Exception as e:
+            logging.error(f"Notification delivery failed for {len(batch)} notifications: {str(e)}")
+            with self._lock:
+                self._counters["failed"] += len(batch)
+            return
+        now = time.perf_counter()
+        with self._lock:
+            self._counters["delivered"] += len(batch)
+            for _, queued_at in batch:
+                latency = now - queued_at
+                self._latencies.append(latency)
+                self._latency_total += latency
+                if latency > self._latency_max:
+                    self._latency_max = latency
+
+    def _finish(self, batch: List):
+        self._in_flight -= len(batch)
+        self._changed.notify_all()
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while not self._size and not self._spill_size and not self._closed:
+                    self._changed.wait()
+                if not self._size and not self._spill_size:
+                    return
+                batch = self._take_batch()
+            self._deliver(batch)
+            with self._lock:
+                self._finish(batch)
+
+    def _drain_inline(self):
+        while True:
+            with self._lock:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._deliver(batch)
+            with self._lock:
+                self._finish(batch)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until everything queued so far has been delivered.
+
+        Without running worker threads the queue is delivered on the calling
+        thread instead, which makes flush() the deterministic drain for tests.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        if not self._threads:
+            self._drain_inline()
+            return True
+        with self._lock:
+            return self._changed.wait_for(
+                lambda: not self._size and not self._spill_size and not self._in_flight, timeout)
+
+    async def serve(self, poll_interval: float = 0.01):
+        """
+        Deliver queued notifications from an asyncio task until close() is called.
+
+        Batches are delivered on the event loop's thread, between other tasks.
+        """
+        while True:
+            with self._lock:
+                batch = self._take_batch()
+                closed = self._closed
+            if batch:
+                self._deliver(batch)
+                with self._lock:
+                    self._finish(batch)
+                await asyncio.sleep(0)
+            elif closed:
+                return
+            else:
+                await asyncio.sleep(poll_interval)
+
+    # Metrics
+
+    def metrics(self) -> Dict:
+        """
+        Queue depth, counters and delivery latency (in seconds, from submit to delivery).
+
+        The latency percentiles cover the most recent 1000 deliveries.
+        """
+        with self._lock:
+            metrics = dict(self._counters)
+            metrics["queue_depth"] = self._size
+            metrics["queue_depth_by_priority"] = {p.value: len(q) for p, q in self._queues.items()}
+            metrics["spill_depth"] = self._spill_size
+            metrics["in_flight"] = self._in_flight
+            recent = sorted(self._latencies)
+            delivered = self._counters["delivered"]
+            metrics["latency"] = {
+                "average": self._latency_total / delivered if delivered else 0.0,
+                "max": self._latency_max,
+                "p50": recent[len(recent) // 2] if recent else 0.0,
+                "p95": recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0,
+            }
+        return metrics
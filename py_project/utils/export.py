@@ -1,29 +1,163 @@
 import csv
-import pandas as pd
-import sqlite3
-from typing import Dict, List, Optional
+import json
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
+from itertools import chain, islice
+from functools import partial
 import os
 import logging
+import time
+from data.storage import EXPORT_TABLES
+
+# pandas (with its XLSX writer), sqlite3 and the process pool are imported by
+# the export that needs them, so importing this module stays cheap.
+
+_logging_configured = False
+
+
+def setup_logging(filename: str = "export.log"):
+    """
+    Send log records to the export log file.
+
+    Called when an export starts rather than at import time, so processes that
+    never export do not open the file. Like logging.basicConfig, it does
+    nothing if logging was already configured.
+    """
+    global _logging_configured
+    if not _logging_configured:
+        logging.basicConfig(filename=filename, level=logging.INFO,
+                            format='%(asctime)s - %(levelname)s - %(message)s')
+        _logging_configured = True
+
+def open_rows(items) -> Iterator[Dict]:
+    """
+    Return a fresh iterator over the rows of one table.
+
+    A table is either a list of row dicts or, in streaming mode, a callable
+    that returns a new row iterator each time it is called (so every export
+    format can read the table again without keeping it in memory).
+    """
+    return iter(items()) if callable(items) else iter(items)
+
+
+def iter_chunks(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    """Group rows into lists of at most size rows."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None where unsupported."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return round(peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1)
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+_PLAIN_SQL_TYPES = frozenset((int, float, str, type(None)))
+
+
+def _sql_value(value):
+    """Convert a row value to something sqlite3 can bind; nested values become JSON."""
+    value_type = type(value)
+    if value_type in _PLAIN_SQL_TYPES:
+        return value
+    if value_type is bool:
+        return int(value)
+    if value_type in (dict, list, tuple):
+        if not value:
+            return "{}" if value_type is dict else "[]"
+        return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    if value_type is datetime:
+        return value.isoformat()
+    return str(value)
+
+
+def _sql_literal(value) -> str:
+    """Render a bound value as a SQL literal for the script file."""
+    if type(value) is str:
+        return "'" + value.replace("'", "''") + "'"
+    if value is None:
+        return "NULL"
+    return repr(value)
+
+
+# Table of the {"table", "id"} rows a delta export writes for deleted rows.
+TOMBSTONE_TABLE = "deleted"
+
+
+def _create_table_sql(table_name: str, first_row: Dict) -> str:
+    columns = []
+    for col_name, col_value in first_row.items():
+        if isinstance(col_value, int):
+            col_type = "INTEGER"
+        elif isinstance(col_value, float):
+            col_type = "REAL"
+        else:
+            col_type = "TEXT"
+        columns.append(f"{_quote_identifier(col_name)} {col_type}")
+    # Add primary key if 'id' column exists; IDs of tombstones repeat across tables
+    if table_name == TOMBSTONE_TABLE:
+        columns.append('PRIMARY KEY ("table", "id")')
+    elif "id" in first_row:
+        columns.append('PRIMARY KEY ("id")')
+    return f"CREATE TABLE {_quote_identifier(table_name)} (\n" + ",\n".join(columns) + "\n)"
+
+
+def _insert_statement(table_name: str, column_list: str, rows: List[tuple]) -> str:
+    values = ",\n".join("(" + ", ".join(_sql_literal(v) for v in row) + ")" for row in rows)
+    return f"INSERT INTO {_quote_identifier(table_name)} ({column_list}) VALUES\n{values};\n"
 
-# Set up logging
-logging.basicConfig(filename='export.log', level=logging.INFO, 
-                    format='%(asctime)s - %(levelname)s - %(message)s')
 
 class DataExporter:
-    def __init__(self, data: Dict):
+    def __init__(self, data: Dict, chunk_size: int = 1000, timestamp: Optional[str] = None,
+                 db_name: str = "eduplatform"):
         """
         Initialize the exporter with data to be exported.
         
         Args:
-            data (Dict): Dictionary containing data to export (e.g., {"users": [...], "schedules": [...]})
+            data (Dict): Dictionary containing data to export (e.g., {"users": [...], "schedules": [...]}).
+                Values may also be callables returning row iterators (see DataStorage.export_tables).
+            chunk_size (int): Rows written per batch
+            timestamp (str, optional): Prefix for the export file names (defaults to now)
+            db_name (str): Name of the SQLite database file export_to_sql writes by default
         """
+        setup_logging()
         self.data = data
-        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.chunk_size = chunk_size
+        self.timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.db_name = db_name
         self.export_dir = "exports"
+        # Per-format throughput of the last run: {"csv": {"rows": ..., "rows_per_second": ..., ...}}
+        self.stats: Dict[str, Dict] = {}
+        # Per-format error message of the last failed run: {"csv": "..."}
+        self.errors: Dict[str, str] = {}
+        # Per-task status and timing of the last export_all run
+        self.task_results: List[Dict] = []
         
         # Create export directory if it doesn't exist
         os.makedirs(self.export_dir, exist_ok=True)
+
+    def _record_stats(self, file_type: str, rows: int, started: float):
+        seconds = time.perf_counter() - started
+        self.stats[file_type] = {
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(rows / seconds) if seconds > 0 else rows,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        logging.info(f"{file_type} export stats: {self.stats[file_type]}")
     
     def export_to_csv(self) -> bool:
         """
@@ -33,134 +167,370 @@ class DataExporter:
             bool: True if export successful, False otherwise
         """
         try:
+            started = time.perf_counter()
+            total_rows = 0
             for key, items in self.data.items():
-                if not items:
+                rows = open_rows(items)
+                first = next(rows, None)
+                if first is None:
                     continue
                     
                 filename = os.path.join(self.export_dir, f"{self.timestamp}_{key}.csv")
                 with open(filename, "w", newline="", encoding="utf-8") as f:
-                    writer = csv.DictWriter(f, fieldnames=items[0].keys())
+                    writer = csv.DictWriter(f, fieldnames=first.keys())
                     writer.writeheader()
-                    writer.writerows(items)
+                    for chunk in iter_chunks(chain([first], rows), self.chunk_size):
+                        writer.writerows(chunk)
+                        total_rows += len(chunk)
             
+            self._record_stats("csv", total_rows, started)
             logging.info(f"Successfully exported data to CSV files with timestamp {self.timestamp}")
             return True
         except Exception as e:
+            self.errors["csv"] = str(e)
             logging.error(f"CSV export failed: {str(e)}")
             return False
     
     def export_to_xlsx(self) -> bool:
         """
         Export data to a single XLSX file with multiple sheets.
+
+        Rows are read in chunks, but the workbook itself is kept in memory until
+        it is saved, so unlike CSV and SQL this export does not stream.
         
         Returns:
             bool: True if export successful, False otherwise
         """
         try:
+            import pandas as pd
+            started = time.perf_counter()
+            total_rows = 0
             filename = os.path.join(self.export_dir, f"{self.timestamp}_export.xlsx")
             with pd.ExcelWriter(filename) as writer:
                 for key, items in self.data.items():
-                    if not items:
-                        continue
-                        
-                    df = pd.DataFrame(items)
-                    df.to_excel(writer, sheet_name=key, index=False)
+                    start_row = 0
+                    for chunk in iter_chunks(open_rows(items), self.chunk_size):
+                        df = pd.DataFrame(chunk)
+                        # Only the first chunk writes the header row.
+                        df.to_excel(writer, sheet_name=key, index=False,
+                                    startrow=start_row, header=start_row == 0)
+                        start_row += len(chunk) + (1 if start_row == 0 else 0)
+                        total_rows += len(chunk)
             
+            self._record_stats("xlsx", total_rows, started)
             logging.info(f"Successfully exported data to XLSX file with timestamp {self.timestamp}")
             return True
         except Exception as e:
+            self.errors["xlsx"] = str(e)
             logging.error(f"XLSX export failed: {str(e)}")
             return False
     
-    def export_to_sql(self, db_name: str = "eduplatform") -> bool:
+    def export_to_sql(self, db_name: Optional[str] = None, batch_size: Optional[int] = None,
+                      statement_rows: int = 500) -> bool:
         """
-        Generate SQL statements for SSMS and optionally create a SQLite database.
+        Load the data into a SQLite database and write a matching SQL script for SSMS.
+        
+        Each table is bulk loaded with parameterized executemany calls inside a
+        single transaction; indexes on the *_id columns are created after the
+        load. The script uses multi-row INSERT statements. Both outputs only
+        depend on the data, so exporting the same data twice gives identical files.
         
         Args:
-            db_name (str): Name for the SQLite database file
+            db_name (str, optional): Name for the SQLite database file, replaced if it
+                exists (defaults to the exporter's db_name)
+            batch_size (int, optional): Rows per executemany call (defaults to chunk_size)
+            statement_rows (int): Rows per INSERT statement in the SQL script
             
         Returns:
             bool: True if export successful, False otherwise
         """
+        import sqlite3
+        conn = None
         try:
-            # Create SQLite database file
+            started = time.perf_counter()
+            total_rows = 0
+            batch_size = batch_size or self.chunk_size
+            db_name = db_name or self.db_name
+
+            # Start from an empty database file
             sqlite_file = os.path.join(self.export_dir, f"{db_name}.db")
-            conn = sqlite3.connect(sqlite_file)
-            cursor = conn.cursor()
-            
+            for path in (sqlite_file, sqlite_file + "-journal", sqlite_file + "-wal"):
+                if os.path.exists(path):
+                    os.remove(path)
+            conn = sqlite3.connect(sqlite_file, isolation_level=None)
+            # The file is rebuilt from scratch on failure, so skip the rollback journal.
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("BEGIN")
+
             # Generate SQL statements file
             sql_file = os.path.join(self.export_dir, f"{self.timestamp}_sql_export.sql")
-            with open(sql_file, "w", encoding="utf-8") as f:
-                # Write table creation and data insertion statements
+            with open(sql_file, "w", encoding="utf-8", newline="\n") as f:
+                index_sql = []
                 for table_name, items in self.data.items():
-                    if not items:
+                    rows = open_rows(items)
+                    first = next(rows, None)
+                    if first is None:
                         continue
-                    
-                    # Generate CREATE TABLE statement
-                    columns = []
-                    for col_name, col_value in items[0].items():
-                        if isinstance(col_value, int):
-                            col_type = "INTEGER"
-                        elif isinstance(col_value, float):
-                            col_type = "REAL"
-                        else:
-                            col_type = "TEXT"
-                        columns.append(f"{col_name} {col_type}")
-                    
-                    create_table_sql = f"CREATE TABLE IF NOT EXISTS {table_name} (\n"
-                    create_table_sql += ",\n".join(columns)
-                    
-                    # Add primary key if 'id' column exists
-                    if 'id' in items[0]:
-                        create_table_sql += ",\nPRIMARY KEY (id)"
-                    
-                    create_table_sql += "\n);\n\n"
-                    f.write(create_table_sql)
-                    
-                    # Generate INSERT statements
-                    for item in items:
-                        columns = ", ".join(item.keys())
-                        values = ", ".join([f"'{str(v)}'" if not isinstance(v, (int, float)) else str(v) for v in item.values()])
-                        insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({values});\n"
-                        f.write(insert_sql)
-                    
+
+                    columns = list(first.keys())
+                    create_table_sql = _create_table_sql(table_name, first)
+                    conn.execute(create_table_sql)
+                    f.write(create_table_sql + ";\n\n")
+
+                    column_list = ", ".join(_quote_identifier(col) for col in columns)
+                    insert_sql = (f"INSERT INTO {_quote_identifier(table_name)} ({column_list}) "
+                                  f"VALUES ({', '.join('?' * len(columns))})")
+                    statement = []
+                    for chunk in iter_chunks(chain([first], rows), batch_size):
+                        params = [tuple(_sql_value(item.get(col)) for col in columns) for item in chunk]
+                        conn.executemany(insert_sql, params)
+                        for values in params:
+                            statement.append(values)
+                            if len(statement) == statement_rows:
+                                f.write(_insert_statement(table_name, column_list, statement))
+                                statement = []
+                        total_rows += len(chunk)
+                    if statement:
+                        f.write(_insert_statement(table_name, column_list, statement))
                     f.write("\n")
-            
-            logging.info(f"Successfully generated SQL statements with timestamp {self.timestamp}")
+
+                    # Foreign-key style columns are indexed once the table is loaded
+                    for col in columns:
+                        if col.endswith("_id"):
+                            index_sql.append(
+                                f"CREATE INDEX {_quote_identifier(f'idx_{table_name}_{col}')} "
+                                f"ON {_quote_identifier(table_name)} ({_quote_identifier(col)})")
+
+                for sql in index_sql:
+                    conn.execute(sql)
+                    f.write(sql + ";\n")
+
+            conn.execute("COMMIT")
+            self._record_stats("sql", total_rows, started)
+            logging.info(f"Successfully exported SQLite database and SQL statements with timestamp {self.timestamp}")
             return True
         except Exception as e:
+            self.errors["sql"] = str(e)
             logging.error(f"SQL export failed: {str(e)}")
             return False
         finally:
             if conn:
                 conn.close()
     
-    def export_all(self) -> bool:
+    def export_all(self, parallel: bool = False, max_workers: Optional[int] = None,
+                   executor: str = "process") -> bool:
         """
         Export data to all formats (CSV, XLSX, SQL).
         
+        In parallel mode every CSV table, the XLSX workbook and the SQL export
+        run as separate tasks on a pool, so the wall-clock time is close to the
+        slowest task instead of the sum. File names are the same as in a
+        sequential run. A process pool needs picklable data, so streamed tables
+        are materialized once before they are handed to the workers; with the
+        "thread" executor they are streamed by each task. On Windows, process
+        pools must be started from under an ``if __name__ == "__main__":`` guard.
+        
+        Args:
+            parallel (bool): Run the export tasks concurrently
+            max_workers (int, optional): Pool size (defaults to the executor's default)
+            executor (str): "process" or "thread"
+        
         Returns:
             bool: True if all exports were successful, False otherwise
         """
-        csv_success = self.export_to_csv()
-        xlsx_success = self.export_to_xlsx()
-        sql_success = self.export_to_sql()
-        
-        return csv_success and xlsx_success and sql_success
+        if not parallel:
+            self.task_results = [_run_export_task(file_type, self.data, file_type, self.timestamp, self.chunk_size,
+                                                  self.db_name)
+                                 for file_type in EXPORT_FORMATS]
+        else:
+            if executor not in ("process", "thread"):
+                raise ValueError(f"Unsupported executor: {executor}")
+            data = self.data
+            if executor == "process":
+                data = {key: items if isinstance(items, list) else list(open_rows(items))
+                        for key, items in data.items()}
+            # Slowest tasks first, so they are not queued behind the small ones
+            tasks = [("xlsx", data, "xlsx"), ("sql", data, "sql")]
+            tasks += [(f"csv:{key}", {key: items}, "csv") for key, items in data.items()]
+            if executor == "process":
+                from concurrent.futures import ProcessPoolExecutor as pool_class
+            else:
+                from concurrent.futures import ThreadPoolExecutor as pool_class
+            with pool_class(max_workers=max_workers) as pool:
+                futures = [(name, pool.submit(_run_export_task, name, task_data, file_type,
+                                              self.timestamp, self.chunk_size, self.db_name))
+                           for name, task_data, file_type in tasks]
+                self.task_results = []
+                for name, future in futures:
+                    try:
+                        self.task_results.append(future.result())
+                    except Exception as e:
+                        # The task never ran (e.g. the data could not be pickled)
+                        self.task_results.append({"task": name, "status": "failed", "seconds": None,
+                                                  "stats": None, "error": str(e)})
+
+        for result in self.task_results:
+            if result["stats"]:
+                self.stats[result["task"]] = result["stats"]
+            if result["error"]:
+                logging.error(f"Export task {result['task']} failed: {result['error']}")
+            logging.info(f"Export task {result['task']}: {result['status']} in {result['seconds']}s")
+        return all(result["status"] == "ok" for result in self.task_results)
+
+
+EXPORT_FORMATS = ("csv", "xlsx", "sql")
+
+
+def _run_export_task(name: str, data: Dict, file_type: str, timestamp: str, chunk_size: int,
+                     db_name: str = "eduplatform") -> Dict:
+    """Run one export format over data and report its status and timing (runs in pool workers)."""
+    exporter = DataExporter(data, chunk_size=chunk_size, timestamp=timestamp, db_name=db_name)
+    started = time.perf_counter()
+    error = None
+    try:
+        success = getattr(exporter, f"export_to_{file_type}")()
+        if not success:
+            # The export methods log and swallow their own exceptions.
+            error = exporter.errors.get(file_type, "export failed")
+    except Exception as e:
+        success, error = False, str(e)
+    return {
+        "task": name,
+        "status": "ok" if success else "failed",
+        "seconds": round(time.perf_counter() - started, 3),
+        "stats": exporter.stats.get(file_type),
+        "error": error,
+    }
+
+def _read_watermark(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_watermark(path: str, epoch: Optional[str] = None) -> Optional[int]:
+    """
+    Read the version saved by the last delta export.
+
+    Args:
+        path (str): The watermark file
+        epoch (str, optional): Epoch of the storage being exported (DataStorage.epoch);
+            a watermark saved for another epoch counts as none
+
+    Returns:
+        Optional[int]: The version, or None if there is no watermark for the epoch
+    """
+    saved = _read_watermark(path)
+    if saved is None or (epoch is not None and saved.get("epoch") != epoch):
+        return None
+    return int(saved["version"])
+
+
+def save_watermark(path: str, version: int, epoch: Optional[str] = None) -> bool:
+    """
+    Atomically save the version a delta export synced up to.
+
+    A watermark is never moved back within one epoch: if a later version was
+    saved already (by an export that overlapped this one), it is kept.
+
+    Returns:
+        bool: True if the watermark was saved, False if a later one was kept
+    """
+    saved = _read_watermark(path)
+    if saved is not None and saved.get("epoch") == epoch and int(saved["version"]) > version:
+        logging.warning(f"Watermark {saved['version']} is ahead of {version}; keeping it")
+        return False
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "epoch": epoch, "saved_at": datetime.now().isoformat()}, f)
+    os.replace(tmp_path, path)
+    return True
+
+
+def export_changes(storage, file_type: str = "csv", since: Optional[int] = None,
+                   watermark_file: str = os.path.join("exports", "watermark.json")) -> bool:
+    """
+    Export only the rows changed since the last delta export.
+    
+    Changed rows are written per table in the usual layout, and deleted rows
+    as tombstones in a "deleted" table ({"table", "id"}). The SQL format goes
+    to a database of its own per run ("<timestamp>_eduplatform.db"), so the
+    full export's eduplatform.db is left alone. The storage version
+    the export covers is saved to watermark_file, with the storage's epoch,
+    only if the export succeeds, so a failed run is simply repeated by the next
+    one; the change log up to it is then compacted.
+
+    When the changes since the watermark cannot be told (no watermark for this
+    storage's epoch, e.g. after a restart without a journal, or a log
+    compacted past it), every row is exported instead, to files named
+    "<timestamp>_full" rather than "<timestamp>_delta".
+    
+    Args:
+        storage (DataStorage): Storage whose change journal is read
+        file_type (str): File type ("csv", "xlsx", "sql", or "all")
+        since (int, optional): Watermark to export from (defaults to the saved one)
+        watermark_file (str): Where the watermark is kept between runs
+    
+    Returns:
+        bool: True if export successful, False otherwise
+    """
+    setup_logging()
+    epoch = getattr(storage, "epoch", None)
+    if since is None:
+        since = load_watermark(watermark_file, epoch)
+    version = storage.version
+    changes = None
+    if since is not None:
+        try:
+            changes = storage.changes_since(since)
+        except ValueError as e:
+            logging.warning(f"Delta export from version {since} not possible: {e}")
+
+    if changes is None:
+        data = storage.export_tables()
+        data[TOMBSTONE_TABLE] = []
+        logging.info(f"Full export at version {version}")
+        kind = "full"
+    else:
+        data = {}
+        tombstones = []
+        for table in EXPORT_TABLES:
+            ops = changes.get(table, {})
+            upserts = [item_id for item_id, op in ops.items() if op == "upsert"]
+            tombstones.extend({"table": table, "id": item_id} for item_id, op in ops.items() if op == "delete")
+            data[table] = partial(storage.iter_export_rows, table, upserts)
+        data[TOMBSTONE_TABLE] = tombstones
+        logging.info(f"Delta export of versions {since}..{version} "
+                     f"({sum(len(ops) for ops in changes.values())} changed rows)")
+        kind = "delta"
+    timestamp = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{kind}"
+    if not export_data(data, file_type, filename=f"{timestamp}_eduplatform", timestamp=timestamp):
+        return False
+    save_watermark(watermark_file, version, epoch)
+    storage.compact_change_log(version)
+    return True
+
 
-def export_data(data: Dict, file_type: str = "all", filename: Optional[str] = None) -> bool:
+def export_data(data: Dict, file_type: str = "all", filename: Optional[str] = None, chunk_size: int = 1000,
+                parallel: bool = False, timestamp: Optional[str] = None) -> bool:
     """
     Export system data to specified file type(s).
     
     Args:
         data (Dict): Dictionary containing data to export (e.g., {"users": [...], "schedules": [...]})
         file_type (str): File type ("csv", "xlsx", "sql", or "all")
-        filename (str, optional): Base filename for the export (without extension)
+        filename (str, optional): Name of the SQLite database file (without extension;
+            "eduplatform" by default)
+        chunk_size (int): Rows written per batch
+        parallel (bool): With file_type "all", run the formats and CSV tables on a process pool
+        timestamp (str, optional): Prefix for the export file names (defaults to now)
     
     Returns:
         bool: True if export successful, False otherwise
     """
-    exporter = DataExporter(data)
+    exporter = DataExporter(data, chunk_size=chunk_size, timestamp=timestamp, db_name=filename or "eduplatform")
     
     if file_type.lower() == "csv":
         return exporter.export_to_csv()
@@ -169,7 +539,7 @@ def export_data(data: Dict, file_type: str = "all", filename: Optional[str] = No
     elif file_type.lower() == "sql":
         return exporter.export_to_sql()
     elif file_type.lower() == "all":
-        return exporter.export_all()
+        return exporter.export_all(parallel=parallel)
     else:
         logging.error(f"Unsupported file type: {file_type}")
         return False
\ No newline at end of file
@@ -0,0 +1,11 @@
+import sys
+
+
+def intern_string(value):
+    """
+    Return the interned copy of a string, or the value unchanged if it is not one.
+
+    Subjects, class IDs, days and similar values repeat across thousands of
+    objects; interning makes them all share one string object.
+    """
+    return sys.intern(value) if type(value) is str else value
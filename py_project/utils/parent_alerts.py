@@ -0,0 +1,178 @@
+"""
+Alerts to parents about their children's low grades and missed deadlines.
+
+ParentAlerts remembers each alert it has sent by a key, (parent ID, child ID,
+"grade", grade ID) or (parent ID, child ID, "assignment", assignment ID), so
+whether an alert is new is a set lookup instead of a search through the
+parent's inbox. Attached to a storage, it alerts the parents of a student as
+soon as a low grade is stored or a grade is lowered (add_grade,
+Grade.update_grade). Missed deadlines come with the clock rather than with
+an event: run(now) checks every parent of the school in one pass over their
+children's low grades and unsubmitted assignments, and sends all new alerts
+with one storage.dispatch call.
+
+Alerts sent before the ParentAlerts was created (e.g. before a restart) are
+recognized by their message in the parents' inboxes.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from data.lazy import model_classes
+from models.notifications import Notification, Priority
+
+# Grades at or below this value are reported to the parents.
+LOW_GRADE = 3
+
+
+def low_grade_message(child_id: int, grade) -> str:
+    return f"Child {child_id}: Low grade ({grade.value}) in {grade.subject}"
+
+
+def missed_deadline_message(child_id: int, assignment) -> str:
+    return f"Child {child_id}: Missed deadline for {assignment.title} in {assignment.subject}"
+
+
+class ParentAlerts:
+    def __init__(self, storage, low_grade: int = LOW_GRADE, attach: bool = True):
+        """
+        Create the alert state of a storage.
+
+        Args:
+            storage: DataStorage, ConcurrentStorage or SQLiteStorage.
+            low_grade (int): Grades at or below this value are reported.
+            attach (bool): Set storage.parent_alerts so stored grades are checked as they come in.
+        """
+        self.storage = storage
+        self.low_grade = low_grade
+        self._sent = set()
+        # assignment ID -> (deadline as stored, parsed deadline or None)
+        self._deadlines: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._seed()
+        if attach:
+            storage.parent_alerts = self
+
+    @classmethod
+    def of(cls, storage) -> "ParentAlerts":
+        """The ParentAlerts attached to a storage, attaching a new one if there is none."""
+        alerts = getattr(storage, "parent_alerts", None)
+        return alerts if alerts is not None else cls(storage)
+
+    def __len__(self) -> int:
+        """Number of alerts sent (or found in the inboxes when created)."""
+        return len(self._sent)
+
+    def _parents(self):
+        return (user for user in self.storage.users.values() if isinstance(user, model_classes.Parent))
+
+    def _deadline(self, assignment) -> Optional[datetime]:
+        cached = self._deadlines.get(assignment.id)
+        if cached is not None and cached[0] == assignment.deadline:
+            return cached[1]
+        try:
+            deadline = datetime.fromisoformat(assignment.deadline)
+        except (TypeError, ValueError):
+            deadline = None
+        self._deadlines[assignment.id] = (assignment.deadline, deadline)
+        return deadline
+
+    def _candidates(self, child_id: int, now: Optional[datetime]) -> List[tuple]:
+        """
+        (kind, item ID, message, priority) of everything about a child worth an alert: low
+        grades, and assignments not submitted by their deadline (by now; any deadline if None).
+        """
+        storage = self.storage
+        candidates = [("grade", grade.id, low_grade_message(child_id, grade), Priority.HIGH)
+                      for grade in storage.get_grades_by_student(child_id) if grade.value <= self.low_grade]
+        student = storage.get_user(child_id)
+        if isinstance(student, model_classes.Student):
+            for assignment_id, status in student.assignments.items():
+                if isinstance(status, dict) and status.get("status") == "Submitted":
+                    continue
+                assignment = storage.get_assignment(assignment_id)
+                if assignment is None:
+                    continue
+                deadline = self._deadline(assignment)
+                if deadline is not None and (now is None or deadline < now):
+                    candidates.append(("assignment", assignment_id, missed_deadline_message(child_id, assignment),
+                                       Priority.MEDIUM))
+        return candidates
+
+    def _seed(self):
+        """Take the alerts already in the parents' inboxes as sent."""
+        for parent in self._parents():
+            messages = {n.message for n in self.storage.get_notifications_by_user(parent.id)}
+            if not messages:
+                continue
+            for child_id in parent.children:
+                for kind, item_id, message, _ in self._candidates(child_id, None):
+                    if message in messages:
+                        self._sent.add((parent.id, child_id, kind, item_id))
+
+    def _claim(self, parent_id: int, child_id: int, candidates: Iterable[tuple]) -> List[tuple]:
+        """The candidates not alerted before, marked as sent: (recipient, message, priority)."""
+        new = []
+        with self._lock:
+            for kind, item_id, message, priority in candidates:
+                key = (parent_id, child_id, kind, item_id)
+                if key not in self._sent:
+                    self._sent.add(key)
+                    new.append((parent_id, message, priority))
+        return new
+
+    def _send(self, alerts: List[tuple]) -> List[Notification]:
+        if not alerts:
+            return []
+        storage = self.storage
+        created_at = datetime.now().isoformat()
+        notifications = [Notification(notification_id, message, recipient_id, created_at, priority)
+                         for notification_id, (recipient_id, message, priority)
+                         in zip(storage.reserve_ids("notifications", len(alerts)), alerts)]
+        storage.dispatch(notifications)
+        return notifications
+
+    def grade_stored(self, grade) -> List[Notification]:
+        """Called by the storage when a grade was added or its value changed: alert the parents if it is low."""
+        if grade.value > self.low_grade:
+            return []
+        candidate = ("grade", grade.id, low_grade_message(grade.student_id, grade), Priority.HIGH)
+        alerts = []
+        for parent_id in self.storage.get_parents_by_child(grade.student_id):
+            alerts += self._claim(parent_id, grade.student_id, (candidate,))
+        return self._send(alerts)
+
+    def check(self, parent, child_ids: Iterable[int] = None, now: datetime = None) -> List[Notification]:
+        """
+        Send a parent the alerts about their children that were not sent yet.
+
+        Args:
+            parent (Parent): The parent.
+            child_ids (Iterable[int], optional): Children to check; all of the parent's by default.
+            now (datetime, optional): Deadlines before this are missed; datetime.now() by default.
+        """
+        now = now or datetime.now()
+        alerts = []
+        for child_id in parent.children if child_ids is None else child_ids:
+            alerts += self._claim(parent.id, child_id, self._candidates(child_id, now))
+        return self._send(alerts)
+
+    def run(self, now: datetime = None) -> List[Notification]:
+        """
+        Send every parent the alerts about their children that were not sent yet.
+
+        Each child is looked at once, however many parents they have.
+
+        Args:
+            now (datetime, optional): Deadlines before this are missed; datetime.now() by default.
+        """
+        now = now or datetime.now()
+        by_child = {}
+        alerts = []
+        for parent in self._parents():
+            for child_id in parent.children:
+                candidates = by_child.get(child_id)
+                if candidates is None:
+                    candidates = by_child[child_id] = self._candidates(child_id, now)
+                alerts += self._claim(parent.id, child_id, candidates)
+        return self._send(alerts)
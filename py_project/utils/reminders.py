@@ -0,0 +1,172 @@
+"""
+Deadline reminders for assignments.
+
+DeadlineReminders keeps one entry per assignment and reminder offset in a
+min-heap ordered by the time the reminder is due (deadline - offset).
+tick(now) pops the entries that are due and sends each reminder to every
+student of the assignment's class, all with one storage.dispatch call, so a
+tick costs time in proportion to the reminders it sends, not to the number of
+assignments.
+
+Attached to a storage, the reminders follow add_assignment and
+remove_assignment. Entries of replaced or removed assignments stay in the
+heap and are skipped when they come up. An assignment whose deadline was
+changed in place is rescheduled when its old reminder comes up; to move a
+deadline earlier, add the assignment to the storage again.
+"""
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from models.notifications import Notification, Priority
+
+DEFAULT_OFFSETS = (timedelta(hours=24), timedelta(hours=1))
+
+
+def _parse_deadline(deadline) -> Optional[datetime]:
+    if isinstance(deadline, datetime):
+        return deadline
+    if not deadline:
+        return None
+    try:
+        return datetime.fromisoformat(deadline)
+    except (TypeError, ValueError):
+        return None
+
+
+class DeadlineReminders:
+    def __init__(self, storage, offsets: Sequence[timedelta] = DEFAULT_OFFSETS,
+                 priority: Priority = Priority.HIGH, attach: bool = True):
+        """
+        Create a reminder schedule for the assignments of a storage.
+
+        Args:
+            storage: DataStorage, ConcurrentStorage or SQLiteStorage.
+            offsets (Sequence[timedelta]): How long before a deadline reminders are sent.
+            priority (Priority): Priority of the reminder notifications.
+            attach (bool): Set storage.reminders so added and removed assignments are followed.
+        """
+        offsets = sorted(set(offsets))
+        if not offsets or offsets[0] <= timedelta(0):
+            raise ValueError("Reminder offsets must be positive")
+        self.storage = storage
+        self.offsets = tuple(offsets)
+        self.priority = priority
+        # (remind at, generation, assignment ID, offset); generation tells current entries from stale ones.
+        self._heap = []
+        # assignment ID -> (deadline as stored, generation of its entries)
+        self._scheduled: Dict[int, tuple] = {}
+        self._generations = itertools.count()
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("ticks", "sent", "notifications", "skipped"), 0)
+        for assignment in storage.assignments.values():
+            self.schedule(assignment)
+        if attach:
+            storage.reminders = self
+
+    def __len__(self) -> int:
+        """Number of assignments with a deadline scheduled."""
+        return len(self._scheduled)
+
+    def schedule(self, assignment):
+        """Schedule (or reschedule) the reminders of an assignment; unchanged deadlines are left alone."""
+        with self._lock:
+            self._schedule(assignment)
+
+    def _schedule(self, assignment):
+        current = self._scheduled.get(assignment.id)
+        if current is not None and current[0] == assignment.deadline:
+            return
+        deadline = _parse_deadline(assignment.deadline)
+        if deadline is None:
+            self._scheduled.pop(assignment.id, None)
+            return
+        generation = next(self._generations)
+        self._scheduled[assignment.id] = (assignment.deadline, generation)
+        for offset in self.offsets:
+            heapq.heappush(self._heap, (deadline - offset, generation, assignment.id, offset))
+        if len(self._heap) > 2 * len(self.offsets) * len(self._scheduled) + 64:
+            # Mostly stale entries of replaced deadlines: drop them.
+            self._heap = [entry for entry in self._heap
+                          if self._scheduled.get(entry[2], (None, None))[1] == entry[1]]
+            heapq.heapify(self._heap)
+
+    def cancel(self, assignment_id: int):
+        """Drop the reminders of an assignment."""
+        with self._lock:
+            self._scheduled.pop(assignment_id, None)
+
+    def next_due(self) -> Optional[datetime]:
+        """When the earliest scheduled reminder is due (possibly one that will be skipped), or None."""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def _due(self, now: datetime) -> List[tuple]:
+        """Pop the entries due by now; the (assignment, deadline) pairs to send reminders of."""
+        candidates = {}
+        with self._lock:
+            self._counters["ticks"] += 1
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                _, generation, assignment_id, _ = heapq.heappop(heap)
+                current = self._scheduled.get(assignment_id)
+                if current is not None and current[1] == generation:
+                    # Several reminders of one deadline may be due (after a pause
+                    # longer than the gap between offsets); one is enough.
+                    candidates.setdefault(assignment_id, current[0])
+        # The storage is read outside the lock: storage writers call schedule().
+        due = []
+        for assignment_id, scheduled_deadline in candidates.items():
+            assignment = self.storage.get_assignment(assignment_id)
+            if assignment is None:
+                self.cancel(assignment_id)
+            elif assignment.deadline != scheduled_deadline:
+                self.schedule(assignment)
+            else:
+                deadline = _parse_deadline(assignment.deadline)
+                if deadline > now:
+                    due.append((assignment, deadline))
+                else:
+                    with self._lock:
+                        self._counters["skipped"] += 1
+        return due
+
+    def tick(self, now: datetime = None) -> List[Notification]:
+        """
+        Send the reminders that are due.
+
+        If several reminders of one assignment are due, only one is sent;
+        none are sent once the deadline has passed.
+
+        Args:
+            now (datetime, optional): Current time; datetime.now() by default.
+
+        Returns:
+            List[Notification]: The reminders sent, one per student and assignment.
+        """
+        now = now or datetime.now()
+        due = self._due(now)
+        if not due:
+            return []
+        storage = self.storage
+        recipients = [(assignment, deadline, storage.get_students_by_class(assignment.class_id))
+                      for assignment, deadline in due]
+        ids = iter(storage.reserve_ids("notifications", sum(len(students) for _, _, students in recipients)))
+        created_at = now.isoformat()
+        notifications = []
+        for assignment, deadline, students in recipients:
+            message = f"Reminder: Assignment '{assignment.title}' is due {deadline:%Y-%m-%d %H:%M}."
+            notifications += [Notification(next(ids), message, student_id, created_at, self.priority)
+                              for student_id in students]
+        storage.dispatch(notifications)
+        with self._lock:
+            self._counters["sent"] += len(due)
+            self._counters["notifications"] += len(notifications)
+        return notifications
+
+    def stats(self) -> Dict[str, int]:
+        """Ticks, reminders and notifications sent, deadlines passed before their reminder, and sizes."""
+        with self._lock:
+            return {**self._counters, "scheduled": len(self._scheduled), "heap_size": len(self._heap)}
@@ -0,0 +1,257 @@
+"""
+Generation of a school-wide timetable.
+
+A TimetableBuilder is told how many hours a week each class has of each
+subject and which teachers can teach what, and builds one conflict-free
+Schedule per class and day: no class and no teacher has two lessons at the
+same time, and no lesson is put in a slot its teacher is unavailable for.
+
+Lessons are placed greedily, hardest first (the teachers with the most
+hours), preferring days on which the class does not have the subject yet.
+A lesson that fits nowhere is placed by moving one lesson of the class out
+of the way. If lessons still cannot be placed the build starts over with a
+different shuffle, a few times, before giving up.
+"""
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from data.intervals import parse_time_slot
+from models.schedule import Schedule
+from utils.interning import intern_string
+from utils.validation import validate_time_slot
+
+DEFAULT_DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+DEFAULT_SLOTS = (
+    "08:00-08:45",
+    "08:55-09:40",
+    "09:50-10:35",
+    "10:45-11:30",
+    "11:40-12:25",
+    "12:35-13:20",
+    "13:30-14:15",
+)
+
+
+class TimetableError(ValueError):
+    """The requirements cannot be met."""
+
+
+class TimetableBuilder:
+    def __init__(self, days: Iterable[str] = DEFAULT_DAYS, slots: Iterable[str] = DEFAULT_SLOTS,
+                 seed: Optional[int] = None, attempts: int = 10):
+        """
+        Create a builder.
+
+        Args:
+            days (Iterable[str]): School days, in order.
+            slots (Iterable[str]): Lesson time slots of a day, 'HH:MM-HH:MM', not overlapping.
+            seed (int, optional): Seed for a reproducible timetable; random if omitted.
+            attempts (int): Builds tried before giving up.
+
+        Raises:
+            ValueError: A slot is malformed or slots overlap.
+        """
+        self.days = tuple(days)
+        self.slots = tuple(slots)
+        for slot in self.slots:
+            if not validate_time_slot(slot) or parse_time_slot(slot) is None:
+                raise ValueError(f"Invalid time slot {slot!r}, expected 'HH:MM-HH:MM'")
+        intervals = sorted(parse_time_slot(slot) for slot in self.slots)
+        if any(previous[1] > current[0] for previous, current in zip(intervals, intervals[1:])):
+            raise ValueError("Time slots overlap")
+        self.seed = seed
+        self.attempts = attempts
+        self._requirements: List[Tuple[str, str, int, Optional[int]]] = []
+        self._teachers: Dict[int, Dict] = {}
+
+    @property
+    def slot_count(self) -> int:
+        return len(self.days) * len(self.slots)
+
+    def add_teacher(self, teacher_id: int, subjects: Iterable[str] = (),
+                    unavailable: Iterable[Tuple[str, str]] = (), max_hours: Optional[int] = None):
+        """
+        Register a teacher.
+
+        Args:
+            teacher_id (int): Teacher's user ID.
+            subjects (Iterable[str]): Subjects the teacher can be given by add_requirement.
+            unavailable (Iterable[Tuple[str, str]]): (day, time slot) pairs the teacher cannot teach.
+            max_hours (int, optional): Most lessons a week the teacher can be given.
+        """
+        blocked = set()
+        for day, slot in unavailable:
+            if day in self.days and slot in self.slots:
+                blocked.add(self._slot_index(day, slot))
+        self._teachers[teacher_id] = {
+            "subjects": set(subjects),
+            "unavailable": blocked,
+            "max_hours": self.slot_count if max_hours is None else max_hours,
+        }
+
+    def add_requirement(self, class_id: str, subject: str, hours: int, teacher_id: Optional[int] = None):
+        """
+        Require a class to have a subject for a number of lessons a week.
+
+        Args:
+            class_id (str): The class.
+            subject (str): The subject.
+            hours (int): Lessons a week.
+            teacher_id (int, optional): Who teaches it; by default the least loaded
+                registered teacher of the subject, chosen when the timetable is built.
+        """
+        if hours < 0:
+            raise ValueError("hours must not be negative")
+        if teacher_id is not None and teacher_id not in self._teachers:
+            self.add_teacher(teacher_id)
+        self._requirements.append((class_id, subject, hours, teacher_id))
+
+    def _slot_index(self, day: str, slot: str) -> int:
+        return self.days.index(day) * len(self.slots) + self.slots.index(slot)
+
+    # Building
+
+    def _assign_teachers(self) -> List[Tuple[str, str, int, int]]:
+        """Give every requirement without a teacher the least loaded teacher of its subject."""
+        load = {teacher_id: 0 for teacher_id in self._teachers}
+        for _, _, hours, teacher_id in self._requirements:
+            if teacher_id is not None:
+                load[teacher_id] += hours
+        assigned = []
+        for class_id, subject, hours, teacher_id in self._requirements:
+            if teacher_id is None:
+                candidates = [t for t, info in self._teachers.items()
+                              if subject in info["subjects"] and load[t] + hours <= info["max_hours"]]
+                if not candidates:
+                    raise TimetableError(f"No teacher available for {hours} hours of {subject} in class {class_id}")
+                teacher_id = min(candidates, key=lambda t: (load[t], t))
+                load[teacher_id] += hours
+            assigned.append((class_id, subject, hours, teacher_id))
+        for teacher_id, hours in load.items():
+            if hours > self._teachers[teacher_id]["max_hours"]:
+                raise TimetableError(f"Teacher {teacher_id} is given {hours} hours, more than their maximum")
+        return assigned
+
+    def _place(self, requirements, rng: random.Random):
+        """
+        One greedy attempt.
+
+        Returns:
+            Tuple[Dict, List]: class ID -> {slot index: (subject, teacher ID)}, and the
+            (class ID, subject, teacher ID) of lessons that could not be placed.
+        """
+        slots_per_day = len(self.slots)
+        class_busy = {class_id: {} for class_id, _, _, _ in requirements}
+        teacher_busy = {teacher_id: set(info["unavailable"]) for teacher_id, info in self._teachers.items()}
+        # (class ID, subject) -> lessons on each day, to spread a subject over the week.
+        per_day = {}
+        teacher_hours = {}
+        for _, _, hours, teacher_id in requirements:
+            teacher_hours[teacher_id] = teacher_hours.get(teacher_id, 0) + hours
+
+        lessons = [(class_id, subject, teacher_id)
+                   for class_id, subject, hours, teacher_id in requirements for _ in range(hours)]
+        rng.shuffle(lessons)
+        lessons.sort(key=lambda lesson: -(teacher_hours[lesson[2]] + len(teacher_busy[lesson[2]])))
+
+        all_slots = list(range(self.slot_count))
+        unplaced = []
+        for class_id, subject, teacher_id in lessons:
+            busy = class_busy[class_id]
+            taken = teacher_busy[teacher_id]
+            days = per_day.setdefault((class_id, subject), [0] * len(self.days))
+            rng.shuffle(all_slots)
+            index, best = None, None
+            for candidate in all_slots:
+                if candidate in busy or candidate in taken:
+                    continue
+                # Fewest lessons of this subject that day, then earliest in the day.
+                score = (days[candidate // slots_per_day], candidate % slots_per_day)
+                if best is None or score < best:
+                    index, best = candidate, score
+            if index is None:
+                index = self._make_room(class_id, teacher_id, class_busy, teacher_busy, rng)
+                if index is None:
+                    unplaced.append((class_id, subject, teacher_id))
+                    continue
+            busy[index] = (subject, teacher_id)
+            taken.add(index)
+            days[index // slots_per_day] += 1
+        return class_busy, unplaced
+
+    def _make_room(self, class_id, teacher_id, class_busy, teacher_busy, rng) -> Optional[int]:
+        """
+        Free a slot for a lesson of class_id with teacher_id by moving another lesson
+        of the class to a slot where both the class and that lesson's teacher are free.
+        """
+        busy = class_busy[class_id]
+        free = [index for index in range(self.slot_count) if index not in busy]
+        candidates = [index for index in busy if index not in teacher_busy[teacher_id]]
+        rng.shuffle(candidates)
+        for index in candidates:
+            subject, other_teacher = busy[index]
+            for target in free:
+                if target not in teacher_busy[other_teacher]:
+                    busy[target] = busy.pop(index)
+                    teacher_busy[other_teacher].discard(index)
+                    teacher_busy[other_teacher].add(target)
+                    return index
+        return None
+
+    def build(self, storage=None, first_id: Optional[int] = None) -> List[Schedule]:
+        """
+        Build the timetable.
+
+        Args:
+            storage (DataStorage | SQLiteStorage, optional): If given, schedule IDs are
+                reserved from its sequence and the schedules are inserted with add_schedules.
+            first_id (int, optional): First schedule ID when no storage is given (default 1).
+
+        Returns:
+            List[Schedule]: One schedule per class and day, classes in the order their
+            first requirement was added.
+
+        Raises:
+            TimetableError: The requirements cannot be met.
+        """
+        requirements = self._assign_teachers()
+        for class_id in {class_id for class_id, _, _, _ in requirements}:
+            hours = sum(h for c, _, h, _ in requirements if c == class_id)
+            if hours > self.slot_count:
+                raise TimetableError(f"Class {class_id} needs {hours} lessons but the week has {self.slot_count} slots")
+
+        rng = random.Random(self.seed)
+        unplaced = []
+        for _ in range(max(1, self.attempts)):
+            placed, unplaced = self._place(requirements, rng)
+            if not unplaced:
+                break
+        else:
+            class_id, subject, teacher_id = unplaced[0]
+            raise TimetableError(f"Could not place {len(unplaced)} lessons, e.g. {subject} "
+                                 f"for class {class_id} with teacher {teacher_id}")
+
+        class_ids = list(dict.fromkeys(class_id for class_id, _, _, _ in requirements))
+        count = len(class_ids) * len(self.days)
+        if storage is not None:
+            ids = iter(storage.reserve_ids("schedules", count))
+        else:
+            ids = iter(range(first_id or 1, (first_id or 1) + count))
+
+        slots_per_day = len(self.slots)
+        schedules = []
+        for class_id in class_ids:
+            lessons = placed[class_id]
+            for day_number, day in enumerate(self.days):
+                schedule = Schedule(next(ids), class_id, day)
+                for slot_number, time in enumerate(self.slots):
+                    lesson = lessons.get(day_number * slots_per_day + slot_number)
+                    if lesson is not None:
+                        schedule.lessons[intern_string(time)] = {
+                            "subject": intern_string(lesson[0]),
+                            "teacher_id": lesson[1],
+                        }
+                schedules.append(schedule)
+        if storage is not None:
+            storage.add_schedules(schedules)
+        return schedules
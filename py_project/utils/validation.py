@@ -1,5 +1,7 @@
+import heapq
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, List
+from data.intervals import parse_time_slot, slots_overlap
 from data.storage import DataStorage as storage
 def validate_class_id(class_id: str) -> bool:
     """Validate that class_id follows the format 'number-letter' (e.g., '9-A')."""
@@ -18,7 +20,10 @@ def validate_time_slot(time_str: str) -> bool:
 
 def check_schedule_conflict(schedule: Dict, new_time: str, class_id: str, day: str, teacher_id: int, storage=storage()) -> bool:
     """Check if adding a new lesson causes a time or teacher conflict in the schedule.
-    
+
+    Time slots conflict when they overlap, not only when they are equal:
+    '09:00-09:45' and '09:30-10:15' clash.
+
     Args:
         schedule (Dict): The current schedule's lessons dictionary {time: {subject, teacher_id}}
         new_time (str): The time slot of the new lesson
@@ -26,24 +31,79 @@ def check_schedule_conflict(schedule: Dict, new_time: str, class_id: str, day: s
         day (str): The day of the schedule
         teacher_id (int): The teacher ID of the new lesson
         storage (DataStorage): The data storage instance
-    
+
     Returns:
         bool: True if there’s a conflict, False otherwise
     """
     # Check for time conflict within the current schedule
-    if new_time in schedule:
+    if any(slots_overlap(time, new_time) for time in schedule):
         return True
 
-    # Check for teacher conflict across all schedules
-    teacher_lessons = storage.get_schedules_by_teacher(teacher_id)
-    for lesson_schedule in teacher_lessons:
-        if lesson_schedule.day == day and new_time in lesson_schedule.lessons:
-            return True
+    # Check for teacher and class conflicts across all stored schedules
+    return bool(storage.find_lesson_conflicts(day, new_time, class_id=class_id, teacher_id=teacher_id))
+
+def validate_timetable(schedules: Iterable) -> List[Dict]:
+    """Find every pair of overlapping lessons in a set of schedules in one pass.
+
+    Lessons are grouped per teacher and day and per class and day, sorted by
+    start time and swept once, so the cost is O(n log n) plus the number of
+    conflicts found.
+
+    Args:
+        schedules (Iterable[Schedule]): The schedules to check against each other
+
+    Returns:
+        List[Dict]: One entry per clash: {"kind": "teacher" or "class", "owner": teacher or
+        class ID, "day", "first": {"schedule_id", "time"}, "second": {"schedule_id", "time"}}
+    """
+    groups = {}
+    for schedule in schedules:
+        for time, lesson in schedule.lessons.items():
+            for key in (("teacher", lesson["teacher_id"], schedule.day), ("class", schedule.class_id, schedule.day)):
+                groups.setdefault(key, []).append((parse_time_slot(time), time, schedule.id))
+
+    conflicts = []
+    for (kind, owner, day), lessons in groups.items():
+        def clash(first, second):
+            conflicts.append({"kind": kind, "owner": owner, "day": day,
+                              "first": {"schedule_id": first[2], "time": first[1]},
+                              "second": {"schedule_id": second[2], "time": second[1]}})
+
+        # Slots that cannot be parsed only clash with equal slots.
+        unparsed = {}
+        for lesson in lessons:
+            if lesson[0] is None:
+                for other in unparsed.setdefault(lesson[1], []):
+                    clash(other, lesson)
+                unparsed[lesson[1]].append(lesson)
 
-    # Check for class conflict across all schedules for the same class
-    class_lessons = storage.get_schedules_by_class(class_id)
-    for lesson_schedule in class_lessons:
-        if lesson_schedule.day == day and new_time in lesson_schedule.lessons:
-            return True
+        # Sweep by start time; active holds (end, lesson) of lessons still running.
+        active = []
+        for lesson in sorted((lesson for lesson in lessons if lesson[0] is not None),
+                             key=lambda lesson: (lesson[0], lesson[2])):
+            start, end = lesson[0]
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for _, other in active:
+                clash(other, lesson)
+            heapq.heappush(active, (end, lesson))
+    return conflicts
 
-    return False
\ No newline at end of file
+def find_schedule_conflicts(schedule, storage=storage()) -> List[Dict]:
+    """Find lessons of a schedule that overlap each other or lessons already in storage.
+
+    The stored copy of the schedule itself, if any, is not counted.
+
+    Returns:
+        List[Dict]: Conflicts in the format of validate_timetable; "first" is always
+        the lesson of the given schedule.
+    """
+    conflicts = validate_timetable([schedule])
+    for time, lesson in schedule.lessons.items():
+        for found in storage.find_lesson_conflicts(schedule.day, time, class_id=schedule.class_id,
+                                                   teacher_id=lesson["teacher_id"], exclude_schedule=schedule.id):
+            owner = lesson["teacher_id"] if found["kind"] == "teacher" else schedule.class_id
+            conflicts.append({"kind": found["kind"], "owner": owner, "day": schedule.day,
+                              "first": {"schedule_id": schedule.id, "time": time},
+                              "second": {"schedule_id": found["schedule_id"], "time": found["time"]}})
+    return conflicts